@@ -0,0 +1,195 @@
+import contextvars
+import io
+import logging
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+from catalog_sources import has_catalog_source
+from database import get_users, get_user, save_generation_history, save_listing_fingerprints
+from generation_jobs import is_cancellation
+from excel_generator import (
+    read_catalog,
+    filter_create_rows,
+    load_previous_fingerprints,
+    build_output_filename,
+    write_ebay_output,
+)
+from tracing import trace, span, log, progress
+
+# 구글시트 동시 다운로드 수 (네트워크 대기 위주라 스레드 사용)
+BATCH_FETCH_WORKERS = 4
+
+# 변환/파일 기록 프로세스 수 (CPU 작업이라 프로세스 사용)
+BATCH_PROCESS_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+# 시트 읽기 / 변환 완료를 기다리며 진행 보고(작업 취소 확인)하는 간격(초)
+BATCH_POLL_SECONDS = 0.5
+
+
+def generate_batch(user_ids='all', output_format='xlsx', force_refresh=False, mode='full', traced=None):
+    """여러 프로필을 한 번에 생성해 zip 하나로 묶음
+
+    user_ids 는 사용자 ID 목록 또는 'all'. 한 프로필이 실패해도 나머지는 계속 진행한다.
+    traced 는 generate_ebay_excel 과 같음 - 시트 읽기 / 결과 저장 span 을 기록한다 (변환 프로세스 안은 제외).
+
+    반환값(dict):
+        output   - 프로필별 파일을 담은 zip (BytesIO)
+        filename - zip 파일명
+        statuses - 프로필별 결과 목록 (user_id, name, status, filename, rows, error, 단계별 시간)
+        timings  - 전체 소요 시간(초)
+        trace    - span 트리 (tracing.Span) - 기록하지 않았으면 None
+    """
+    with trace('batch', enabled=traced, output_format=output_format, mode=mode) as root:
+        result = _generate_batch(user_ids, output_format, force_refresh, mode)
+    result['timings'] = {'total': root.duration}
+    result['trace'] = root if root.recorded else None
+    return result
+
+
+def _generate_batch(user_ids, output_format, force_refresh, mode):
+    if user_ids == 'all':
+        users = get_users()
+    else:
+        users = [get_user(user_id) or {'id': user_id, 'name': ''} for user_id in user_ids]
+
+    statuses = {user['id']: _new_status(user) for user in users}
+    output = io.BytesIO()
+
+    process_context = multiprocessing.get_context('spawn')
+    fetch_pool = ThreadPoolExecutor(max_workers=BATCH_FETCH_WORKERS)
+    process_pool = ProcessPoolExecutor(max_workers=BATCH_PROCESS_WORKERS, mp_context=process_context)
+    try:
+        _run_batch(users, statuses, output, output_format, force_refresh, mode, fetch_pool, process_pool)
+    except BaseException:
+        # 작업 취소 등으로 중단 - 아직 시작하지 않은 시트 읽기 / 변환은 버리고 기다리지 않음
+        fetch_pool.shutdown(wait=False, cancel_futures=True)
+        process_pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    fetch_pool.shutdown()
+    process_pool.shutdown()
+    output.seek(0)
+
+    return {
+        'output': output,
+        'filename': f"ebay_bulk_batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+        'statuses': list(statuses.values()),
+    }
+
+
+def _run_batch(users, statuses, output, output_format, force_refresh, mode, fetch_pool, process_pool):
+    """시트 읽기(스레드 풀) → 변환(프로세스 풀) → zip 기록 - 프로필별 실패는 statuses 에 기록하고 취소는 그대로 전달"""
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+
+        # 1. 시트 읽기 - 스레드 풀
+        # 작업마다 현재 컨텍스트를 복사해 넘겨 스레드 안의 span 도 이 trace 에 붙게 함
+        fetch_futures = {
+            fetch_pool.submit(contextvars.copy_context().run, _fetch_user_data, user, force_refresh): user
+            for user in users if has_catalog_source(user)
+        }
+        for user in users:
+            if not has_catalog_source(user):
+                _mark_failed(statuses[user['id']], "사용자 정보 또는 카탈로그 원본(구글시트 ID / 파일 경로)이 없습니다.")
+
+        # 2. 읽기가 끝나는 대로 변환/기록 - 프로세스 풀
+        convert_futures = {}
+        for future in _as_completed(fetch_futures):
+            user = fetch_futures[future]
+            status = statuses[user['id']]
+            try:
+                bulk_df, category_map, fetch_timings = future.result()
+                status.update(fetch_timings)
+
+                previous_fingerprints = load_previous_fingerprints(user['id'], mode)
+                name_prefix = os.path.splitext(build_output_filename(user, output_format, mode))[0]
+                convert_future = process_pool.submit(
+                    _convert_user_data, bulk_df, category_map, user, output_format, previous_fingerprints, name_prefix
+                )
+                convert_futures[convert_future] = user
+            except Exception as e:
+                if is_cancellation(e):
+                    raise
+                _mark_failed(status, str(e))
+
+        # 3. 결과를 zip 에 추가하고 이력 저장 (파일 쓰기는 메인 프로세스에서만)
+        for future in _as_completed(convert_futures):
+            user = convert_futures[future]
+            status = statuses[user['id']]
+            try:
+                result = future.result()
+                filename = build_output_filename(user, output_format, mode)
+                if result['parts']:
+                    # 여러 판매 사이트 프로필은 사이트별 파일 zip
+                    filename = f"{os.path.splitext(filename)[0]}.zip"
+                with span('save', user_id=user['id']) as stage:
+                    archive.writestr(f"{user['id']}_{filename}", result['output'])
+                    stage.count('bytes_written', len(result['output']))
+
+                    save_generation_history(user['id'], filename, result['counts']['total'])
+                    save_listing_fingerprints(user['id'], result['fingerprints'])
+
+                status.update(result['timings'])
+                status.update({
+                    'status': 'ok',
+                    'filename': filename,
+                    'rows': result['counts']['total'],
+                    'warnings': len(result['findings']),
+                })
+            except Exception as e:
+                if is_cancellation(e):
+                    raise
+                _mark_failed(status, str(e))
+
+
+def _as_completed(futures):
+    """끝난 순서대로 future 반환 - 기다리는 동안에도 진행 보고(끝난 프로필 수)를 해서 취소 요청이 바로 반영되도록"""
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, timeout=BATCH_POLL_SECONDS, return_when=FIRST_COMPLETED)
+        progress(len(futures) - len(pending), len(futures))
+        yield from done
+
+
+def _new_status(user):
+    """프로필별 결과 기본값"""
+    return {
+        'user_id': user['id'],
+        'name': user.get('name', ''),
+        'status': 'pending',
+        'filename': '',
+        'rows': 0,
+        'warnings': 0,
+        'error': '',
+    }
+
+
+def _mark_failed(status, message):
+    """프로필 실패 기록"""
+    status['status'] = 'error'
+    status['error'] = message
+    log("일괄생성", f"{status['name']} 실패: {message}", level=logging.WARNING, user_id=status['user_id'])
+
+
+def _fetch_user_data(user, force_refresh):
+    """시트 읽기 + Create 필터링 (스레드 풀 작업)"""
+    with span('load', user_id=user['id']) as load:
+        bulk_df, category_map = read_catalog(user, force_refresh)
+        load.count('rows_out', len(bulk_df))
+
+    with span('filter', user_id=user['id']) as stage:
+        bulk_df = filter_create_rows(bulk_df)
+        stage.count('rows_out', len(bulk_df))
+    return bulk_df, category_map, {'load': load.duration, 'filter': stage.duration}
+
+
+def _convert_user_data(bulk_df, category_map, user, output_format, previous_fingerprints, name_prefix='ebay_bulk'):
+    """변환 + 파일 기록 + 검증 (프로세스 풀 작업) - 파일은 bytes 로 반환"""
+    result = write_ebay_output(
+        bulk_df, category_map, user, output_format, previous_fingerprints, name_prefix=name_prefix
+    )
+    with result['output'] as output:
+        result['output'] = output.read()
+    result.pop('preview')
+    return result
@@ -0,0 +1,479 @@
+"""출력 형식별(xlsx / csv) 생성 시간과 최대 메모리 비교 벤치마크 + 단계별 벤치마크 + 시작 시간 / 이력 로그 점검
+
+사용법:
+    python benchmark.py [--sizes 10000 100000 500000] [--startup] [--history]
+    python benchmark.py --stages [--sizes 1000 10000 100000 1000000] [--json out.json] [--compare baseline.json]
+
+출력 형식 측정 예 (python benchmark.py --sizes 100000 500000, Python 3.11, Xeon 1코어, 최대 메모리는 tracemalloc 기준):
+    행 수      형식   시간      최대 메모리   파일 크기
+    100,000   xlsx    15.3s      89.1MB      7.5MB
+    100,000   csv      4.1s      82.2MB     98.1MB
+    500,000   xlsx    77.6s     314.7MB     37.5MB
+    500,000   csv     31.3s     311.7MB    490.5MB
+csv 는 2.5~4배 빠르지만 설명 HTML 이 압축되지 않아 파일이 13배쯤 크다.
+두 형식 모두 PSKU 그룹 청크 단위로 변환하며 기록하고 결과 파일은 OUTPUT_SPOOL_BYTES 를 넘으면 임시 파일로 옮겨지므로,
+행 수에 비례해 남는 메모리는 검증용 컬럼과 리스팅 지문뿐이다 (최대 메모리에 결과 파일 크기는 들어가지 않음).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import excel_generator
+from excel_generator import write_ebay_output
+
+DEFAULT_SIZES = [10_000, 100_000, 500_000]
+
+# 단계별 벤치마크 행 수 / 측정 단계 (시트 읽기 → Create 필터 → 변환 → 검증 → xlsx 기록)
+STAGE_BENCH_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+BENCH_STAGES = ['read', 'filter', 'convert', 'validate', 'write_xlsx']
+
+# 기준 결과 대비 이 비율 이상 느려지거나 메모리를 더 쓰면 회귀로 판단
+# (작은 단계의 측정 잡음을 무시하도록 절대 차이 하한도 둔다)
+STAGE_REGRESSION_TOLERANCE = 0.25
+STAGE_REGRESSION_MIN_SECONDS = 0.05
+STAGE_REGRESSION_MIN_MB = 5.0
+
+# 합성 카탈로그 기본값
+SYNTHETIC_VARIATIONS = 3
+SYNTHETIC_INDEX_DEPTH = 5
+SYNTHETIC_DESCRIPTION_SIZE = 2300
+SYNTHETIC_CATEGORIES = 50
+BULK_HEADER = ['PSKU', 'SKU', 'OPTION', 'PRICE', 'Product Name', 'Categoery ID', 'Categoery', 'BRAND', 'INDEX', 'Create']
+
+# 이력 로그 벤치마크 - 기존 이력 건수별로 추가/조회 비용이 일정한지 확인
+HISTORY_BENCH_SIZES = [10_000, 100_000, 1_000_000]
+HISTORY_BENCH_USERS = 20
+
+# 모듈별 import 시간 상한(초) - 넘으면 --startup 점검 실패
+# (streamlit / gspread / openpyxl 을 모듈 로드 시 import 하던 때 excel_generator 는 약 1.1초)
+STARTUP_BUDGET_SECONDS = {
+    'cli': 0.05,
+    'excel_generator': 0.8,
+}
+
+
+def make_synthetic_catalog(products, variations=SYNTHETIC_VARIATIONS, index_depth=SYNTHETIC_INDEX_DEPTH,
+                           description_size=SYNTHETIC_DESCRIPTION_SIZE, categories=SYNTHETIC_CATEGORIES, seed=0):
+    """Bulk / CAT 탭 원본 값(시트 get_all_values 형식)과 프로필 합성 - (bulk_values, cat_values, user) 반환
+
+    products    - 상품(PSKU) 수, 상품마다 variations 개 베리에이션 행
+    index_depth - INDEX 최댓값 (상품마다 0..index_depth 중 무작위, 추가 이미지 수)
+    description_size - 프로필 기본 설명 길이(자)
+    categories  - 카테고리 종류 수 (CAT 탭 행 수)
+    """
+    rng = np.random.default_rng(seed)
+    row_count = products * variations
+    colors = ["Red", "Blue", "Green", "Black"]
+    category_ids = [str(100000 + i) for i in range(categories)]
+
+    color = rng.integers(0, len(colors), row_count).tolist()
+    price = rng.uniform(5, 200, row_count).tolist()
+    category = rng.integers(0, categories, products).tolist()
+    index = rng.integers(0, index_depth + 1, products).tolist()
+
+    bulk_values = [list(BULK_HEADER)]
+    for i in range(row_count):
+        product, variation = divmod(i, variations)
+        psku = f"P{product:07d}"
+        bulk_values.append([
+            psku,
+            f"{psku}-{variation}",
+            f"{colors[color[i]]} {variation}",
+            f"{price[i]:.2f}",
+            f"Synthetic product {product}",
+            category_ids[category[product]],
+            "",
+            "BRAND",
+            str(index[product]),
+            "TRUE",
+        ])
+
+    cat_values = [[f"Category {cid}", cid, "1000-New"] for cid in category_ids]
+
+    filler = 'Benchmark description. ' * (description_size // 23 + 1)
+    user = {
+        'name': 'benchmark',
+        'image_domain': 'https://images.example.com',
+        'image_url_pattern': '/{sku}.jpg',
+        'shop_code': 'BENCH',
+        'default_quantity': 10,
+        'default_description': '<p>' + filler[:description_size] + '</p>',
+        'shipping_profile_name': 'STANDARD',
+        'return_profile_name': '30 Days Return',
+        'payment_profile_name': 'eBay Managed Payments',
+    }
+    return bulk_values, cat_values, user
+
+
+def make_synthetic_bulk(row_count, variations=SYNTHETIC_VARIATIONS, seed=0):
+    """Bulk 탭 형식의 합성 데이터 생성 - (bulk_df, category_map, user) 반환"""
+    products = -(-row_count // variations)
+    bulk_values, cat_values, user = make_synthetic_catalog(products, variations, seed=seed)
+
+    bulk_df = pd.DataFrame(bulk_values[1:row_count + 1], columns=bulk_values[0])
+    category_map = {cid: {'path': path, 'condition': condition} for path, cid, condition in cat_values}
+    return bulk_df, category_map, user
+
+
+class FakeSheetsClient:
+    """read_bulk_and_cat_tabs 가 쓰는 gspread 클라이언트 부분만 흉내 낸 로컬 시트 원본
+
+    리비전 조회는 실패로 처리해 스냅샷 캐시를 읽거나 쓰지 않는다 (항상 전체 읽기 경로).
+    values_batch_get 은 Sheets API 처럼 범위 밖 / 뒤쪽 빈 셀을 잘라서 돌려준다.
+    """
+
+    def __init__(self, tabs):
+        self.tabs = tabs
+        self.http_client = self
+
+    def request(self, *args, **kwargs):
+        raise Exception("로컬 시트 원본은 리비전이 없습니다")
+
+    def values_batch_get(self, sheet_id, ranges, params=None):
+        major_dimension = (params or {}).get('majorDimension', 'ROWS')
+        value_ranges = []
+        for a1_range in ranges:
+            match = _A1_RANGE.match(a1_range)
+            values = self.tabs[match['tab'].replace("''", "'")]
+            first_row = int(match['first_row'] or 1) - 1
+            last_row = int(match['last_row']) if match['last_row'] else len(values)
+            first_col = _column_position(match['first_col']) if match['first_col'] else 0
+            last_col = _column_position(match['last_col']) + 1 if match['last_col'] else None
+
+            rows = [row[first_col:last_col] for row in values[first_row:last_row]]
+            if major_dimension == 'COLUMNS':
+                width = max((len(row) for row in rows), default=0)
+                rows = [[row[i] if i < len(row) else '' for row in rows] for i in range(width)]
+            value_ranges.append({'range': a1_range, 'values': _trim_values(rows)})
+        return {'spreadsheetId': sheet_id, 'valueRanges': value_ranges}
+
+
+_A1_RANGE = re.compile(
+    r"^'(?P<tab>(?:[^']|'')+)'!(?P<first_col>[A-Z]*)(?P<first_row>\d*):(?P<last_col>[A-Z]*)(?P<last_row>\d*)$"
+)
+
+
+def _column_position(letters):
+    position = 0
+    for letter in letters:
+        position = position * 26 + ord(letter) - ord('A') + 1
+    return position - 1
+
+
+def _trim_values(rows):
+    """뒤쪽 빈 셀과 뒤쪽 빈 행 제거 (API 응답 형식)"""
+    trimmed = []
+    for row in rows:
+        end = len(row)
+        while end and row[end - 1] == '':
+            end -= 1
+        trimmed.append(list(row[:end]))
+    while trimmed and not trimmed[-1]:
+        trimmed.pop()
+    return trimmed
+
+
+def measure(func, *args, quiet=False):
+    """func(*args) 의 실행 시간(초)과 tracemalloc 기준 최대 메모리(MB) 측정
+
+    tracemalloc 자체가 실행을 크게 느리게 하므로 시간은 추적 없이 따로 측정한다.
+    pyarrow 문자열 버퍼처럼 Python 할당자를 거치지 않는 메모리는 최대 메모리에 포함되지 않는다.
+    quiet=True 이면 측정 대상이 출력하는 진행 메시지를 숨긴다.
+    """
+    output = contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext()
+    with output:
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+        del result
+
+        tracemalloc.start()
+        try:
+            result = func(*args)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def bench_output_formats(sizes=DEFAULT_SIZES, formats=('xlsx', 'csv')):
+    """행 수별로 출력 형식마다 시간/메모리/파일 크기 측정"""
+    results = []
+    for size in sizes:
+        bulk_df, category_map, user = make_synthetic_bulk(size)
+        for output_format in formats:
+            result, elapsed, peak_mb = measure(
+                lambda: write_ebay_output(bulk_df, category_map, user, output_format)
+            )
+            output = result['output']
+            output.seek(0, os.SEEK_END)
+            results.append({
+                'rows': size,
+                'format': output_format,
+                'output_rows': result['counts']['total'],
+                'seconds': round(elapsed, 2),
+                'peak_mb': round(peak_mb, 1),
+                'file_mb': round(output.tell() / 1024 / 1024, 1),
+            })
+            print(f"[벤치] {size:>9,}행 {output_format:<4} "
+                  f"{elapsed:8.2f}s  peak {peak_mb:8.1f}MB  file {results[-1]['file_mb']:7.1f}MB")
+    return results
+
+
+def bench_stages(sizes=STAGE_BENCH_SIZES, variations=SYNTHETIC_VARIATIONS, index_depth=SYNTHETIC_INDEX_DEPTH,
+                 description_size=SYNTHETIC_DESCRIPTION_SIZE, categories=SYNTHETIC_CATEGORIES):
+    """행 수별로 생성 단계마다 시간/메모리 측정 - 각 단계는 앞 단계 결과를 입력으로 사용
+
+    시트 읽기는 FakeSheetsClient(로컬 원본)로 read_bulk_and_cat_tabs 전체 경로를 실행한다.
+    반환값: [{rows, stage, seconds, peak_mb}]
+    """
+    import gspread  # noqa: F401 - 첫 시트 읽기 시간에 import 시간이 섞이지 않도록 미리 로드
+    from descriptions import get_description_template
+    from validation import validate_ebay_data
+
+    results = []
+    for size in sizes:
+        products = -(-size // variations)
+        bulk_values, cat_values, user = make_synthetic_catalog(
+            products, variations, index_depth, description_size, categories
+        )
+        client = FakeSheetsClient({'Bulk': bulk_values, 'CAT': cat_values})
+        template = get_description_template(user)
+
+        with mock.patch.object(excel_generator, 'get_google_sheets_client', return_value=client):
+            (bulk_df, category_map), *read = measure(
+                excel_generator.read_bulk_and_cat_tabs, 'benchmark', True, quiet=True
+            )
+
+        stages = [('read', *read)]
+        bulk_df, *filtered = measure(excel_generator.filter_create_rows, bulk_df, quiet=True)
+        stages.append(('filter', *filtered))
+        ebay_df, *converted = measure(
+            excel_generator.convert_to_ebay_variations, bulk_df, category_map, user, quiet=True
+        )
+        stages.append(('convert', *converted))
+        _, *validated = measure(validate_ebay_data, ebay_df, category_map, quiet=True)
+        stages.append(('validate', *validated))
+        _, *written = measure(
+            lambda: excel_generator.write_ebay_frame(io.BytesIO(), ebay_df, 'xlsx', template), quiet=True
+        )
+        stages.append(('write_xlsx', *written))
+
+        for stage, elapsed, peak_mb in stages:
+            results.append({'rows': size, 'stage': stage, 'seconds': round(elapsed, 3), 'peak_mb': round(peak_mb, 1)})
+            print(f"[단계] {size:>9,}행 {stage:<10} {elapsed:8.3f}s  peak {peak_mb:8.1f}MB")
+
+    return results
+
+
+def save_bench_results(path, results, **params):
+    """단계별 벤치마크 결과를 실행 환경 정보와 함께 JSON 으로 저장"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'params': params,
+        'results': results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"[벤치] 결과 저장: {path}")
+
+
+def compare_bench_results(baseline_path, results, tolerance=STAGE_REGRESSION_TOLERANCE):
+    """기준 JSON 과 같은 (행 수, 단계) 결과를 비교해 회귀 목록 반환 - 시간/메모리 모두 확인"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r['rows'], r['stage']): r for r in json.load(f)['results']}
+
+    regressions = []
+    for result in results:
+        base = baseline.get((result['rows'], result['stage']))
+        if base is None:
+            continue
+
+        for metric, min_delta in (('seconds', STAGE_REGRESSION_MIN_SECONDS), ('peak_mb', STAGE_REGRESSION_MIN_MB)):
+            before, after = base[metric], result[metric]
+            ratio = after / before if before else (1.0 if after == before else float('inf'))
+            slower = after - before > min_delta and ratio > 1 + tolerance
+            print(f"[비교] {result['rows']:>9,}행 {result['stage']:<10} {metric:<7} "
+                  f"{before:10.3f} → {after:10.3f} ({ratio:5.2f}x){'  회귀' if slower else ''}")
+            if slower:
+                regressions.append(
+                    f"{result['rows']:,}행 {result['stage']} {metric}: {before} → {after} ({ratio:.2f}x)"
+                )
+
+    return regressions
+
+
+def bench_history_log(sizes=HISTORY_BENCH_SIZES, appends=1000):
+    """기존 이력이 N건일 때 이력 1건 추가 / 기간 조회에 걸리는 시간 측정
+
+    색인 첫 구성(로그 전체 읽기)은 프로세스당 한 번이라 따로 표시한다.
+    """
+    import history_log
+
+    results = []
+    for size in sizes:
+        log_dir = tempfile.mkdtemp(prefix="history_bench_")
+        try:
+            _fill_history_log(history_log, log_dir, size)
+
+            started = time.perf_counter()
+            history_log.get_stats(log_dir)
+            rebuild = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for i in range(appends):
+                history_log.append_entry(log_dir, _history_entry(i, size + i))
+            append_us = (time.perf_counter() - started) / appends * 1_000_000
+
+            # 추가 직후 조회 = 늘어난 부분만 색인에 반영 + 기간 집계
+            started = time.perf_counter()
+            for i in range(100):
+                history_log.append_entry(log_dir, _history_entry(i, size + appends + i))
+                history_log.get_stats(log_dir, i % HISTORY_BENCH_USERS, start="2026-01-01", end="2026-06-30")
+            query_ms = (time.perf_counter() - started) / 100 * 1000
+        finally:
+            shutil.rmtree(log_dir, ignore_errors=True)
+
+        results.append({'entries': size, 'append_us': round(append_us, 1),
+                        'query_ms': round(query_ms, 3), 'rebuild_s': round(rebuild, 2)})
+        print(f"[이력] {size:>9,}건  추가 {append_us:7.1f}µs  조회 {query_ms:7.3f}ms  (첫 색인 {rebuild:.2f}s)")
+    return results
+
+
+def _history_entry(i, seq):
+    """합성 이력 1건 - 사용자/날짜가 고르게 퍼지도록"""
+    return {
+        'user_id': i % HISTORY_BENCH_USERS,
+        'file_name': f"ebay_bulk_{i % HISTORY_BENCH_USERS}.xlsx",
+        'product_count': seq % 5000,
+        'created_at': f"2026-{seq % 12 + 1:02d}-{seq % 28 + 1:02d}T12:00:00.{seq % 1_000_000:06d}",
+    }
+
+
+def _fill_history_log(history_log, log_dir, size):
+    """append_entry 와 같은 파일 구성(회전/압축 포함)으로 이력 size 건을 빠르게 채움"""
+    os.makedirs(log_dir, exist_ok=True)
+    active_path = os.path.join(log_dir, history_log.ACTIVE_LOG)
+    f = open(active_path, "a", encoding="utf-8")
+    try:
+        for seq in range(size):
+            f.write(json.dumps(_history_entry(seq, seq), ensure_ascii=False) + "\n")
+            if f.tell() > history_log.HISTORY_LOG_MAX_BYTES:
+                f.close()
+                with history_log._lock:
+                    history_log._rotate(log_dir)
+                f = open(active_path, "a", encoding="utf-8")
+    finally:
+        f.close()
+
+
+def measure_import_time(module, repeat=3):
+    """새 인터프리터에서 python -X importtime 으로 모듈 누적 import 시간(초) 측정 - 최솟값"""
+    best = None
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        if completed.returncode != 0:
+            raise Exception(f"{module} import 실패: {completed.stderr.strip().splitlines()[-1]}")
+
+        for line in completed.stderr.splitlines():
+            parts = line.split("|")
+            if len(parts) == 3 and parts[2].strip() == module and not parts[2].startswith("  "):
+                seconds = int(parts[1]) / 1_000_000
+                best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def check_startup_time(budgets=STARTUP_BUDGET_SECONDS):
+    """모듈별 import 시간이 상한 이내인지 확인 - 초과한 모듈 이름 목록 반환"""
+    failed = []
+    for module, budget in budgets.items():
+        seconds = measure_import_time(module)
+        ok = seconds <= budget
+        print(f"[시작시간] {module:<16} {seconds:6.3f}s (상한 {budget:.3f}s) {'OK' if ok else '초과'}")
+        if not ok:
+            failed.append(module)
+    return failed
+
+
+def run_stage_bench(args):
+    """단계별 벤치마크 실행 → JSON 저장 → 기준 비교 - 종료 코드 반환 (benchmark.py / cli bench 공용)"""
+    params = {
+        'variations': args.variations,
+        'index_depth': args.index_depth,
+        'description_size': args.description_size,
+        'categories': args.categories,
+    }
+    results = bench_stages(args.sizes or STAGE_BENCH_SIZES, **params)
+
+    if args.json:
+        save_bench_results(args.json, results, **params)
+    if args.compare:
+        regressions = compare_bench_results(args.compare, results, args.tolerance)
+        for regression in regressions:
+            print(f"  ❌ {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="eBay 벌크 출력 형식 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+")
+    parser.add_argument("--startup", action="store_true", help="import 시간 상한 점검만 실행")
+    parser.add_argument("--history", action="store_true", help="이력 로그 추가/조회 벤치마크만 실행")
+    parser.add_argument("--stages", action="store_true", help="합성 카탈로그로 단계별 시간/메모리 측정")
+    parser.add_argument("--variations", type=int, default=SYNTHETIC_VARIATIONS, help="상품당 베리에이션 수")
+    parser.add_argument("--index-depth", type=int, default=SYNTHETIC_INDEX_DEPTH, help="INDEX 최댓값 (추가 이미지 수)")
+    parser.add_argument("--description-size", type=int, default=SYNTHETIC_DESCRIPTION_SIZE, help="설명 길이(자)")
+    parser.add_argument("--categories", type=int, default=SYNTHETIC_CATEGORIES, help="카테고리 종류 수")
+    parser.add_argument("--json", help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", help="기준 결과 JSON - 회귀가 있으면 종료 코드 1")
+    parser.add_argument("--tolerance", type=float, default=STAGE_REGRESSION_TOLERANCE,
+                        help="회귀로 볼 증가 비율 (기본 0.25 = 25%%)")
+    args = parser.parse_args()
+
+    if args.startup:
+        sys.exit(1 if check_startup_time() else 0)
+    if args.history:
+        bench_history_log()
+        return
+    if args.stages:
+        sys.exit(run_stage_bench(args))
+    bench_output_formats(args.sizes or DEFAULT_SIZES)
+
+
+if __name__ == "__main__":
+    main()
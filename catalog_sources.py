@@ -0,0 +1,258 @@
+import csv
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from tracing import log, count
+
+# 카탈로그 원본 종류 (프로필 source_type) - 표시 이름
+SOURCE_TYPES = {
+    'sheets': '구글시트',
+    'xlsx': 'Excel 파일 (.xlsx)',
+    'csv': 'CSV 파일',
+    'parquet': 'Parquet 파일',
+}
+DEFAULT_SOURCE_TYPE = 'sheets'
+
+# 시트 / 워크북 탭 이름
+BULK_TAB = 'Bulk'
+CAT_TAB = 'CAT'
+
+# Bulk 탭에서 읽는 컬럼 (나머지 컬럼은 변환에 쓰지 않으므로 읽지 않음)
+BULK_COLUMNS = ['PSKU', 'SKU', 'OPTION', 'PRICE', 'Product Name', 'Categoery ID', 'Categoery', 'BRAND', 'INDEX', 'Create']
+CREATE_COLUMN = 'Create'
+
+
+def get_source_type(user):
+    """프로필의 카탈로그 원본 종류 (설정이 없으면 구글시트)"""
+    source_type = user.get('source_type') or DEFAULT_SOURCE_TYPE
+    if source_type not in SOURCE_TYPES:
+        raise Exception(f"지원하지 않는 카탈로그 원본입니다: {source_type}")
+    return source_type
+
+
+def has_catalog_source(user):
+    """프로필에 카탈로그 원본(구글시트 ID 또는 파일 경로)이 설정되어 있는지"""
+    if (user.get('source_type') or DEFAULT_SOURCE_TYPE) == 'sheets':
+        return bool(user.get('google_sheet_id'))
+    return bool(user.get('source_path'))
+
+
+def read_local_catalog(user):
+    """로컬 파일 원본에서 (bulk_df, category_map) 읽기 - 필요한 컬럼만, Create=TRUE 행만
+
+    bulk_df 인덱스는 구글시트와 같이 파일의 데이터 행 위치(헤더 다음 행이 0)라서 검증 결과의 행 번호가 맞는다.
+    CAT 은 category_path 파일에서 읽고, 없으면 xlsx 는 같은 워크북의 CAT 탭을 읽는다.
+    """
+    source_type = get_source_type(user)
+    path = user.get('source_path')
+    if not path:
+        raise Exception("카탈로그 파일 경로가 설정되지 않았습니다.")
+    if not os.path.exists(path):
+        raise Exception(f"카탈로그 파일을 찾을 수 없습니다: {path}")
+
+    bulk_df = LOCAL_BULK_READERS[source_type](path)
+    count('rows_out', len(bulk_df))
+
+    category_path = user.get('category_path')
+    if category_path:
+        cat_rows = read_category_rows(category_path)
+    elif source_type == 'xlsx':
+        cat_rows = _read_xlsx_rows(path, CAT_TAB)
+    else:
+        cat_rows = None
+
+    if cat_rows is None:
+        log("경고", "CAT 탭을 찾을 수 없습니다.", level=logging.WARNING)
+        cat_rows = []
+    return bulk_df, build_category_map(cat_rows)
+
+
+def build_category_map(cat_rows):
+    """CAT 탭 행 목록 [경로, 카테고리 ID, 상태 ID] → {카테고리 ID: {path, condition}}"""
+    category_map = {}
+    for row in cat_rows:
+        if len(row) >= 2 and row[1].strip():
+            category_path = row[0].strip()
+            category_id = row[1].strip()
+            condition_id = row[2].strip() if len(row) >= 3 else "1000-New"
+
+            category_map[category_id] = {
+                'path': category_path,
+                'condition': condition_id
+            }
+    return category_map
+
+
+def read_category_rows(path):
+    """CAT 파일(xlsx / csv / parquet, 확장자로 판단)의 행 목록 - 헤더 없이 구글시트 CAT 탭과 같은 형식, 파일이 없으면 None"""
+    if not os.path.exists(path):
+        return None
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.xlsx':
+        rows = _read_xlsx_rows(path, CAT_TAB)
+        return rows if rows is not None else _read_xlsx_rows(path, None)
+    if extension == '.parquet':
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path, memory_map=True)
+        columns = [_text_array(table.column(i)).to_pylist() for i in range(min(3, table.num_columns))]
+        return [list(row) for row in zip(*columns)]
+
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        return [row for row in csv.reader(f)]
+
+
+def read_parquet_bulk(path):
+    """Parquet Bulk 파일 - 필요한 컬럼만 메모리 맵으로 읽고 Arrow 에서 Create 필터 후 변환"""
+    import pyarrow.parquet as pq
+
+    names = pq.read_schema(path, memory_map=True).names
+    selected = _select_columns(names)
+    table = pq.read_table(path, columns=list(selected), memory_map=True)
+    return _arrow_to_bulk_frame(table, selected)
+
+
+def read_csv_bulk(path):
+    """CSV Bulk 파일 - 필요한 컬럼만 pyarrow CSV 리더로 문자열 그대로 읽고 Arrow 에서 Create 필터 후 변환"""
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        header = next(csv.reader(f), [])
+    if not header:
+        return pd.DataFrame()
+    selected = _select_columns(header)
+
+    table = pa_csv.read_csv(
+        path,
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=list(selected),
+            column_types={column: pa.string() for column in selected},
+            strings_can_be_null=False,
+            quoted_strings_can_be_null=False,
+        ),
+    )
+    return _arrow_to_bulk_frame(table, selected)
+
+
+def read_xlsx_bulk(path):
+    """xlsx Bulk 탭 - 읽기 전용 모드로 행을 순회하며 필요한 컬럼만 꺼내고 Create 가 TRUE 인 행만 보관"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        if BULK_TAB not in workbook.sheetnames:
+            raise Exception(f"'{BULK_TAB}' 탭을 찾을 수 없습니다: {path}")
+        rows = workbook[BULK_TAB].iter_rows(values_only=True)
+
+        header = [_cell_text(value).strip() for value in next(rows, ())]
+        if not header:
+            return pd.DataFrame()
+        selected = _select_columns(header)
+        positions = [header.index(name) for name in selected.values()]
+        create = header.index(CREATE_COLUMN) if CREATE_COLUMN in selected.values() else None
+
+        kept = []
+        index = []
+        row_count = 0
+        for row in rows:
+            row_count += 1
+            if create is not None and (create >= len(row) or _cell_text(row[create]).upper() != 'TRUE'):
+                continue
+            kept.append([_cell_text(row[i]) if i < len(row) else '' for i in positions])
+            index.append(row_count - 1)
+
+        # Create 컬럼이 없으면 모든 행을 읽으므로 구글시트처럼 끝의 빈 행은 제외
+        while create is None and kept and not any(kept[-1]):
+            kept.pop()
+            index.pop()
+    finally:
+        workbook.close()
+
+    count('rows_in', row_count)
+    return pd.DataFrame(kept, index=pd.Index(index, dtype=np.int64), columns=list(selected.values()))
+
+
+# 원본 종류별 Bulk 리더 - 모두 필요한 컬럼만, Create=TRUE 행만 반환
+LOCAL_BULK_READERS = {
+    'xlsx': read_xlsx_bulk,
+    'csv': read_csv_bulk,
+    'parquet': read_parquet_bulk,
+}
+
+
+def _select_columns(header):
+    """헤더에서 읽을 컬럼 {원본 컬럼명: 공백 제거한 이름} - 파일 순서 유지, 이름이 중복되면 첫 컬럼만"""
+    selected = {}
+    for name in header:
+        stripped = str(name).strip()
+        if stripped in BULK_COLUMNS and stripped not in selected.values():
+            selected[name] = stripped
+    return selected
+
+
+def _arrow_to_bulk_frame(table, selected):
+    """Arrow 테이블을 문자열로 맞추고 Create=TRUE 행만 남겨 DataFrame 으로 (인덱스는 원래 행 위치)"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    count('rows_in', table.num_rows)
+    columns = {selected[name]: _text_array(table.column(name)) for name in selected}
+    table = pa.table(columns)
+
+    rows = np.arange(table.num_rows)
+    if CREATE_COLUMN in columns:
+        mask = pc.equal(pc.utf8_upper(table.column(CREATE_COLUMN)), 'TRUE')
+        table = table.filter(mask)
+        rows = rows[np.asarray(mask, dtype=bool)]
+
+    bulk_df = table.to_pandas()
+    bulk_df.index = pd.Index(rows, dtype=np.int64)
+    return bulk_df
+
+
+def _text_array(column):
+    """Arrow 컬럼 → 구글시트 표시값과 같은 문자열 (null 은 빈 문자열, 정수 값 실수는 소수점 없이)"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if pa.types.is_boolean(column.type):
+        text = pc.if_else(column, 'TRUE', 'FALSE')
+    elif pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        text = column
+    else:
+        text = pc.cast(column, pa.string())
+    return pc.fill_null(text, '')
+
+
+def _read_xlsx_rows(path, sheet_name):
+    """xlsx 탭의 모든 행을 문자열 목록으로 (sheet_name=None 이면 첫 탭) - 탭이 없으면 None"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet_name is None:
+            worksheet = workbook.worksheets[0]
+        elif sheet_name in workbook.sheetnames:
+            worksheet = workbook[sheet_name]
+        else:
+            return None
+        return [[_cell_text(value) for value in row] for row in worksheet.iter_rows(values_only=True)]
+    finally:
+        workbook.close()
+
+
+def _cell_text(value):
+    """xlsx 셀 값 → 구글시트 표시값과 같은 문자열"""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
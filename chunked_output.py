@@ -0,0 +1,123 @@
+import logging
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from excel_generator import write_ebay_frame
+from sites import ACTION_COLUMN
+from tracing import log, progress
+
+# 분할 파일을 동시에 기록할 프로세스 수
+CHUNK_WRITE_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+# 크기 초과로 다시 나눌 때 목표 크기에 두는 여유 (행마다 크기가 달라 고르게 나눠도 넘칠 수 있음)
+RESPLIT_MARGIN = 1.15
+
+
+def write_chunked_output(ebay_df, output_format, description_template, name_prefix, max_rows=None, max_bytes=None,
+                         header=None):
+    """PSKU(리스팅) 경계에서 파일을 나눠 병렬 기록한 뒤 zip 으로 묶음
+
+    max_rows 는 파일당 데이터 행 수(헤더 제외), max_bytes 는 실제 기록된 파일 크기 기준이다.
+    크기 초과 파일은 리스팅 경계에서 다시 나눠 기록한다. 한 리스팅이 상한보다 크면 그 리스팅만 담은 파일로 둔다.
+    header 를 주면 컬럼명 대신 이 헤더를 기록한다 (사이트별 헤더).
+
+    반환값: (zip 임시 파일 객체 - 처음 위치로 되감김, 파일별 정보 목록 [{filename, rows, listings, bytes}])
+    """
+    starts = np.flatnonzero(ebay_df[ACTION_COLUMN].isin(['Add', 'Revise', 'End']).to_numpy())
+    if len(starts) == 0 or starts[0] != 0:
+        starts = np.concatenate([[0], starts])
+    bounds = np.append(starts, len(ebay_df))
+
+    work_dir = tempfile.mkdtemp(prefix="ebay_chunks_")
+    try:
+        pending = plan_chunks(bounds, 0, len(starts), max_rows)
+        written = []
+        rows_done = 0
+
+        process_context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=CHUNK_WRITE_WORKERS, mp_context=process_context) as pool:
+            while pending:
+                futures = {}
+                for first, last in pending:
+                    path = os.path.join(work_dir, f"{first}_{last}.{output_format}")
+                    chunk = ebay_df.iloc[bounds[first]:bounds[last]]
+                    future = pool.submit(_write_chunk, chunk, output_format, description_template, path, header)
+                    futures[future] = (first, last, path)
+
+                pending = []
+                for future in as_completed(futures):
+                    first, last, path = futures[future]
+                    size = future.result()
+                    if max_bytes and size > max_bytes and last - first > 1:
+                        # 실제 크기 비율만큼 잘게 나눠 다시 기록
+                        os.remove(path)
+                        pieces = math.ceil(size / max_bytes * RESPLIT_MARGIN)
+                        rows = int(bounds[last] - bounds[first])
+                        pending.extend(plan_chunks(bounds, first, last, math.ceil(rows / pieces)))
+                    else:
+                        if max_bytes and size > max_bytes:
+                            log("분할", f"리스팅 1개가 파일 크기 상한을 넘습니다: {size:,} bytes", level=logging.WARNING)
+                        written.append((first, last, path, size))
+                        rows_done += int(bounds[last] - bounds[first])
+                        progress(rows_done, len(ebay_df))
+
+        written.sort()
+        return _pack_zip(written, bounds, output_format, name_prefix)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def plan_chunks(bounds, first, last, max_rows=None):
+    """리스팅 [first, last) 를 파일당 max_rows 행 이하가 되도록 연속 구간으로 나눔 - [(first, last), ...]
+
+    bounds[i] 는 i 번째 리스팅의 시작 행 (마지막 값은 전체 행 수). 한 리스팅이 max_rows 보다 크면 단독 구간.
+    """
+    if not max_rows:
+        return [(first, last)]
+
+    chunks = []
+    while first < last:
+        # bounds[end] - bounds[first] <= max_rows 인 가장 큰 end
+        end = int(np.searchsorted(bounds, bounds[first] + max_rows, side='right')) - 1
+        end = min(max(end, first + 1), last)
+        chunks.append((first, end))
+        first = end
+    return chunks
+
+
+def _write_chunk(chunk, output_format, description_template, path, header=None):
+    """분할 파일 1개 기록 (프로세스 풀 작업) - 파일 크기(bytes) 반환"""
+    with open(path, "wb") as f:
+        write_ebay_frame(f, chunk, output_format, description_template, header=header)
+    return os.path.getsize(path)
+
+
+def _pack_zip(written, bounds, output_format, name_prefix):
+    """기록된 분할 파일을 순서대로 zip 에 추가 - 파일 단위로 스트리밍해 전체를 메모리에 올리지 않음"""
+    output = tempfile.TemporaryFile()
+    parts = []
+    digits = max(2, len(str(len(written))))
+    # xlsx 는 이미 압축된 형식이라 다시 압축하지 않음
+    compression = zipfile.ZIP_STORED if output_format == 'xlsx' else zipfile.ZIP_DEFLATED
+
+    with zipfile.ZipFile(output, 'w', compression=compression) as archive:
+        for number, (first, last, path, size) in enumerate(written, start=1):
+            filename = f"{name_prefix}_part{number:0{digits}d}.{output_format}"
+            archive.write(path, arcname=filename)
+            os.remove(path)
+            parts.append({
+                'filename': filename,
+                'rows': int(bounds[last] - bounds[first]),
+                'listings': last - first,
+                'bytes': size,
+            })
+
+    output.seek(0)
+    return output, parts
@@ -0,0 +1,228 @@
+"""eBay 벌크 생성기 명령줄 실행 (Streamlit 없이 크론/스크립트에서 사용)
+
+사용법:
+    python -m cli generate <user_id> [--format xlsx|csv] [--mode full|delta] [--max-rows N] [--max-bytes N]
+                           [--verify-images] [--out DIR] [--trace FILE]
+    python -m cli batch [all | <user_id> ...] [--format xlsx|csv] [--mode full|delta] [--out DIR] [--trace FILE]
+    python -m cli validate <user_id> [--verify-images]
+    python -m cli bench [--sizes N ...] [--startup] [--history]
+    python -m cli bench --stages [--sizes N ...] [--json OUT] [--compare BASELINE] [--tolerance 0.25]
+    python -m cli migrate
+
+공통 옵션 --log-json 은 진행 로그를 한 줄에 JSON 1개로 출력한다 (EBAYBULK_LOG_FORMAT=json 과 같음).
+
+무거운 모듈(pandas, gspread, openpyxl 등)은 각 명령 안에서만 import 한다.
+"""
+import argparse
+import os
+import sys
+
+
+def cmd_generate(args):
+    """단일 프로필 생성 후 파일 저장"""
+    from excel_generator import generate_ebay_excel
+
+    result = generate_ebay_excel(
+        args.user_id, args.format, args.force_refresh, args.mode, args.max_rows, args.max_bytes,
+        args.verify_images, traced=bool(args.trace) or None, use_cache=not args.no_cache,
+        sites=args.sites.split(',') if args.sites else None
+    )
+    path = _write_output(args.out, result['filename'], result['output'])
+    _write_trace(args.trace, result['trace'])
+
+    print(f"[완료] {path}" + (f" (캐시된 결과: {result['cached']})" if result['cached'] else ""))
+    print(f"[집계] {result['counts']}")
+    for part in result['parts'] or []:
+        print(f"  {part['filename']:<40} {part['rows']:>8}행 {part['listings']:>7}개 리스팅 {part['bytes']:>12,} bytes")
+    if result['delta']:
+        print(f"[변경분] {result['delta']}")
+    _print_timings(result['timings'])
+    _print_findings(result['findings'])
+    return 0
+
+
+def cmd_batch(args):
+    """여러 프로필 일괄 생성 후 zip 저장 - 실패한 프로필이 있으면 종료 코드 1"""
+    from batch_generator import generate_batch
+
+    user_ids = 'all' if args.user_ids in ([], ['all']) else args.user_ids
+    result = generate_batch(user_ids, args.format, args.force_refresh, args.mode, traced=bool(args.trace) or None)
+    path = _write_output(args.out, result['filename'], result['output'])
+    _write_trace(args.trace, result['trace'])
+
+    print(f"[완료] {path} ({result['timings']['total']:.2f}s)")
+    for status in result['statuses']:
+        line = f"  {status['user_id']:>4} {status['name']:<12} {status['status']:<6} {status['rows']:>8}행"
+        if status['error']:
+            line += f"  {status['error']}"
+        print(line)
+
+    return 1 if any(s['status'] != 'ok' for s in result['statuses']) else 0
+
+
+def cmd_validate(args):
+    """파일을 만들거나 이력을 남기지 않고 변환 + 검증만 실행 - 경고가 있으면 종료 코드 1"""
+    from database import get_user
+    from excel_generator import read_catalog, filter_create_rows, convert_to_ebay_variations
+    from validation import validate_ebay_data
+
+    user = get_user(args.user_id)
+    if not user:
+        raise Exception("사용자 정보를 찾을 수 없습니다.")
+
+    bulk_df, category_map = read_catalog(user, args.force_refresh)
+    ebay_df = convert_to_ebay_variations(filter_create_rows(bulk_df), category_map, user)
+
+    image_status = None
+    if args.verify_images:
+        from image_checker import split_photo_urls, verify_image_urls
+
+        _, photo_urls = split_photo_urls(ebay_df['Item photo URL'].to_numpy(dtype=object))
+        image_status = verify_image_urls(photo_urls)
+
+    findings = validate_ebay_data(ebay_df, category_map, image_status)
+
+    print(f"[검증] {len(ebay_df)}개 행, {len(findings)}개 경고")
+    _print_findings(findings, limit=None)
+    return 1 if len(findings) else 0
+
+
+def cmd_bench(args):
+    """출력 형식 / 단계별 벤치마크 또는 시작 시간 점검"""
+    import benchmark
+
+    if args.startup:
+        return 1 if benchmark.check_startup_time() else 0
+    if args.history:
+        benchmark.bench_history_log()
+        return 0
+    if args.stages:
+        return benchmark.run_stage_bench(args)
+    benchmark.bench_output_formats(args.sizes or benchmark.DEFAULT_SIZES)
+    return 0
+
+
+def cmd_migrate(args):
+    """data/users.json, history.json 을 SQLite 저장소로 다시 옮김 (이미 옮긴 항목은 덮어쓰거나 건너뜀)"""
+    from database import USERS_FILE, HISTORY_FILE, DB_FILE
+    from storage import SqliteStore, migrate_json_to_sqlite
+
+    migrate_json_to_sqlite(USERS_FILE, HISTORY_FILE, SqliteStore(DB_FILE))
+    return 0
+
+
+def _write_output(out_dir, filename, output):
+    """결과 파일 객체(메모리 / 임시 파일)를 파일로 저장하고 경로 반환"""
+    import shutil
+
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, filename)
+    output.seek(0)
+    with open(path, "wb") as f:
+        shutil.copyfileobj(output, f)
+    return path
+
+
+def _write_trace(path, root):
+    """--trace 로 지정한 경로에 span 트리 JSON 저장"""
+    if path and root is not None:
+        from tracing import write_trace
+
+        print(f"[추적] {write_trace(root, path)}")
+
+
+def _print_timings(timings):
+    """단계별 소요 시간 출력"""
+    print("[시간] " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items()))
+
+
+def _print_findings(findings, limit=10):
+    """검증 결과를 규칙별 건수와 함께 출력"""
+    from validation import summarize_findings, format_findings
+
+    for summary in summarize_findings(findings).itertuples(index=False):
+        print(f"  [{summary.severity}] {summary.label}: {summary.count}건")
+
+    shown = findings if limit is None else findings.head(limit)
+    for message in format_findings(shown):
+        print(f"  ⚠️ {message}")
+    if len(findings) > len(shown):
+        print(f"  ... 외 {len(findings) - len(shown)}개 추가 경고")
+
+
+def build_parser():
+    """명령줄 인자 정의"""
+    parser = argparse.ArgumentParser(prog="python -m cli", description="eBay 벌크 리스팅 생성기")
+    parser.add_argument(
+        "--credentials",
+        help="서비스 계정 JSON 경로 (GOOGLE_APPLICATION_CREDENTIALS 로도 지정 가능)"
+    )
+    parser.add_argument("--log-json", action="store_true", help="진행 로그를 구조화(JSON) 형식으로 출력")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_generation_options(sub):
+        sub.add_argument("--format", choices=["xlsx", "csv"], default="xlsx")
+        sub.add_argument("--mode", choices=["full", "delta"], default="full")
+        sub.add_argument("--force-refresh", action="store_true", help="시트 스냅샷 캐시 무시")
+        sub.add_argument("--out", default=".", help="결과 파일 저장 폴더")
+        sub.add_argument("--trace", metavar="FILE", help="단계별 span 트리를 JSON 으로 저장 (Perfetto / chrome://tracing 호환)")
+
+    generate = subparsers.add_parser("generate", help="단일 프로필 생성")
+    generate.add_argument("user_id", type=int)
+    add_generation_options(generate)
+    generate.add_argument("--max-rows", type=int, help="파일당 최대 데이터 행 수 - 넘으면 PSKU 단위로 나눠 zip 으로 저장")
+    generate.add_argument("--max-bytes", type=int, help="파일당 최대 크기(bytes) - 넘으면 PSKU 단위로 나눠 zip 으로 저장")
+    generate.add_argument("--verify-images", action="store_true", help="사진 URL 을 HEAD 요청으로 확인 (없는 이미지는 검증 오류)")
+    generate.add_argument("--no-cache", action="store_true", help="같은 입력의 이전 생성 결과를 재사용하지 않음")
+    generate.add_argument("--sites", help="판매 사이트 코드 (쉼표로 구분, 예: US,UK,DE,AU) - 기본값: 프로필 설정")
+    generate.set_defaults(func=cmd_generate)
+
+    batch = subparsers.add_parser("batch", help="여러 프로필 일괄 생성 (zip)")
+    batch.add_argument("user_ids", nargs="*", help="사용자 ID 목록 또는 all (기본값: all)")
+    add_generation_options(batch)
+    batch.set_defaults(func=cmd_batch)
+
+    validate = subparsers.add_parser("validate", help="변환 + 검증만 실행")
+    validate.add_argument("user_id", type=int)
+    validate.add_argument("--force-refresh", action="store_true", help="시트 스냅샷 캐시 무시")
+    validate.add_argument("--verify-images", action="store_true", help="사진 URL 을 HEAD 요청으로 확인 (없는 이미지는 검증 오류)")
+    validate.set_defaults(func=cmd_validate)
+
+    bench = subparsers.add_parser("bench", help="벤치마크 / 시작 시간 점검")
+    bench.add_argument("--sizes", type=int, nargs="+", help="행 수 목록 (기본값: 출력 형식 10k/100k/500k, 단계별 1k~1M)")
+    bench.add_argument("--startup", action="store_true", help="import 시간 상한 점검만 실행")
+    bench.add_argument("--history", action="store_true", help="이력 로그 추가/조회 벤치마크만 실행")
+    bench.add_argument("--stages", action="store_true", help="합성 카탈로그로 단계별 시간/메모리 측정")
+    bench.add_argument("--variations", type=int, default=3, help="상품당 베리에이션 수")
+    bench.add_argument("--index-depth", type=int, default=5, help="INDEX 최댓값 (추가 이미지 수)")
+    bench.add_argument("--description-size", type=int, default=2300, help="설명 길이(자)")
+    bench.add_argument("--categories", type=int, default=50, help="카테고리 종류 수")
+    bench.add_argument("--json", help="결과 JSON 저장 경로")
+    bench.add_argument("--compare", help="기준 결과 JSON - 회귀가 있으면 종료 코드 1")
+    bench.add_argument("--tolerance", type=float, default=0.25, help="회귀로 볼 증가 비율 (기본 0.25 = 25%%)")
+    bench.set_defaults(func=cmd_bench)
+
+    migrate = subparsers.add_parser("migrate", help="JSON 저장소 → SQLite 이전")
+    migrate.set_defaults(func=cmd_migrate)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.credentials:
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = args.credentials
+
+    from tracing import configure_logging
+    configure_logging(json_format=args.log_json or None)
+
+    try:
+        return args.func(args)
+    except Exception as e:
+        print(f"❌ 오류 발생: {str(e)}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,28 +1,37 @@
 import json
 import os
+import threading
 from datetime import datetime
 
+import history_log
+from storage import STORAGE_ENV_VAR, DEFAULT_STORAGE, open_store
+
 DATA_DIR = "data"
 USERS_FILE = os.path.join(DATA_DIR, "users.json")
 HISTORY_FILE = os.path.join(DATA_DIR, "history.json")
+DB_FILE = os.path.join(DATA_DIR, "ebaybulk.db")
+HISTORY_LOG_DIR = os.path.join(DATA_DIR, "history")
+FINGERPRINT_DIR = os.path.join(DATA_DIR, "fingerprints")
 
+# 프로세스 전체에서 공유하는 저장소 (처음 사용할 때 생성)
+_store = None
+_store_lock = threading.Lock()
+_history_ready = False
 
-def ensure_data_files():
-    """data 폴더와 json 파일이 없으면 생성"""
-    os.makedirs(DATA_DIR, exist_ok=True)
-
-    if not os.path.exists(USERS_FILE):
-        with open(USERS_FILE, "w", encoding="utf-8") as f:
-            json.dump([], f, ensure_ascii=False, indent=2)
 
-    if not os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-            json.dump([], f, ensure_ascii=False, indent=2)
+def get_store():
+    """현재 저장소 조회 - EBAYBULK_STORAGE 환경 변수로 json / sqlite 선택"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = os.environ.get(STORAGE_ENV_VAR, DEFAULT_STORAGE)
+                _store = open_store(backend, USERS_FILE, HISTORY_FILE, DB_FILE)
+    return _store
 
 
 def load_json(file_path):
     """JSON 파일 읽기"""
-    ensure_data_files()
     try:
         with open(file_path, "r", encoding="utf-8") as f:
             return json.load(f)
@@ -30,97 +39,124 @@ def load_json(file_path):
         return []
 
 
-def save_json(file_path, data):
-    """JSON 파일 저장"""
-    ensure_data_files()
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-
 def get_users():
     """모든 사용자 조회"""
-    users = load_json(USERS_FILE)
-    users.sort(key=lambda x: x.get("id", 0))
-    return users
+    return get_store().list_users()
 
 
 def get_user(user_id):
     """특정 사용자 조회"""
-    users = load_json(USERS_FILE)
-    for user in users:
-        if str(user.get("id")) == str(user_id):
-            return user
-    return None
+    return get_store().get_user(user_id)
 
 
 def add_user(user_data):
     """새 사용자 추가"""
-    users = load_json(USERS_FILE)
-
-    next_id = max([u.get("id", 0) for u in users], default=0) + 1
-
     new_user = {
-        "id": next_id,
         "name": user_data.get("name", ""),
         "google_sheet_id": user_data.get("google_sheet_id", ""),
+        "source_type": user_data.get("source_type", "sheets"),
+        "source_path": user_data.get("source_path", ""),
+        "category_path": user_data.get("category_path", ""),
+        "sites": list(user_data.get("sites") or ["US"]),
         "image_domain": user_data.get("image_domain", ""),
         "image_url_pattern": user_data.get("image_url_pattern", "/{sku}.jpg"),
         "shop_code": user_data.get("shop_code", ""),
+        "image_suffixes": list(user_data.get("image_suffixes") or []),
         "default_quantity": int(user_data.get("default_quantity", 999)),
         "default_description": user_data.get("default_description", ""),
+        "price_currency": user_data.get("price_currency", "USD"),
+        "price_rules": list(user_data.get("price_rules") or []),
+        "price_ending": user_data.get("price_ending", ""),
+        "min_price": user_data.get("min_price", ""),
+        "max_price": user_data.get("max_price", ""),
         "shipping_profile_name": user_data.get("shipping_profile_name", ""),
         "return_profile_name": user_data.get("return_profile_name", ""),
-        "payment_profile_name": user_data.get("payment_profile_name", "")
+        "payment_profile_name": user_data.get("payment_profile_name", ""),
+        "minify_description": bool(user_data.get("minify_description", False))
     }
 
-    users.append(new_user)
-    save_json(USERS_FILE, users)
-    return new_user
+    # ID 는 저장소가 트랜잭션 안에서 부여 (기존 최대 ID + 1)
+    return get_store().insert_user(new_user)
 
 
 def update_user(user_id, user_data):
     """사용자 정보 수정"""
-    users = load_json(USERS_FILE)
+    def apply(user):
+        updated_user = user.copy()
+        updated_user.update(user_data)
 
-    for i, user in enumerate(users):
-        if str(user.get("id")) == str(user_id):
-            updated_user = users[i].copy()
-            updated_user.update(user_data)
+        if "default_quantity" in updated_user:
+            try:
+                updated_user["default_quantity"] = int(updated_user["default_quantity"])
+            except Exception:
+                updated_user["default_quantity"] = 999
 
-            if "default_quantity" in updated_user:
-                try:
-                    updated_user["default_quantity"] = int(updated_user["default_quantity"])
-                except Exception:
-                    updated_user["default_quantity"] = 999
+        return updated_user
 
-            users[i] = updated_user
-            save_json(USERS_FILE, users)
-            return users[i]
-
-    return None
+    return get_store().update_user(user_id, apply)
 
 
 def delete_user(user_id):
     """사용자 삭제"""
-    users = load_json(USERS_FILE)
-    new_users = [user for user in users if str(user.get("id")) != str(user_id)]
-    save_json(USERS_FILE, new_users)
+    get_store().delete_user(user_id)
     return True
 
 
 def save_generation_history(user_id, filename, product_count):
-    """생성 이력 저장"""
-    history = load_json(HISTORY_FILE)
-
-    next_id = max([h.get("id", 0) for h in history], default=0) + 1
-
-    history.append({
-        "id": next_id,
+    """생성 이력 저장 - 이력 로그 끝에 한 줄 추가"""
+    history_log.append_entry(_history_log_dir(), {
         "user_id": user_id,
         "file_name": filename,
         "product_count": int(product_count),
         "created_at": datetime.now().isoformat()
     })
+    return True
+
+
+def get_generation_stats(user_id=None, start=None, end=None):
+    """기간 내 생성 건수 / 행 합계 / 마지막 생성 시각 (start, end 는 date 또는 'YYYY-MM-DD', 양 끝 포함)
+
+    user_id 를 주면 {'count', 'product_count', 'last_created_at'}, 없으면 {user_id: 같은 dict}
+    """
+    return history_log.get_stats(_history_log_dir(), user_id, start, end)
+
+
+def get_recent_generations(user_id, limit=10):
+    """사용자의 최근 생성 이력 (최신순)"""
+    return history_log.get_recent_entries(_history_log_dir(), user_id, limit)
+
+
+def _history_log_dir():
+    """이력 로그 폴더 - 처음 만들 때 저장소에 남아 있던 기존 이력을 한 번 옮겨 옴"""
+    global _history_ready
+    if not _history_ready:
+        store = get_store()
+        with _store_lock:
+            if not _history_ready:
+                if not history_log.log_exists(HISTORY_LOG_DIR):
+                    history_log.import_entries(HISTORY_LOG_DIR, store.list_history())
+                _history_ready = True
+    return HISTORY_LOG_DIR
+
+
+def get_listing_fingerprints(user_id):
+    """마지막 생성 시점의 리스팅 지문 조회 - {PSKU: 해시}, 없으면 None"""
+    file_path = os.path.join(FINGERPRINT_DIR, f"{user_id}.json")
+    if not os.path.exists(file_path):
+        return None
+
+    fingerprints = load_json(file_path)
+    return fingerprints if isinstance(fingerprints, dict) else None
+
+
+def save_listing_fingerprints(user_id, fingerprints):
+    """이번 생성의 리스팅 지문 저장 (다음 변경분 생성의 비교 기준)"""
+    os.makedirs(FINGERPRINT_DIR, exist_ok=True)
+    file_path = os.path.join(FINGERPRINT_DIR, f"{user_id}.json")
 
-    save_json(HISTORY_FILE, history)
+    # 같은 프로필을 동시에 저장하는 작업끼리 임시 파일이 겹치지 않도록 프로세스 / 스레드별 이름
+    tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(fingerprints, f, ensure_ascii=False)
+    os.replace(tmp_path, file_path)
     return True
@@ -0,0 +1,103 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# 설명 템플릿에서 쓸 수 있는 자리표시자 → 이베이 컬럼
+# (CSS 의 { } 와 겹치지 않도록 이 이름들만 치환하고 나머지 중괄호는 그대로 둔다)
+DESCRIPTION_FIELDS = {
+    'title': 'Title',
+    'brand': 'C:Brand',
+    'sku': 'Custom label (SKU)',
+}
+PLACEHOLDER_PATTERN = re.compile(r'\{(title|brand|sku)\}')
+
+# 컴파일된 템플릿 캐시 {(원문, 축소 여부): 템플릿} - 프로필 설명을 프로세스 전체에서 한 번만 보관
+_template_cache = {}
+TEMPLATE_CACHE_SIZE = 64
+
+# HTML 축소 시 건드리지 않을 블록 / 주석 / 공백 패턴
+_PRESERVED_BLOCK = re.compile(r'<(pre|textarea)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_COMMENT = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+_NEWLINE_BETWEEN_TAGS = re.compile(r'>[ \t\r\f]*\n[ \t\r\n\f]*<')
+_WHITESPACE_RUN = re.compile(r'[ \t\r\n\f]+')
+
+
+def get_description_template(user):
+    """프로필 기본 설명을 컴파일한 템플릿 조회 (같은 설명은 같은 객체를 공유)
+
+    반환값(dict):
+        source - 행에 들어가는 설명 원문 (축소 옵션 적용 후, 자리표시자 포함)
+        parts  - source 를 자리표시자 기준으로 나눈 조각 (홀수 위치가 필드 이름)
+        fields - 사용된 자리표시자 이름 목록 (없으면 고정 설명)
+    """
+    text = user.get('default_description', '') or ''
+    minify = bool(user.get('minify_description', False))
+    key = (text, minify)
+
+    template = _template_cache.get(key)
+    if template is None:
+        source = minify_html(text) if minify else text
+        parts = PLACEHOLDER_PATTERN.split(source)
+        template = {
+            'source': source,
+            'parts': parts,
+            'fields': sorted(set(parts[1::2])),
+        }
+        if len(_template_cache) >= TEMPLATE_CACHE_SIZE:
+            _template_cache.clear()
+        _template_cache[key] = template
+
+    return template
+
+
+def render_descriptions(ebay_df, template):
+    """템플릿 원문이 들어 있는 부모 행의 설명을 상품별로 렌더링한 DataFrame 반환
+
+    파일에 기록하기 직전 청크 단위로 호출한다. 같은 (title, brand, sku) 조합은 한 번만 렌더링한다.
+    """
+    if not template['fields'] or len(ebay_df) == 0:
+        return ebay_df
+
+    descriptions = ebay_df['Description'].to_numpy()
+    rows = np.flatnonzero(descriptions == template['source'])
+    if len(rows) == 0:
+        return ebay_df
+
+    key_columns = [DESCRIPTION_FIELDS[field] for field in template['fields']]
+    keys = ebay_df.iloc[rows][key_columns]
+    codes, uniques = pd.MultiIndex.from_frame(keys).factorize()
+
+    parts = template['parts']
+    rendered = np.empty(len(uniques), dtype=object)
+    for i, values in enumerate(uniques):
+        field_values = dict(zip(template['fields'], values))
+        rendered[i] = ''.join(
+            part if j % 2 == 0 else str(field_values[part]) for j, part in enumerate(parts)
+        )
+
+    descriptions = descriptions.copy()
+    descriptions[rows] = rendered[codes]
+    return ebay_df.assign(**{'Description': descriptions})
+
+
+def minify_html(html):
+    """설명 HTML 축소 - 주석 제거, 태그 사이 줄바꿈 들여쓰기 제거, 연속 공백을 한 칸으로
+
+    <pre>/<textarea> 블록과 조건부 주석(<!--[if ...]>)은 그대로 둔다. &nbsp; 같은 비분리 공백도 유지한다.
+    """
+    pieces = []
+    position = 0
+    for block in _PRESERVED_BLOCK.finditer(html):
+        pieces.append(_minify_segment(html[position:block.start()]))
+        pieces.append(block.group(0))
+        position = block.end()
+    pieces.append(_minify_segment(html[position:]))
+    return ''.join(pieces).strip()
+
+
+def _minify_segment(segment):
+    """보존 블록 밖의 HTML 조각 축소"""
+    segment = _COMMENT.sub('', segment)
+    segment = _NEWLINE_BETWEEN_TAGS.sub('><', segment)
+    return _WHITESPACE_RUN.sub(' ', segment)
@@ -1,416 +1,916 @@
-import streamlit as st
 import pandas as pd
-import re
+import numpy as np
 import os
-from database import get_user, save_generation_history
+import re
+from database import get_user, save_generation_history, get_listing_fingerprints, save_listing_fingerprints
+from sheets_client import get_google_sheets_client
+from sheet_cache import get_sheet_revision, load_snapshot, save_snapshot, compute_content_hash
+from result_cache import build_result_key, load_result, save_result
+from catalog_sources import (
+    BULK_TAB, CAT_TAB, BULK_COLUMNS, get_source_type, read_local_catalog, build_category_map
+)
+from descriptions import get_description_template, render_descriptions
+from image_urls import get_image_url_builder, build_child_image_urls, build_parent_image_urls
+from pricing import get_pricing_rules, parse_price_column, format_price_column, apply_pricing_rules, load_fx_rates
+from sites import ACTION_COLUMN, get_user_sites, render_site_frame, get_site_columns
+from validation import validate_ebay_data
+from tracing import trace, span, log, count, progress
 import io
-import gspread
-from google.oauth2.service_account import Credentials
-
-# Google Sheets API 설정
-SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
+import csv
+import tempfile
+import time
+import logging
+
+XLSX_SHEET_NAME = 'eBay Bulk Upload'
+
+# 출력 형식별 MIME 타입 (eBay File Exchange는 xlsx/csv 모두 지원)
+OUTPUT_MIME_TYPES = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv',
+}
+
+# 화면 미리보기 최대 행 수
+PREVIEW_ROWS = 15
+
+# 스트리밍 변환 시 한 번에 처리할 PSKU 그룹 수
+STREAM_CHUNK_GROUPS = 5000
+
+# 결과 파일을 메모리에 두는 최대 크기 - 넘으면 임시 파일로 옮겨 기록 (대용량 csv 가 메모리를 차지하지 않도록)
+OUTPUT_SPOOL_BYTES = 32 * 1024 * 1024
+
+# Bulk DataFrame 인덱스 0 에 해당하는 시트 행 번호 (1행은 헤더)
+SHEET_FIRST_DATA_ROW = 2
+
+# 변경분(delta) 모드에서 사라진 리스팅을 종료(End)할 때의 사유 - File Exchange 는 End 행에 EndCode 가 필요
+END_CODE_COLUMN = 'EndCode'
+DEFAULT_END_CODE = 'NotAvailable'
+
+# CAT 탭 범위 - 카테고리 경로, 카테고리 ID, 상태 ID
+CAT_COLUMNS = 'A:C'
+
+# 검증에 필요한 컬럼 (스트리밍 모드에서는 이 컬럼만 보관)
+VALIDATION_COLUMNS = [
+    ACTION_COLUMN,
+    'Custom label (SKU)',
+    'Category ID',
+    'Category name',
+    'Title',
+    'Relationship',
+    'Relationship details',
+    'Start price',
+    'Condition ID',
+    'Item photo URL',
+]
+
+
+def read_catalog(user, force_refresh=False):
+    """프로필의 카탈로그 원본(source_type)에서 (bulk_df, category_map) 읽기
+
+    구글시트는 read_bulk_and_cat_tabs, 로컬 xlsx / csv / parquet 파일은 catalog_sources 리더를 사용한다.
+    로컬 리더는 읽으면서 Create=TRUE 행만 남기므로 이후 filter_create_rows 는 그대로 통과한다.
+    """
+    source_type = get_source_type(user)
+    if source_type == 'sheets':
+        return read_bulk_and_cat_tabs(user['google_sheet_id'], force_refresh)
 
-
-def get_google_sheets_client():
-    """Google Sheets API 클라이언트 생성 - 로컬/클라우드 호환"""
     try:
-        # 1) 먼저 로컬 파일이 있으면 그걸 우선 사용
-        if os.path.exists("service_account.json"):
-            creds = Credentials.from_service_account_file(
-                "service_account.json",
-                scopes=SCOPES
-            )
-            return gspread.authorize(creds)
+        with span('read_local', source_type=source_type):
+            return read_local_catalog(user)
+    except Exception as e:
+        raise Exception(f"카탈로그 파일 읽기 실패: {str(e)}")
 
-        # 2) 로컬 파일이 없으면 Streamlit secrets 사용 시도
-        try:
-            creds_dict = dict(st.secrets["gcp_service_account"])
 
-            if "private_key" in creds_dict:
-                creds_dict["private_key"] = creds_dict["private_key"].replace("\\n", "\n")
+def read_bulk_and_cat_tabs(sheet_id, force_refresh=False):
+    """Bulk 탭과 CAT 탭 읽기 - INDEX 컬럼 포함
 
-            creds = Credentials.from_service_account_info(
-                creds_dict,
-                scopes=SCOPES
-            )
-            return gspread.authorize(creds)
+    시트 리비전이 마지막 다운로드와 같으면 로컬 스냅샷을 그대로 사용한다.
+    force_refresh=True 이면 스냅샷을 무시하고 새로 다운로드한다.
+    Bulk 탭은 BULK_COLUMNS 에 있는 컬럼만 읽는다 (메모 등 나머지 컬럼은 받지 않음).
+    """
+    try:
+        with span('auth'):
+            client = get_google_sheets_client()
+
+        with span('revision'):
+            revision = get_sheet_revision(client, sheet_id)
+        if not force_refresh:
+            with span('snapshot_load') as stage:
+                snapshot = load_snapshot(sheet_id, revision)
+                stage.count('cache_hit' if snapshot is not None else 'cache_miss')
+            if snapshot is not None:
+                log("캐시", f"시트 리비전 {revision} 스냅샷 사용")
+                return snapshot
+
+        # Bulk 헤더로 필요한 컬럼 위치를 찾은 뒤, 그 컬럼들과 CAT 탭을 한 번의 batchGet 으로 읽음
+        with span('header'):
+            header = read_bulk_header(client, sheet_id)
+
+        with span('read_tabs') as stage:
+            bulk_data, cat_data = read_projected_tabs(client, sheet_id, header)
+            bulk_df = pd.DataFrame(bulk_data) if header else pd.DataFrame()
+            stage.count('rows_out', len(bulk_df))
+            stage.count('columns_read', len(bulk_data))
+            stage.count('columns_skipped', len(header) - len(bulk_data))
+
+        category_map = build_category_map(cat_data)
+
+        with span('snapshot_save'):
+            try:
+                content_hash = compute_content_hash(bulk_data, cat_data)
+                save_snapshot(sheet_id, revision, content_hash, bulk_df, category_map)
+            except Exception as e:
+                log("캐시", f"스냅샷 저장 실패: {str(e)}", level=logging.WARNING)
 
-        except Exception:
-            raise Exception(
-                "service_account.json 파일이 없고, Streamlit secrets의 "
-                "'gcp_service_account' 설정도 없습니다."
-            )
+        return bulk_df, category_map
 
     except Exception as e:
-        raise Exception(f"Google Sheets API 인증 실패: {str(e)}")
+        raise Exception(f"구글시트 읽기 실패: {str(e)}")
 
 
-def read_bulk_and_cat_tabs(sheet_id):
-    """Bulk 탭과 CAT 탭 읽기 - INDEX 컬럼 포함"""
-    try:
-        client = get_google_sheets_client()
-        spreadsheet = client.open_by_key(sheet_id)
+def read_bulk_header(client, sheet_id):
+    """Bulk 탭 1행(헤더) - 앞뒤 공백 제거, 탭이 비어 있으면 빈 목록"""
+    value_ranges = _batch_get_values(client, sheet_id, [_a1_range(BULK_TAB, '1:1')], 'ROWS')
+    rows = value_ranges[0]
+    return [str(name).strip() for name in rows[0]] if rows else []
 
-        # Bulk 탭 읽기
-        bulk_worksheet = spreadsheet.worksheet('Bulk')
-        bulk_data = bulk_worksheet.get_all_values()
 
-        if bulk_data:
-            bulk_df = pd.DataFrame(bulk_data[1:], columns=bulk_data[0])
-            bulk_df.columns = bulk_df.columns.str.strip()
-        else:
-            bulk_df = pd.DataFrame()
+def read_projected_tabs(client, sheet_id, header):
+    """Bulk 탭의 필요한 컬럼과 CAT 탭을 batchGet 요청 1번으로 읽음 - ({컬럼명: 값 목록}, CAT 행 목록)
 
-        # CAT 탭 읽기
-        try:
-            cat_worksheet = spreadsheet.worksheet('CAT')
-            cat_data = cat_worksheet.get_all_values()
+    Bulk 컬럼은 헤더 순서를 유지하고 모두 같은 길이(데이터 행 수)로 맞춘다. 이름이 중복되면 첫 컬럼만 읽는다.
+    CAT 탭이 없으면 경고 후 빈 목록을 반환한다.
+    """
+    from gspread.exceptions import APIError
 
-            category_map = {}
-            for row in cat_data:
-                if len(row) >= 2 and row[1].strip():
-                    category_path = row[0].strip()
-                    category_id = row[1].strip()
-                    condition_id = row[2].strip() if len(row) >= 3 else "1000-New"
+    positions = {}
+    for position, name in enumerate(header):
+        if name in BULK_COLUMNS and name not in positions:
+            positions[name] = position
+    names = sorted(positions, key=positions.get)
+    runs = _contiguous_runs([positions[name] for name in names])
+    bulk_ranges = [
+        _a1_range(BULK_TAB, f"{_column_letter(first)}2:{_column_letter(last)}") for first, last in runs
+    ]
+    cat_range = _a1_range(CAT_TAB, CAT_COLUMNS)
 
-                    category_map[category_id] = {
-                        'path': category_path,
-                        'condition': condition_id
-                    }
+    try:
+        value_ranges = _batch_get_values(client, sheet_id, bulk_ranges + [cat_range], 'COLUMNS')
+        cat_columns = value_ranges.pop()
+    except APIError as e:
+        # 없는 탭을 지정하면 batchGet 전체가 400 으로 실패 - Bulk 컬럼만 다시 요청
+        if e.code != 400:
+            raise
+        value_ranges = _batch_get_values(client, sheet_id, bulk_ranges, 'COLUMNS')
+        log("경고", "CAT 탭을 찾을 수 없습니다.", level=logging.WARNING)
+        cat_columns = []
+
+    # 응답은 범위별 컬럼 목록 - 뒤쪽 빈 컬럼 / 빈 셀은 생략되어 있음
+    columns = []
+    for (first, last), values in zip(runs, value_ranges):
+        columns.extend(values[i] if i < len(values) else [] for i in range(last - first + 1))
+    row_count = max((len(values) for values in columns), default=0)
+    count('cells', sum(len(values) for values in columns))
+
+    bulk_data = {
+        name: values + [''] * (row_count - len(values)) for name, values in zip(names, columns)
+    }
+    return bulk_data, _columns_to_rows(cat_columns)
 
-        except gspread.WorksheetNotFound:
-            print("[경고] CAT 탭을 찾을 수 없습니다.")
-            category_map = {}
 
-        return bulk_df, category_map
+def _batch_get_values(client, sheet_id, ranges, major_dimension):
+    """values.batchGet 요청 1번 - 범위별 값 목록 (빈 범위는 [])"""
+    if not ranges:
+        return []
+    response = client.http_client.values_batch_get(
+        sheet_id, ranges, params={'majorDimension': major_dimension}
+    )
+    return [value_range.get('values', []) for value_range in response.get('valueRanges', [])]
 
-    except Exception as e:
-        raise Exception(f"구글시트 읽기 실패: {str(e)}")
 
+def _a1_range(tab, cells):
+    return "'{}'!{}".format(tab.replace("'", "''"), cells)
 
-def generate_ebay_excel(user_id):
-    """이베이 벌크 Excel 생성 - INDEX 기반 다중 이미지 지원"""
-    user = get_user(user_id)
-    if not user:
-        raise Exception("사용자 정보를 찾을 수 없습니다.")
 
-    print(f"[시작] 사용자: {user['name']}")
+def _column_letter(position):
+    """0부터 시작하는 컬럼 위치 → A1 표기 컬럼 문자 (0 → A, 26 → AA)"""
+    letters = ''
+    position += 1
+    while position:
+        position, remainder = divmod(position - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
 
-    # 1. 데이터 로드
-    bulk_df, category_map = read_bulk_and_cat_tabs(user['google_sheet_id'])
-    print(f"[로드] Bulk: {len(bulk_df)}개 행, CAT: {len(category_map)}개 카테고리")
 
-    # 2. Create=TRUE 필터링
+def _contiguous_runs(positions):
+    """정렬된 컬럼 위치 목록을 연속 구간 [(처음, 끝)] 으로 묶음 - 구간마다 범위 1개로 요청"""
+    runs = []
+    for position in positions:
+        if runs and runs[-1][1] == position - 1:
+            runs[-1] = (runs[-1][0], position)
+        else:
+            runs.append((position, position))
+    return runs
+
+
+def _columns_to_rows(columns):
+    """컬럼 단위 값 → 행 목록 (get_all_values 처럼 모든 행을 같은 너비로 채움)"""
+    row_count = max((len(values) for values in columns), default=0)
+    padded = [values + [''] * (row_count - len(values)) for values in columns]
+    return [list(row) for row in zip(*padded)]
+
+
+def generate_ebay_excel(user_id, output_format='xlsx', force_refresh=False, mode='full',
+                        max_rows=None, max_bytes=None, verify_images=False, traced=None, use_cache=True, sites=None):
+    """이베이 벌크 Excel/CSV 생성 - INDEX 기반 다중 이미지 지원
+
+    mode='delta' 이면 지난 생성 이후 추가/수정/삭제된 리스팅만 Add / Revise / End 로 기록한다.
+    max_rows / max_bytes 를 주면 파일당 행 수 / 크기 상한에 맞춰 PSKU 경계에서 나눈 파일들을 zip 으로 묶는다.
+    verify_images=True 이면 생성된 사진 URL 을 HEAD 요청으로 확인해 없는 이미지를 검증 결과에 포함한다.
+    traced=True 이면 단계별 span 을 기록한다 (None 이면 EBAYBULK_TRACE_DIR 가 설정된 경우에만, tracing 참고).
+    use_cache=True 이면 Bulk/CAT 내용, 프로필, 옵션이 같은 이전 생성 결과를 재사용한다 (result_cache 참고).
+    force_refresh=True 이면 시트를 새로 읽지만, 읽은 내용이 같으면 결과는 캐시에서 가져온다.
+    sites 는 판매 사이트 코드 목록 (None 이면 프로필 설정) - 여럿이면 한 번 변환한 결과를 사이트별 파일로 zip 에 묶는다.
+
+    반환값(dict):
+        output            - 파일 데이터 (SpooledTemporaryFile, 분할 / 여러 사이트면 zip 임시 파일)
+        filename          - 다운로드 파일명
+        parts             - 분할 / 사이트 파일별 정보 [{filename, rows, listings, bytes}] (사이트 파일은 site 포함)
+                            - 파일 하나면 None
+        output_format     - 'xlsx' / 'csv'
+        mime_type         - 다운로드 MIME 타입
+        findings          - 검증 결과 DataFrame (validation.validate_ebay_data 참고)
+        counts            - 행 수 집계 (total, psku, sku, variations)
+        delta             - 변경분 집계 (added, revised, ended, unchanged) - full 모드는 None
+        preview           - 앞부분 미리보기 DataFrame (최대 PREVIEW_ROWS 행)
+        timings           - 단계별 소요 시간(초)
+        cached            - 캐시에서 가져온 결과면 'memory' / 'disk', 새로 만들었으면 None
+        trace             - 단계별 span 트리 (tracing.Span) - 기록하지 않았으면 None
+    """
+    timings = {}
+
+    with trace('generate', enabled=traced, user_id=user_id, output_format=output_format, mode=mode) as root:
+        user = get_user(user_id)
+        if not user:
+            raise Exception("사용자 정보를 찾을 수 없습니다.")
+
+        log("시작", f"사용자: {user['name']}")
+
+        # 1. 데이터 로드
+        with span('load') as stage:
+            bulk_df, category_map = read_catalog(user, force_refresh)
+            stage.count('rows_out', len(bulk_df))
+        timings['load'] = stage.duration
+        log("로드", f"Bulk: {len(bulk_df)}개 행, CAT: {len(category_map)}개 카테고리")
+
+        # 2. Create=TRUE 필터링
+        with span('filter') as stage:
+            stage.count('rows_in', len(bulk_df))
+            bulk_df = filter_create_rows(bulk_df)
+            stage.count('rows_out', len(bulk_df))
+        timings['filter'] = stage.duration
+
+        # 3. 베리에이션 변환 + 파일 생성 + 데이터 검증 (같은 입력으로 만든 결과가 있으면 재사용)
+        filename = build_output_filename(user, output_format, mode)
+        previous_fingerprints = load_previous_fingerprints(user_id, mode)
+        name_prefix = os.path.splitext(filename)[0]
+        sites = get_user_sites({'sites': sites} if sites else user)
+
+        result = result_key = None
+        if use_cache and not verify_images:
+            # 이미지 확인 결과는 외부 상태에 따라 바뀌므로 캐시하지 않음
+            with span('result_cache') as stage:
+                result_key = build_result_key(bulk_df, category_map, user, {
+                    'output_format': output_format, 'max_rows': max_rows, 'max_bytes': max_bytes,
+                    'name_prefix': name_prefix, 'fx_rates': load_fx_rates(), 'sites': sites,
+                }, previous_fingerprints)
+                result = load_result(result_key)
+                stage.count('cache_hit' if result is not None else 'cache_miss')
+            timings['result_cache'] = stage.duration
+            if result is not None:
+                log("캐시", f"같은 입력의 생성 결과 재사용 ({result['cached']})")
+
+        if result is None:
+            result = write_ebay_output(
+                bulk_df, category_map, user, output_format, previous_fingerprints,
+                max_rows=max_rows, max_bytes=max_bytes, name_prefix=name_prefix,
+                verify_images=verify_images, sites=sites
+            )
+            result['cached'] = None
+            if result_key is not None:
+                with span('result_save'):
+                    save_result(result_key, result)
+        timings.update(result['timings'])
+        log("변환", f"{result['counts']['total']}개 이베이 행 생성 ({output_format}, {mode})")
+        if result['delta']:
+            log("변경분", str(result['delta']), **result['delta'])
+        if result['parts']:
+            filename = f"{os.path.splitext(filename)[0]}.zip"
+            log("분할", f"{len(result['parts'])}개 파일 ({', '.join(sites)})")
+
+        # 4. 이력 및 리스팅 지문 저장
+        with span('history') as stage:
+            save_generation_history(user_id, filename, result['counts']['total'])
+            save_listing_fingerprints(user_id, result.pop('fingerprints'))
+        timings['history'] = stage.duration
+
+    timings['total'] = root.duration
+    result['timings'] = timings
+    result['trace'] = root if root.recorded else None
+    result['filename'] = filename
+    return result
+
+
+def filter_create_rows(bulk_df):
+    """Create=TRUE 행만 남김 - 남는 행이 없으면 예외"""
     if 'Create' in bulk_df.columns:
         bulk_df = bulk_df[bulk_df['Create'].astype(str).str.upper() == 'TRUE']
-        print(f"[필터링] Create=TRUE: {len(bulk_df)}개 행")
+        log("필터링", f"Create=TRUE: {len(bulk_df)}개 행")
 
     if len(bulk_df) == 0:
         raise Exception("Create=TRUE인 데이터가 없습니다.")
 
-    # 3. 베리에이션 변환
-    ebay_rows = convert_to_ebay_variations(bulk_df, category_map, user)
-    print(f"[변환] {len(ebay_rows)}개 이베이 행 생성")
-
-    # 4. DataFrame 생성 및 컬럼 정렬
-    ebay_df = pd.DataFrame(ebay_rows)
-    ebay_columns = get_ebay_column_order()
-    ebay_df = ebay_df.reindex(columns=ebay_columns, fill_value='')
+    return bulk_df
 
-    # 5. Excel 파일 생성
-    output = io.BytesIO()
-    safe_name = re.sub(r'[^a-zA-Z0-9가-힣_-]', '_', user['name'])
-    filename = f"ebay_bulk_{safe_name}.xlsx"
-
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        ebay_df.to_excel(writer, index=False, sheet_name='eBay Bulk Upload')
-
-        worksheet = writer.sheets['eBay Bulk Upload']
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if cell.value is not None and len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except Exception:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            worksheet.column_dimensions[column_letter].width = adjusted_width
-
-    output.seek(0)
 
-    # 6. 데이터 검증
-    validation_errors = validate_ebay_data(ebay_df, category_map)
+def load_previous_fingerprints(user_id, mode):
+    """생성 방식별 비교 기준 지문 - full 은 None, delta 는 지난 생성 지문 (없으면 빈 dict)"""
+    if mode == 'delta':
+        return get_listing_fingerprints(user_id) or {}
+    if mode == 'full':
+        return None
+    raise Exception(f"지원하지 않는 생성 방식입니다: {mode}")
 
-    # 7. 이력 저장
-    save_generation_history(user_id, filename, len(ebay_df))
 
-    return output, filename, validation_errors
+def build_output_filename(user, output_format, mode='full'):
+    """다운로드 파일명 생성"""
+    safe_name = re.sub(r'[^a-zA-Z0-9가-힣_-]', '_', user['name'])
+    suffix = "_delta" if mode == 'delta' else ""
+    return f"ebay_bulk_{safe_name}{suffix}.{output_format}"
+
+
+def write_ebay_output(bulk_df, category_map, user, output_format='xlsx', previous_fingerprints=None,
+                      max_rows=None, max_bytes=None, name_prefix='ebay_bulk', verify_images=False, sites=None):
+    """변환된 행을 지정 포맷으로 기록 - generate_ebay_excel 결과 dict 중 파일/집계 부분 반환
+
+    previous_fingerprints 를 넘기면 변경분(delta) 모드로 동작한다.
+    지난 생성 대비 새 리스팅은 Add, 바뀐 리스팅은 Revise, 사라진 리스팅은 End 로만 기록한다.
+    max_rows / max_bytes 를 넘기면 chunked_output 으로 나눠 기록하고 zip 을 반환한다 (분할 파일명은 name_prefix_partNN).
+    verify_images=True 이면 검증 전에 image_checker 로 사진 URL 을 확인한다 (timings['images']).
+    sites 는 판매 사이트 코드 목록 (None 이면 프로필 설정, sites.SITE_PROFILES 참고).
+    변환은 한 번만 하고, 사이트가 여럿이면 site_output 으로 사이트별 파일을 렌더링해 zip 으로 묶는다 (name_prefix_사이트).
+    검증 / 집계 / 지문은 사이트와 무관하게 기본 형식(US) 변환 결과 기준이다.
+    """
+    if output_format not in OUTPUT_MIME_TYPES:
+        raise Exception(f"지원하지 않는 출력 형식입니다: {output_format}")
+
+    sites = get_user_sites({'sites': sites} if sites else user)
+    if len(sites) > 1 and (max_rows or max_bytes):
+        raise Exception("여러 사이트 출력은 파일 분할(최대 행 수 / 크기)과 함께 사용할 수 없습니다.")
+    # 사이트 하나면 그 사이트 형식으로 바로 기록 (변환 결과는 기본 형식이므로 청크마다 사이트 값으로 바꿈)
+    site = sites[0]
+    price_ending = get_pricing_rules(user)['ending']
+    header = get_site_columns(get_ebay_column_order(), site)
+
+    output = tempfile.SpooledTemporaryFile(max_size=OUTPUT_SPOOL_BYTES)
+    timings = {'convert': 0.0, 'write': 0.0}
+    description_template = get_description_template(user)
+    fingerprints = {}
+    delta_counts = None
+    parts = None
+    mime_type = OUTPUT_MIME_TYPES[output_format]
+    ebay_df = None
+    # 사진 URL 은 가장 긴 검증 컬럼이라 이미지를 확인할 때만 보관
+    validation_columns = [
+        column for column in VALIDATION_COLUMNS if verify_images or column != 'Item photo URL'
+    ]
 
+    if previous_fingerprints is not None:
+        # 변경분 비교에는 전체 변환 결과가 필요
+        with span('convert', mode='delta') as stage:
+            ebay_df = convert_to_ebay_variations(bulk_df, category_map, user)
+            fingerprints = compute_listing_fingerprints(ebay_df)
+            ebay_df, delta_counts = build_delta_frame(ebay_df, fingerprints, previous_fingerprints)
+            stage.count('rows_in', len(bulk_df))
+            stage.count('rows_out', len(ebay_df))
+        timings['convert'] = stage.duration
+        # 종료 행이 있으면 EndCode 컬럼이 붙음
+        header = get_site_columns(ebay_df.columns, site)
+
+    if output_format == 'csv' and not (max_rows or max_bytes) and len(sites) == 1:
+        # 전체 ebay_df 없이 PSKU 그룹 단위로 변환하면서 바로 기록
+        # (변환 / 기록이 청크마다 번갈아 일어나므로 하나의 span 에 단계별 합계를 속성으로 남김)
+        validation_frames = []
+        preview_frames = []
+        preview_count = 0
+        text_output = io.TextIOWrapper(output, encoding='utf-8', newline='', write_through=True)
+        try:
+            with span('stream_csv') as streaming:
+                writer = csv.writer(text_output)
+                writer.writerow(header)
+
+                if ebay_df is not None:
+                    chunks = iter([ebay_df])
+                else:
+                    chunks = iter_ebay_frames(bulk_df, category_map, user)
+
+                while True:
+                    stage_started = time.perf_counter()
+                    chunk = next(chunks, None)
+                    if chunk is not None and delta_counts is None:
+                        chunk_fingerprints = compute_listing_fingerprints(chunk)
+                        _check_unique_pskus(list(chunk_fingerprints), fingerprints)
+                        fingerprints.update(chunk_fingerprints)
+                    timings['convert'] += time.perf_counter() - stage_started
+                    if chunk is None:
+                        break
+
+                    stage_started = time.perf_counter()
+                    validation_frames.append(chunk[validation_columns])
+                    chunk = render_descriptions(render_site_frame(chunk, site, price_ending), description_template)
+                    writer.writerows(chunk.itertuples(index=False, name=None))
+                    timings['write'] += time.perf_counter() - stage_started
+
+                    streaming.count('chunks')
+                    streaming.count('rows_out', len(chunk))
+                    if preview_count < PREVIEW_ROWS:
+                        preview_frames.append(chunk.head(PREVIEW_ROWS - preview_count))
+                        preview_count += len(preview_frames[-1])
+
+                streaming.count('bytes_written', output.tell())
+                streaming.set(convert_s=round(timings['convert'], 3), write_s=round(timings['write'], 3))
+        finally:
+            # 결과 파일 객체가 함께 닫히지 않도록 분리
+            text_output.detach()
+
+        validation_df, preview = _join_streamed_frames(validation_frames, preview_frames)
+    elif output_format == 'xlsx' and ebay_df is None and not (max_rows or max_bytes) and len(sites) == 1:
+        # write-only 시트는 첫 행 전에 컬럼 너비가 필요하므로 PSKU 그룹 청크를 두 번 변환 (전체 ebay_df 없음)
+        # 1) 변환하며 지문 / 검증 컬럼 / 미리보기 / 컬럼 너비만 모으고 청크는 버림
+        # 2) 다시 변환하며 바로 시트에 기록 - 변환은 xlsx 기록보다 훨씬 빨라 재변환 비용이 작음
+        validation_frames = []
+        preview_frames = []
+        column_widths = None
+        with span('convert', streamed=True) as stage:
+            for chunk in iter_ebay_frames(bulk_df, category_map, user):
+                chunk_fingerprints = compute_listing_fingerprints(chunk)
+                _check_unique_pskus(list(chunk_fingerprints), fingerprints)
+                fingerprints.update(chunk_fingerprints)
+                validation_frames.append(chunk[validation_columns])
+
+                chunk = render_site_frame(chunk, site, price_ending)
+                chunk_widths = compute_column_widths(chunk)
+                column_widths = chunk_widths if column_widths is None else list(map(max, column_widths, chunk_widths))
+                preview_count = sum(map(len, preview_frames))
+                if preview_count < PREVIEW_ROWS:
+                    preview_frames.append(
+                        render_descriptions(chunk.head(PREVIEW_ROWS - preview_count), description_template)
+                    )
+                stage.count('chunks')
+                stage.count('rows_out', len(chunk))
+            stage.count('rows_in', len(bulk_df))
+        timings['convert'] = stage.duration
+
+        if column_widths is None:
+            column_widths = compute_column_widths(pd.DataFrame(columns=get_ebay_column_order()))
+
+        with span('write', output_format=output_format, sites=site, streamed=True) as stage:
+            rows = (
+                row
+                for chunk in iter_ebay_frames(bulk_df, category_map, user)
+                for row in _xlsx_values(render_site_frame(chunk, site, price_ending), description_template)
+            )
+            write_ebay_xlsx(output, header, rows, column_widths)
+            stage.count('bytes_written', output.tell())
+        timings['write'] = stage.duration
 
-def convert_to_ebay_variations(bulk_df, category_map, user):
-    """Bulk 데이터를 이베이 베리에이션 형식으로 변환"""
-    ebay_rows = []
-
-    grouped = bulk_df.groupby('PSKU', sort=False)
-
-    for psku, group in grouped:
-        psku = str(psku).strip()
-        if not psku:
-            continue
-
-        first_row = group.iloc[0]
-        product_name = str(first_row.get('Product Name', '')).strip()
-        category_id = str(first_row.get('Categoery ID', '')).strip()
-        category_name = str(first_row.get('Categoery', '')).strip()
-        brand = str(first_row.get('BRAND', '')).strip()
-        index_value = str(first_row.get('INDEX', '0')).strip()
-
-        cat_info = category_map.get(category_id, {})
-
-        if not category_name and cat_info:
-            category_name = cat_info.get('path', '')
-
-        condition_id = cat_info.get('condition', '1000-New')
-
-        all_options = []
-        for _, child in group.iterrows():
-            option = str(child.get('OPTION', '')).strip()
-            if option:
-                all_options.append(option)
-
-        relationship_details = f"OPTIONS={';'.join(all_options)}" if all_options else ''
-
-        parent_row = create_parent_row(
-            psku=psku,
-            product_name=product_name,
-            category_id=category_id,
-            category_name=category_name,
-            brand=brand,
-            condition_id=condition_id,
-            relationship_details=relationship_details,
-            first_price=clean_price(first_row.get('PRICE', '0')),
-            index_value=index_value,
-            user=user
+        validation_df, preview = _join_streamed_frames(validation_frames, preview_frames)
+    else:
+        if ebay_df is None:
+            with span('convert') as stage:
+                ebay_df = convert_to_ebay_variations(bulk_df, category_map, user)
+                fingerprints = compute_listing_fingerprints(ebay_df)
+                stage.count('rows_in', len(bulk_df))
+                stage.count('rows_out', len(ebay_df))
+            timings['convert'] = stage.duration
+
+        with span('write', output_format=output_format, sites=','.join(sites)) as stage:
+            if len(sites) > 1:
+                from site_output import write_site_outputs
+
+                output, parts = write_site_outputs(
+                    ebay_df, sites, output_format, description_template, name_prefix, price_ending
+                )
+                mime_type = 'application/zip'
+                stage.count('parts', len(parts))
+                stage.count('bytes_written', sum(part['bytes'] for part in parts))
+            elif max_rows or max_bytes:
+                from chunked_output import write_chunked_output
+
+                output, parts = write_chunked_output(
+                    render_site_frame(ebay_df, site, price_ending), output_format, description_template,
+                    name_prefix, max_rows, max_bytes, header=header
+                )
+                mime_type = 'application/zip'
+                stage.count('parts', len(parts))
+                stage.count('bytes_written', sum(part['bytes'] for part in parts))
+            else:
+                write_ebay_frame(output, render_site_frame(ebay_df, site, price_ending), output_format,
+                                 description_template, header=header)
+                stage.count('bytes_written', output.tell())
+            stage.count('rows_out', len(ebay_df))
+        timings['write'] = stage.duration
+
+        validation_df = ebay_df
+        preview = render_descriptions(
+            render_site_frame(ebay_df.head(PREVIEW_ROWS), site, price_ending), description_template
         )
-        ebay_rows.append(parent_row)
-
-        for _, child_data in group.iterrows():
-            child_row = create_child_row(child_data, user)
-            ebay_rows.append(child_row)
 
-    return ebay_rows
+    # 미리보기는 (첫) 사이트 파일과 같은 헤더로
+    preview = preview.set_axis(header, axis=1)
 
+    output.seek(0)
 
-def create_parent_row(psku, product_name, category_id, category_name, brand, condition_id,
-                      relationship_details, first_price, index_value, user):
-    """부모 행 생성 - INDEX 기반 다중 이미지 URL 생성"""
+    image_status = None
+    if verify_images:
+        from image_checker import split_photo_urls, verify_image_urls
 
-    parent_image_urls = generate_parent_image_urls(psku, index_value, user)
+        with span('images') as stage:
+            _, photo_urls = split_photo_urls(validation_df['Item photo URL'].to_numpy(dtype=object))
+            image_status = verify_image_urls(photo_urls)
+            stage.count('urls', len(image_status))
+        timings['images'] = stage.duration
 
-    parent = {
-        '*Action(SiteID=US|Country=KR|Currency=USD|Version=1193)': 'Add',
-        'Custom label (SKU)': psku,
-        'Category ID': category_id,
-        'Category name': category_name,
-        'Title': product_name,
-        'Relationship': '',
-        'Relationship details': relationship_details,
-        'Schedule Time': '',
-        'P:EPID': '',
-        'Start price': first_price,
-        'Quantity': str(user.get('default_quantity', 999)),
-        'Item photo URL': parent_image_urls,
-        'VideoID': '',
-        'Condition ID': condition_id,
-        'Description': user.get('default_description', ''),
-        'Format': 'FixedPrice',
-        'Duration': 'GTC',
-        'Buy It Now price': '',
-        'Best Offer Enabled': '',
-        'Best Offer Auto Accept Price': '',
-        'Minimum Best Offer Price': '',
-        'Immediate pay required': '',
-        'Location': 'KR',
-        'Shipping service 1 option': 'StandardShippingFromOutsideUS',
-        'Shipping service 1 cost': '0',
-        'Shipping service 1 priority': '',
-        'Shipping service 2 option': '',
-        'Shipping service 2 cost': '',
-        'Shipping service 2 priority': '',
-        'Max dispatch time': '3',
-        'Returns accepted option': '',
-        'Returns within option': '',
-        'Refund option': '',
-        'Return shipping cost paid by': '',
-        'Shipping profile name': user.get('shipping_profile_name', ''),
-        'Return profile name': user.get('return_profile_name', ''),
-        'Payment profile name': user.get('payment_profile_name', ''),
-        'ProductCompliancePolicyID': '',
-        'Regional ProductCompliancePolicies': '',
-        'C:Brand': brand
+    with span('validate') as stage:
+        findings = validate_ebay_data(
+            validation_df, category_map, image_status, allow_empty=delta_counts is not None
+        )
+        stage.count('rows_in', len(validation_df))
+        stage.count('findings', len(findings))
+    timings['validate'] = stage.duration
+
+    return {
+        'output': output,
+        'output_format': output_format,
+        'mime_type': mime_type,
+        'parts': parts,
+        'findings': findings,
+        'counts': count_ebay_rows(validation_df),
+        'delta': delta_counts,
+        'fingerprints': fingerprints,
+        'preview': preview,
+        'timings': timings,
     }
 
-    return parent
 
+def _join_streamed_frames(validation_frames, preview_frames):
+    """청크 단위로 모은 검증 컬럼 / 미리보기 조각을 합침 - 청크가 없으면 빈 DataFrame"""
+    if not validation_frames:
+        return pd.DataFrame(columns=VALIDATION_COLUMNS), pd.DataFrame(columns=get_ebay_column_order())
+    return pd.concat(validation_frames), pd.concat(preview_frames)
 
-def create_child_row(row, user):
-    """자식 행 생성 - OPTIONS 고정 형식 사용"""
 
-    sku = str(row.get('SKU', '')).strip()
-    option = str(row.get('OPTION', '')).strip()
-    price = clean_price(row.get('PRICE', '0'))
+def count_ebay_rows(ebay_df):
+    """전체 / 부모(PSKU) / 자식(SKU) / 베리에이션 행 수 집계"""
+    action = ebay_df[ACTION_COLUMN]
+    return {
+        'total': len(ebay_df),
+        'psku': int(action.isin(['Add', 'Revise']).sum()),
+        'sku': int((action == '').sum()),
+        'variations': int((ebay_df['Relationship'] == 'Variation').sum()),
+    }
 
-    relationship_details = f"OPTIONS={option}" if option else ''
 
-    base_image_url = generate_image_url(sku, user)
-    child_image_url = f"{option}={base_image_url}" if option and base_image_url else base_image_url
+def compute_listing_fingerprints(ebay_df):
+    """리스팅(부모 1행 + 자식 행 블록)별 해시 - {PSKU: 16자리 hex}
 
-    child = {
-        '*Action(SiteID=US|Country=KR|Currency=USD|Version=1193)': '',
-        'Custom label (SKU)': sku,
-        'Category ID': '',
-        'Category name': '',
-        'Title': '',
-        'Relationship': 'Variation',
-        'Relationship details': relationship_details,
-        'Schedule Time': '',
-        'P:EPID': '',
-        'Start price': price,
-        'Quantity': str(user.get('default_quantity', 999)),
-        'Item photo URL': child_image_url,
-        'VideoID': '',
-        'Condition ID': '',
-        'Description': '',
-        'Format': '',
-        'Duration': '',
-        'Buy It Now price': '',
-        'Best Offer Enabled': '',
-        'Best Offer Auto Accept Price': '',
-        'Minimum Best Offer Price': '',
-        'Immediate pay required': '',
-        'Location': '',
-        'Shipping service 1 option': '',
-        'Shipping service 1 cost': '',
-        'Shipping service 1 priority': '',
-        'Shipping service 2 option': '',
-        'Shipping service 2 cost': '',
-        'Shipping service 2 priority': '',
-        'Max dispatch time': '',
-        'Returns accepted option': '',
-        'Returns within option': '',
-        'Refund option': '',
-        'Return shipping cost paid by': '',
-        'Shipping profile name': '',
-        'Return profile name': '',
-        'Payment profile name': '',
-        'ProductCompliancePolicyID': '',
-        'Regional ProductCompliancePolicies': '',
-        'C:Brand': ''
+    행 해시에 블록 내 순번을 섞은 뒤 블록 단위로 합산하므로 전체 O(n) 벡터 연산이다.
+    PSKU 는 앞뒤 공백을 제거한 값(Custom label)이 키이므로, 공백만 다른 PSKU 가 있으면 지문이 겹치지 않도록 예외.
+    """
+    if len(ebay_df) == 0:
+        return {}
+
+    action = ebay_df[ACTION_COLUMN].to_numpy()
+    parent_rows = np.flatnonzero(action == 'Add')
+    block = np.cumsum(action == 'Add') - 1
+    rank = np.arange(len(ebay_df)) - parent_rows[block]
+
+    row_hash = pd.util.hash_pandas_object(ebay_df, index=False).to_numpy()
+    mixed = pd.util.hash_pandas_object(
+        pd.DataFrame({'row': row_hash, 'rank': rank}), index=False
+    ).to_numpy()
+    block_hash = np.add.reduceat(mixed, parent_rows)
+
+    pskus = ebay_df['Custom label (SKU)'].to_numpy()[parent_rows]
+    _check_unique_pskus(pskus)
+    return dict(zip(pskus, (format(int(h), '016x') for h in block_hash)))
+
+
+def _check_unique_pskus(pskus, known=()):
+    """공백 제거 후 같은 PSKU 가 둘 이상이면 예외 (known - 앞 청크에서 이미 나온 PSKU)"""
+    pskus = pd.Series(pskus, dtype=object)
+    repeated = pskus[pskus.duplicated() | np.array([psku in known for psku in pskus.tolist()], dtype=bool)]
+    if len(repeated):
+        sample = ', '.join(repr(psku) for psku in repeated.unique()[:5])
+        raise Exception(f"앞뒤 공백을 제거하면 같아지는 PSKU 가 있습니다: {sample} - 시트의 PSKU 를 정리해 주세요.")
+
+
+def build_delta_frame(ebay_df, fingerprints, previous_fingerprints):
+    """지난 생성의 리스팅 해시와 비교해 Add / Revise / End 행만 남긴 DataFrame 과 집계 반환"""
+    action = ebay_df[ACTION_COLUMN].to_numpy()
+    is_parent = action == 'Add'
+    block = np.cumsum(is_parent) - 1
+
+    pskus = ebay_df['Custom label (SKU)'].to_numpy()[is_parent]
+    current = pd.Series([fingerprints.get(p) for p in pskus], dtype=object)
+    previous = pd.Series(pskus, dtype=object).map(previous_fingerprints)
+
+    added = previous.isna().to_numpy()
+    revised = ~added & (previous.to_numpy() != current.to_numpy())
+    keep_block = added | revised
+
+    delta_df = ebay_df[keep_block[block]].copy()
+    revise_rows = (revised[block] & is_parent)[keep_block[block]]
+    # 인덱스(시트 행 번호)는 부모와 첫 자식이 같으므로 위치로 지정
+    delta_df.iloc[np.flatnonzero(revise_rows), delta_df.columns.get_loc(ACTION_COLUMN)] = 'Revise'
+
+    # 지난 생성에는 있었지만 이번에 사라진 리스팅은 종료
+    ended = [psku for psku in previous_fingerprints if psku not in fingerprints]
+    if ended:
+        # 종료 행은 시트에 없으므로 행 번호 0 - EndCode 컬럼은 종료 행이 있을 때만 마지막에 추가
+        columns = list(ebay_df.columns) + [END_CODE_COLUMN]
+        end_df = pd.DataFrame('', index=np.zeros(len(ended), dtype=np.int64), columns=columns, dtype=object)
+        end_df[ACTION_COLUMN] = 'End'
+        end_df['Custom label (SKU)'] = ended
+        end_df[END_CODE_COLUMN] = DEFAULT_END_CODE
+        delta_df = pd.concat([delta_df.assign(**{END_CODE_COLUMN: ''}), end_df])
+
+    delta_counts = {
+        'added': int(added.sum()),
+        'revised': int(revised.sum()),
+        'ended': len(ended),
+        'unchanged': int((~keep_block).sum()),
     }
+    return delta_df, delta_counts
 
-    return child
 
+def iter_ebay_frames(bulk_df, category_map, user, chunk_groups=STREAM_CHUNK_GROUPS):
+    """PSKU 그룹 단위로 나눠 변환한 이베이 DataFrame 조각을 출력 순서대로 반환"""
+    codes, _ = pd.factorize(bulk_df['PSKU'], sort=False)
+    codes = np.asarray(codes)
+    group_count = int(codes.max()) + 1 if len(codes) and codes.max() >= 0 else 0
 
-def generate_parent_image_urls(psku, index_value, user):
-    """INDEX 기반 부모 상품 다중 이미지 URL 생성 - 샵코드 적용"""
+    # 그룹 코드 기준 안정 정렬 → 청크 안에서도 첫 등장 순서와 그룹 내 행 순서가 유지됨
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
 
-    if not psku or not user.get('image_domain'):
-        return ""
+    for start in range(0, group_count, chunk_groups):
+        lo, hi = np.searchsorted(sorted_codes, [start, start + chunk_groups])
+        yield convert_to_ebay_variations(bulk_df.iloc[order[lo:hi]], category_map, user)
+        # 받는 쪽이 이 청크를 처리한 뒤 - Bulk 행 기준 진행률
+        progress(int(hi), len(codes))
 
-    shop_code = str(user.get('shop_code', '')).strip()
 
-    try:
-        only_digits = re.sub(r'[^\d]', '', str(index_value)) if index_value else ''
-        index_num = int(only_digits) if only_digits else 0
-    except ValueError:
-        index_num = 0
-
-    image_urls = []
-
-    # 첫 번째 이미지
-    if shop_code:
-        first_image_sku = f"{psku}_C_{shop_code}"
-        first_image_url = generate_image_url(first_image_sku, user)
-        if first_image_url:
-            image_urls.append(first_image_url)
-    else:
-        base_url = generate_image_url(psku, user)
-        if base_url:
-            image_urls.append(base_url)
+def write_ebay_frame(output, ebay_df, output_format, description_template=None, chunk_rows=10000, header=None):
+    """변환된 DataFrame 하나를 지정 포맷으로 바이너리 파일 객체에 기록 (설명은 청크마다 렌더링)
 
-    # 추가 이미지
-    for i in range(1, index_num + 1):
-        sub_sku = f"{psku}_D{i}"
-        sub_url = generate_image_url(sub_sku, user)
-        if sub_url:
-            image_urls.append(sub_url)
+    header 를 주면 컬럼명 대신 이 헤더를 기록한다 (사이트별 헤더, sites.get_site_columns).
+    """
+    if header is None:
+        header = list(ebay_df.columns)
 
-    return '|'.join(image_urls)
+    if output_format == 'xlsx':
+        column_widths = compute_column_widths(ebay_df)
+        rows = iter_xlsx_rows(ebay_df, description_template, chunk_rows)
+        write_ebay_xlsx(output, header, rows, column_widths)
+        return
 
+    text_output = io.TextIOWrapper(output, encoding='utf-8', newline='', write_through=True)
+    try:
+        writer = csv.writer(text_output)
+        writer.writerow(header)
+        for start in range(0, len(ebay_df), chunk_rows):
+            chunk = ebay_df.iloc[start:start + chunk_rows]
+            if description_template is not None:
+                chunk = render_descriptions(chunk, description_template)
+            writer.writerows(chunk.itertuples(index=False, name=None))
+            progress(start + len(chunk), len(ebay_df))
+    finally:
+        # 호출한 쪽의 파일 객체가 함께 닫히지 않도록 분리
+        text_output.detach()
+
+
+def compute_column_widths(ebay_df):
+    """소스 컬럼의 문자열 길이로 Excel 컬럼 너비 계산 (헤더 포함, 최대 50)"""
+    widths = []
+    for column in ebay_df.columns:
+        max_length = len(str(column))
+        lengths = ebay_df[column].astype(object).str.len()
+        if lengths.notna().any():
+            max_length = max(max_length, int(lengths.max()))
+        widths.append(min(max_length + 2, 50))
+    return widths
+
+
+def write_ebay_xlsx(output, columns, rows, column_widths):
+    """openpyxl write-only 모드로 행을 순차 기록 - 워크북 전체를 메모리에 두지 않음"""
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(XLSX_SHEET_NAME)
+
+    # write-only 시트는 첫 행 기록 전에 컬럼 너비를 지정해야 함
+    for i, width in enumerate(column_widths, start=1):
+        worksheet.column_dimensions[get_column_letter(i)].width = width
+
+    worksheet.append(list(columns))
+    try:
+        for row in rows:
+            worksheet.append(row)
+    except BaseException:
+        # 기록 도중 중단(작업 취소 등)되면 시트 스트림을 순서대로 닫고 임시 파일 삭제
+        worksheet.close()
+        worksheet._writer.cleanup()
+        raise
 
-def generate_image_url(sku, user):
-    """SKU 기반 이미지 URL 생성"""
-    if not sku or not user.get('image_domain'):
-        return ""
+    workbook.save(output)
 
-    domain = user['image_domain'].rstrip('/')
-    pattern = user.get('image_url_pattern', '/{sku}.jpg')
 
-    return domain + pattern.format(sku=sku)
+def iter_xlsx_rows(ebay_df, description_template=None, chunk_rows=10000):
+    """빈 문자열을 None 으로 바꾼 행 리스트 생성 - write-only 시트는 None 셀을 아예 기록하지 않음
 
+    설명 템플릿을 넘기면 청크마다 렌더링하므로 렌더링된 설명은 한 청크 분량만 메모리에 있다.
+    """
+    for start in range(0, len(ebay_df), chunk_rows):
+        chunk = ebay_df.iloc[start:start + chunk_rows]
+        yield from _xlsx_values(chunk, description_template)
+        progress(start + len(chunk), len(ebay_df))
 
-def clean_price(price_value):
-    """가격에서 숫자만 추출"""
-    if not price_value:
-        return ""
 
-    cleaned = re.sub(r'[^\d.]', '', str(price_value))
-    try:
-        return f"{float(cleaned):.2f}" if cleaned else ""
-    except ValueError:
-        return ""
+def _xlsx_values(chunk, description_template=None):
+    """청크 하나를 xlsx 행 리스트로 (설명 렌더링 후 빈 문자열 → None)"""
+    if description_template is not None:
+        chunk = render_descriptions(chunk, description_template)
+    values = chunk.to_numpy(dtype=object, copy=True)
+    values[values == ''] = None
+    return values.tolist()
 
 
-def validate_ebay_data(ebay_df, category_map):
-    """이베이 데이터 검증"""
-    errors = []
+def convert_to_ebay_variations(bulk_df, category_map, user):
+    """Bulk 데이터를 이베이 베리에이션 형식으로 변환 - 컬럼 단위 벡터 연산
+
+    결과 인덱스는 각 행의 원본 Bulk 시트 행 번호 (부모 행은 그룹 첫 행, 헤더가 1행).
+    """
+    columns = get_ebay_column_order()
+
+    # PSKU 그룹 코드 (첫 등장 순서 = groupby(sort=False) 순서)
+    codes, _ = pd.factorize(bulk_df['PSKU'], sort=False)
+    codes = np.asarray(codes)
+    in_group = codes >= 0
+    group_count = int(codes.max()) + 1 if in_group.any() else 0
+
+    psku = _text_column(bulk_df, 'PSKU', '')
+    sku = _text_column(bulk_df, 'SKU', '')
+    option = _text_column(bulk_df, 'OPTION', '')
+    raw_category_id = _text_column(bulk_df, 'Categoery ID', '')
+    raw_brand = _text_column(bulk_df, 'BRAND', '')
+
+    # 그룹별 첫 번째 행 위치와 크기
+    group_rows = np.flatnonzero(in_group)
+    _, first_idx = np.unique(codes[in_group], return_index=True)
+    first_pos = group_rows[first_idx]
+    group_sizes = np.bincount(codes[in_group], minlength=group_count)
+
+    # 가격 - 프로필 가격 규칙은 리스팅(부모 행)의 카테고리 / 브랜드 기준으로 자식 행까지 같은 규칙 적용
+    row_first = first_pos[np.maximum(codes, 0)] if group_count else np.zeros(len(codes), dtype=np.int64)
+    price = format_price_column(apply_pricing_rules(
+        parse_price_column(_text_column(bulk_df, 'PRICE', '0', strip=False)),
+        raw_category_id[row_first], raw_brand[row_first], get_pricing_rules(user),
+    ))
+
+    keep_group = psku[first_pos] != ''
+    kept = np.flatnonzero(keep_group)
+    kept_first = first_pos[kept]
+
+    # 출력 위치 계산: 부모 1행 + 자식 N행 블록을 순서대로 배치
+    block_sizes = group_sizes[kept] + 1
+    parent_pos = np.cumsum(block_sizes) - block_sizes
+    total_rows = int(block_sizes.sum())
+
+    parent_pos_by_group = np.full(group_count, -1)
+    parent_pos_by_group[kept] = parent_pos
+
+    child_mask = in_group.copy()
+    child_mask[in_group] = keep_group[codes[in_group]]
+    child_codes = codes[child_mask]
+    child_rank = pd.Series(child_codes).groupby(child_codes).cumcount().to_numpy()
+    child_pos = parent_pos_by_group[child_codes] + 1 + child_rank
+
+    # 그룹별 OPTIONS 결합
+    has_option = child_mask & (option != '')
+    joined_options = pd.Series(option[has_option]).groupby(codes[has_option]).agg(';'.join)
+    all_options = joined_options.reindex(kept, fill_value='').to_numpy(dtype=object)
+    parent_details = _prefix_nonempty('OPTIONS=', all_options)
+
+    # 카테고리 / 컨디션 매핑
+    category_id = raw_category_id[kept_first]
+    category_name = _text_column(bulk_df, 'Categoery', '')[kept_first]
+    path_map = {cid: info.get('path', '') for cid, info in category_map.items() if info}
+    condition_map = {cid: info.get('condition', '1000-New') for cid, info in category_map.items()}
+
+    mapped_path = pd.Series(category_id).map(path_map)
+    fill_path = (category_name == '') & mapped_path.notna().to_numpy()
+    category_name = np.where(fill_path, mapped_path.to_numpy(dtype=object), category_name)
+    condition_id = pd.Series(category_id).map(condition_map).fillna('1000-New').to_numpy(dtype=object)
+
+    # 이미지 URL - 프로필별로 컴파일된 생성기로 컬럼 단위 생성
+    image_urls = get_image_url_builder(user)
+    parent_psku = psku[kept_first]
+    parent_images = build_parent_image_urls(image_urls, parent_psku, _text_column(bulk_df, 'INDEX', '0')[kept_first])
+
+    # 자식 행 값
+    child_sku = sku[child_mask]
+    child_option = option[child_mask]
+    child_images = build_child_image_urls(image_urls, child_sku, child_option, psku[child_mask])
+
+    quantity = str(user.get('default_quantity', 999))
+
+    parent_values = {
+        ACTION_COLUMN: 'Add',
+        'Custom label (SKU)': parent_psku,
+        'Category ID': category_id,
+        'Category name': category_name,
+        'Title': _text_column(bulk_df, 'Product Name', '')[kept_first],
+        'Relationship details': parent_details,
+        'Start price': price[kept_first],
+        'Quantity': quantity,
+        'Item photo URL': parent_images,
+        'Condition ID': condition_id,
+        # 프로필 설명은 컴파일된 템플릿 원문 하나를 모든 부모 행이 공유 (자리표시자는 기록 시 렌더링)
+        'Description': get_description_template(user)['source'],
+        'Format': 'FixedPrice',
+        'Duration': 'GTC',
+        'Location': 'KR',
+        'Shipping service 1 option': 'StandardShippingFromOutsideUS',
+        'Shipping service 1 cost': '0',
+        'Max dispatch time': '3',
+        'Shipping profile name': user.get('shipping_profile_name', ''),
+        'Return profile name': user.get('return_profile_name', ''),
+        'Payment profile name': user.get('payment_profile_name', ''),
+        'C:Brand': raw_brand[kept_first],
+    }
 
-    if len(ebay_df) == 0:
-        return ["데이터가 없습니다."]
+    child_values = {
+        'Custom label (SKU)': child_sku,
+        'Relationship': 'Variation',
+        'Relationship details': _prefix_nonempty('OPTIONS=', child_option),
+        'Start price': price[child_mask],
+        'Quantity': quantity,
+        'Item photo URL': child_images,
+    }
+
+    data = {}
+    for column in columns:
+        values = np.full(total_rows, '', dtype=object)
+        if column in parent_values:
+            values[parent_pos] = parent_values[column]
+        if column in child_values:
+            values[child_pos] = child_values[column]
+        data[column] = values
+
+    # 검증 결과를 원본 시트 행으로 안내하기 위한 행 번호
+    bulk_rows = np.asarray(bulk_df.index, dtype=np.int64) + SHEET_FIRST_DATA_ROW
+    sheet_rows = np.zeros(total_rows, dtype=np.int64)
+    sheet_rows[parent_pos] = bulk_rows[kept_first]
+    sheet_rows[child_pos] = bulk_rows[child_mask]
 
-    add_rows = ebay_df[ebay_df['*Action(SiteID=US|Country=KR|Currency=USD|Version=1193)'] == 'Add']
+    return pd.DataFrame(data, index=pd.Index(sheet_rows, name='sheet_row'), columns=columns, dtype=object)
 
-    required_fields = ['Custom label (SKU)', 'Category ID', 'Category name', 'Title', 'Start price', 'Condition ID']
 
-    for idx, row in add_rows.iterrows():
-        for field in required_fields:
-            if not str(row.get(field, '')).strip():
-                errors.append(f"PSKU 행 {idx + 2}: {field} 누락")
+def _text_column(df, column, default, strip=True):
+    """컬럼을 str 값의 object 배열로 변환 (컬럼이 없으면 기본값)"""
+    if column not in df.columns:
+        return np.full(len(df), default, dtype=object)
 
-    if category_map:
-        invalid_cats = add_rows[
-            ~add_rows['Category ID'].isin(category_map.keys()) & (add_rows['Category ID'] != '')
-        ]
-        if len(invalid_cats) > 0:
-            unique_invalid = invalid_cats['Category ID'].unique()[:5]
-            errors.append(f"⚠️ CAT 탭에 없는 카테고리 ID: {', '.join(map(str, unique_invalid))}")
+    values = df[column].astype(object).map(str)
+    if strip:
+        values = values.str.strip()
+    return values.to_numpy(dtype=object)
 
-    var_rows = ebay_df[ebay_df['Relationship'] == 'Variation']
-    for idx, row in var_rows.iterrows():
-        if not str(row.get('Custom label (SKU)', '')).strip():
-            errors.append(f"SKU 행 {idx + 2}: SKU 누락")
-        if not str(row.get('Start price', '')).strip():
-            errors.append(f"SKU 행 {idx + 2}: 가격 누락")
 
-    return errors
+def _prefix_nonempty(prefix, values):
+    """값이 있는 항목에만 접두어 추가"""
+    values = np.asarray(values, dtype=object)
+    result = np.full(len(values), '', dtype=object)
+    nonempty = values != ''
+    result[nonempty] = prefix + values[nonempty]
+    return result
 
 
 def get_ebay_column_order():
     """이베이 표준 컬럼 순서 - P:UPC 제거 버전"""
     return [
-        '*Action(SiteID=US|Country=KR|Currency=USD|Version=1193)',
+        ACTION_COLUMN,
         'Custom label (SKU)',
         'Category ID',
         'Category name',
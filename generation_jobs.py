@@ -0,0 +1,248 @@
+import hashlib
+import itertools
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from tracing import log, progress_listener
+
+# 동시에 실행할 생성 작업 수 (같은 프로필을 쓰는 작업은 차례로 실행되므로 프로필 간 동시 실행 수)
+JOB_WORKERS = 2
+
+# 끝난 작업(결과 파일 포함) 보관 시간 / 최대 개수 - 넘으면 오래된 것부터 정리
+JOB_RETENTION_SECONDS = 60 * 60
+MAX_FINISHED_JOBS = 20
+
+# 작업 상태
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_ERROR = 'error'
+STATUS_CANCELLED = 'cancelled'
+ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+# 작업 레지스트리 {작업 ID: 작업} - Streamlit 스크립트 재실행과 무관하게 프로세스 전체에서 유지
+_jobs = {}
+_jobs_lock = threading.Lock()
+# 실행 중(작업 풀에 넘긴) 작업이 쓰고 있는 프로필 ID - 같은 프로필의 이력 / 변경분 지문을 두 작업이 동시에 쓰지 않도록
+_busy_users = set()
+# 같은 프로필을 쓰는 앞 작업이 끝나기를 기다리는 작업 (등록 순) - 작업 풀 스레드를 차지하지 않고 여기서 대기
+_waiting = []
+_job_numbers = itertools.count(1)
+_executor = None
+
+
+class JobCancelled(Exception):
+    """취소 요청된 작업을 다음 단계 / 행 배치 경계에서 중단"""
+
+
+def is_cancellation(error):
+    """JobCancelled 이거나 JobCancelled 를 감싼 예외인지 (시트 읽기 등은 예외를 감싸서 다시 던짐)"""
+    while error is not None:
+        if isinstance(error, JobCancelled):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def start_generation(user_id, output_format='xlsx', force_refresh=False, mode='full',
+                     max_rows=None, max_bytes=None, verify_images=False, use_cache=True, sites=None):
+    """단일 프로필 생성 작업 시작 - 작업 ID 반환
+
+    같은 프로필, 같은 옵션의 작업이 이미 대기 / 실행 중이면 새로 시작하지 않고 그 작업 ID 를 반환한다.
+    옵션이 다른 작업은 따로 만들되, 같은 프로필을 쓰는 앞 작업(일괄 생성 포함)이 끝난 뒤 실행한다.
+    (같은 프로필을 동시에 생성하면 이력 / 변경분 지문이 서로 덮어씀)
+    """
+    from excel_generator import generate_ebay_excel
+
+    params = {
+        'user_id': user_id, 'output_format': output_format, 'force_refresh': force_refresh, 'mode': mode,
+        'max_rows': max_rows, 'max_bytes': max_bytes, 'verify_images': verify_images, 'use_cache': use_cache,
+        'sites': sites,
+    }
+    return _submit(('generate', user_id), {user_id}, params, generate_ebay_excel, dict(params, traced=True))
+
+
+def start_batch(output_format='xlsx', force_refresh=False, mode='full'):
+    """전체 프로필 일괄 생성 작업 시작 - 작업 ID 반환 (같은 옵션으로 이미 실행 중이면 그 작업 ID)
+
+    모든 프로필을 쓰므로 진행 중인 단일 프로필 작업이 끝난 뒤 실행한다.
+    """
+    from batch_generator import generate_batch
+    from database import get_users
+
+    params = {'output_format': output_format, 'force_refresh': force_refresh, 'mode': mode}
+    users = {user['id'] for user in get_users()}
+    return _submit(('batch',), users, params, generate_batch, dict(params, user_ids='all'))
+
+
+def get_job(job_id):
+    """작업 상태 조회 - 없거나 정리된 작업이면 None
+
+    반환값(dict): id, key, params, status, stage, done, total, error, result, created_at, started_at, finished_at
+        key                  - (종류, [프로필 ID,] 옵션 해시)
+        stage / done / total - 지금 단계(span 이름)와 그 단계 안의 행 진행 (모르면 None)
+        result               - 생성 함수의 반환값 (끝난 작업만)
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return None
+        return {key: value for key, value in job.items() if not key.startswith('_')}
+
+
+def find_job(key, active_only=False):
+    """작업 키 앞부분(('generate', user_id) / ('batch',))이 같은 가장 최근 작업 ID - 옵션은 구분하지 않음, 없으면 None"""
+    with _jobs_lock:
+        for job in reversed(list(_jobs.values())):
+            if job['key'][:len(key)] == key and (not active_only or job['status'] in ACTIVE_STATUSES):
+                return job['id']
+    return None
+
+
+def cancel_job(job_id):
+    """작업 취소 요청 - 대기 중이면 바로, 실행 중이면 다음 단계 / 행 배치에서 멈춤. 요청했으면 True"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None or job['status'] not in ACTIVE_STATUSES:
+            return False
+        job['_cancel'].set()
+        if job['status'] == STATUS_QUEUED:
+            job['status'] = STATUS_CANCELLED
+            job['finished_at'] = time.time()
+            # 앞 작업을 기다리던 중이면 대기열에서 빼고, 이 작업 뒤에서 기다리던 작업을 시작
+            if job in _waiting:
+                _waiting.remove(job)
+                job.pop('_run')
+                _dispatch()
+    return True
+
+
+def _submit(kind, users, params, func, kwargs):
+    """작업 등록 후 작업 풀에 제출 - 같은 키(종류 + 옵션 해시)의 진행 중 작업이 있으면 그 ID
+
+    users 는 작업이 쓰는 프로필 ID 집합 - 겹치는 작업은 등록 순으로 차례로 실행된다 (_dispatch).
+    """
+    key = kind + (_params_digest(params),)
+    with _jobs_lock:
+        for job in _jobs.values():
+            if job['key'] == key and job['status'] in ACTIVE_STATUSES:
+                log("작업", f"{job['id']} 진행 중 - 새 요청을 합침", job_id=job['id'])
+                return job['id']
+
+        _evict_finished()
+        job_id = f"{datetime.now():%Y%m%d%H%M%S}-{next(_job_numbers)}"
+        job = {
+            'id': job_id,
+            'key': key,
+            'params': params,
+            'status': STATUS_QUEUED,
+            'stage': None,
+            'done': None,
+            'total': None,
+            'error': '',
+            'result': None,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            '_cancel': threading.Event(),
+            '_users': frozenset(users),
+            '_run': (func, kwargs),
+        }
+        _jobs[job_id] = job
+        _waiting.append(job)
+        _dispatch()
+
+    log("작업", f"{job_id} 시작: {key}", job_id=job_id)
+    return job_id
+
+
+def _dispatch():
+    """대기 중인 작업 중 프로필이 겹치는 앞 작업이 없는 것을 작업 풀에 넘김 (_jobs_lock 안에서 호출)
+
+    앞에서 기다리는 작업의 프로필도 막아 두므로 같은 프로필 작업은 등록 순으로 실행된다
+    (일괄 생성 뒤에 들어온 단일 프로필 작업이 일괄 생성을 앞지르지 않음).
+    """
+    global _executor
+
+    blocked = set(_busy_users)
+    for job in list(_waiting):
+        if not job['_users'] & blocked:
+            _waiting.remove(job)
+            _busy_users.update(job['_users'])
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="generation-job")
+            _executor.submit(_run_job, job, *job.pop('_run'))
+        blocked.update(job['_users'])
+
+
+def _run_job(job, func, kwargs):
+    """작업 풀 스레드 - 단계 / 진행 보고를 받으며 생성 함수 실행 (프로필은 _dispatch 에서 이미 잡아 둠)"""
+    cancel = job['_cancel']
+
+    def listener(stage, done, total):
+        if cancel.is_set():
+            raise JobCancelled("취소되었습니다.")
+        with _jobs_lock:
+            if stage is not None:
+                job['stage'] = stage
+                job['done'] = job['total'] = None
+            else:
+                job['done'] = done
+                job['total'] = total
+
+    with _jobs_lock:
+        if cancel.is_set():
+            # 작업 풀 대기 중에 취소됨
+            _release(job)
+            return
+        job['status'] = STATUS_RUNNING
+        job['started_at'] = time.time()
+
+    try:
+        with progress_listener(listener):
+            result = func(**kwargs)
+        status, error = STATUS_DONE, ''
+    except Exception as e:
+        # 시트 읽기 등은 예외를 감싸서 다시 던지므로 취소 여부는 요청 플래그로 판단
+        result = None
+        status, error = (STATUS_CANCELLED, '') if cancel.is_set() else (STATUS_ERROR, str(e))
+
+    with _jobs_lock:
+        job.update(status=status, error=error, result=result, finished_at=time.time())
+        _release(job)
+
+    if status == STATUS_ERROR:
+        log("작업", f"{job['id']} 실패: {error}", level=logging.WARNING, job_id=job['id'])
+    else:
+        log("작업", f"{job['id']} {status} ({job['finished_at'] - job['started_at']:.1f}초)", job_id=job['id'])
+
+
+def _release(job):
+    """작업이 쓰던 프로필을 풀고 기다리던 작업 시작 (_jobs_lock 안에서 호출)"""
+    _busy_users.difference_update(job['_users'])
+    _dispatch()
+
+
+def _params_digest(params):
+    """생성 옵션의 정규화된 해시 - 같은 옵션의 요청만 한 작업으로 합침"""
+    normalized = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def _evict_finished():
+    """보관 시간이 지났거나 개수 상한을 넘은 끝난 작업 정리 (_jobs_lock 안에서 호출)"""
+    now = time.time()
+    finished = [job for job in _jobs.values() if job['status'] not in ACTIVE_STATUSES]
+    expired = finished[:max(0, len(finished) - MAX_FINISHED_JOBS)] + [
+        job for job in finished[-MAX_FINISHED_JOBS:] if now - job['finished_at'] > JOB_RETENTION_SECONDS
+    ]
+    for job in expired:
+        del _jobs[job['id']]
+        output = (job['result'] or {}).get('output')
+        if output is not None:
+            # 분할 결과 zip 은 디스크 임시 파일
+            output.close()
@@ -0,0 +1,237 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import date, datetime
+
+# 생성 이력 로그 폴더 구성 (폴더 경로는 database.HISTORY_LOG_DIR)
+#   active.log          - 지금 추가 중인 로그 (한 줄에 이력 1건, JSON)
+#   segment-<ns>.log    - 크기 상한을 넘어 회전된 로그
+#   summary.json        - 압축된 오래된 구간의 (사용자, 날짜)별 집계
+ACTIVE_LOG = "active.log"
+SUMMARY_FILE = "summary.json"
+SEGMENT_PREFIX = "segment-"
+
+# active.log 가 이 크기를 넘으면 회전
+HISTORY_LOG_MAX_BYTES = 16 * 1024 * 1024
+
+# 원본 그대로 남겨 둘 회전 로그 수 - 넘치면 오래된 것부터 summary.json 에 합침
+HISTORY_LOG_KEEP_SEGMENTS = 4
+
+# 사용자별로 기억할 최근 이력 수 (화면 표시용)
+HISTORY_RECENT_ENTRIES = 20
+
+_lock = threading.Lock()
+
+# 로그에서 만든 메모리 색인 - 조회할 때 로그가 바뀌었으면 늘어난 부분만 읽거나 다시 만든다
+#   days   {user_id: {'YYYY-MM-DD': [건수, 행 수, 마지막 생성 시각]}}
+#   recent {user_id: deque(최근 이력)}
+_index = {'source': None, 'offset': 0, 'days': {}, 'recent': {}}
+
+
+def append_entry(log_dir, entry):
+    """이력 1건을 active.log 끝에 한 줄로 추가 (파일 크기와 무관한 O(1))"""
+    line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+
+    with _lock:
+        os.makedirs(log_dir, exist_ok=True)
+        active_path = os.path.join(log_dir, ACTIVE_LOG)
+        # O_APPEND 한 번의 write 라 다른 프로세스의 추가와 줄이 섞이지 않음
+        fd = os.open(active_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+            size = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+
+        if size > HISTORY_LOG_MAX_BYTES:
+            _rotate(log_dir)
+
+
+def import_entries(log_dir, entries):
+    """기존 이력 목록을 로그로 한 번에 옮김 (로그를 처음 만들 때)"""
+    os.makedirs(log_dir, exist_ok=True)
+    with _lock, open(os.path.join(log_dir, ACTIVE_LOG), "a", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(
+                {k: entry.get(k) for k in ("user_id", "file_name", "product_count", "created_at")},
+                ensure_ascii=False
+            ) + "\n")
+
+
+def log_exists(log_dir):
+    """로그 폴더가 이미 만들어졌는지"""
+    return os.path.isdir(log_dir)
+
+
+def get_stats(log_dir, user_id=None, start=None, end=None):
+    """기간 내 사용자별 생성 건수 / 행 합계 / 마지막 생성 시각
+
+    start, end 는 date 또는 'YYYY-MM-DD' (양 끝 포함, None 이면 제한 없음).
+    반환값: {user_id: {'count', 'product_count', 'last_created_at'}} - user_id 를 주면 그 사용자 항목만
+    """
+    start = _day(start)
+    end = _day(end)
+
+    with _lock:
+        _refresh_index(log_dir)
+        users = [user_id] if user_id is not None else list(_index['days'])
+
+        stats = {}
+        for uid in users:
+            count = rows = 0
+            last = None
+            for day, (day_count, day_rows, day_last) in _index['days'].get(uid, {}).items():
+                if (start and day < start) or (end and day > end):
+                    continue
+                count += day_count
+                rows += day_rows
+                last = day_last if last is None or day_last > last else last
+            if count:
+                stats[uid] = {'count': count, 'product_count': rows, 'last_created_at': last}
+
+    if user_id is not None:
+        return stats.get(user_id, {'count': 0, 'product_count': 0, 'last_created_at': None})
+    return stats
+
+
+def get_recent_entries(log_dir, user_id, limit=HISTORY_RECENT_ENTRIES):
+    """사용자의 최근 이력 (최신순) - 압축된 구간은 집계만 남으므로 포함되지 않음"""
+    with _lock:
+        _refresh_index(log_dir)
+        recent = list(_index['recent'].get(user_id, ()))
+    return recent[::-1][:limit]
+
+
+def compact(log_dir, keep_segments=HISTORY_LOG_KEEP_SEGMENTS):
+    """회전 로그가 keep_segments 개를 넘으면 오래된 것부터 summary.json 집계에 합치고 삭제 - 합친 로그 수 반환"""
+    with _lock:
+        return _compact(log_dir, keep_segments)
+
+
+def _compact(log_dir, keep_segments):
+    segments = _segment_paths(log_dir)
+    folded = segments[:max(0, len(segments) - keep_segments)]
+    if not folded:
+        return 0
+
+    days = {}
+    _load_summary(log_dir, days)
+    for path in folded:
+        with open(path, "rb") as f:
+            for line in f:
+                _add_line(line, days, None)
+
+    summary_path = os.path.join(log_dir, SUMMARY_FILE)
+    tmp_path = f"{summary_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(
+            [[uid, day, *values] for uid, user_days in days.items() for day, values in user_days.items()],
+            f, ensure_ascii=False
+        )
+    os.replace(tmp_path, summary_path)
+
+    for path in folded:
+        os.remove(path)
+    return len(folded)
+
+
+def _rotate(log_dir):
+    """active.log 를 회전 로그로 옮기고 오래된 회전 로그 압축 (_lock 안에서 호출)"""
+    active_path = os.path.join(log_dir, ACTIVE_LOG)
+    os.replace(active_path, os.path.join(log_dir, f"{SEGMENT_PREFIX}{time.time_ns()}.log"))
+    _compact(log_dir, HISTORY_LOG_KEEP_SEGMENTS)
+
+
+def _refresh_index(log_dir):
+    """로그가 늘어났으면 늘어난 부분만 색인에 반영, 회전/압축되었으면 처음부터 다시 만듦 (_lock 안에서 호출)"""
+    active_path = os.path.join(log_dir, ACTIVE_LOG)
+    try:
+        stat = os.stat(active_path)
+        active = (stat.st_ino, stat.st_dev)
+        size = stat.st_size
+    except FileNotFoundError:
+        active, size = None, 0
+
+    source = (os.path.abspath(log_dir), active, tuple(_segment_paths(log_dir)), _summary_mtime(log_dir))
+    if source != _index['source'] or size < _index['offset']:
+        _index.update(source=source, offset=0, days={}, recent={})
+        _load_summary(log_dir, _index['days'])
+        for path in _segment_paths(log_dir):
+            with open(path, "rb") as f:
+                for line in f:
+                    _add_line(line, _index['days'], _index['recent'])
+
+    if active is None or size == _index['offset']:
+        return
+
+    with open(active_path, "rb") as f:
+        f.seek(_index['offset'])
+        data = f.read(size - _index['offset'])
+
+    # 다른 프로세스가 쓰는 중인 마지막 줄은 다음 조회에서 읽음
+    complete = data.rfind(b"\n") + 1
+    for line in data[:complete].splitlines():
+        _add_line(line, _index['days'], _index['recent'])
+    _index['offset'] += complete
+
+
+def _add_line(line, days, recent):
+    """로그 한 줄을 날짜별 집계(와 최근 이력)에 반영"""
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return
+
+    user_id = entry.get('user_id')
+    created_at = entry.get('created_at') or ''
+    day = days.setdefault(user_id, {}).setdefault(created_at[:10], [0, 0, created_at])
+    day[0] += 1
+    day[1] += int(entry.get('product_count') or 0)
+    if created_at > day[2]:
+        day[2] = created_at
+
+    if recent is not None:
+        recent.setdefault(user_id, deque(maxlen=HISTORY_RECENT_ENTRIES)).append(entry)
+
+
+def _load_summary(log_dir, days):
+    """summary.json 집계를 색인에 더함"""
+    try:
+        with open(os.path.join(log_dir, SUMMARY_FILE), "r", encoding="utf-8") as f:
+            rows = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return
+
+    for user_id, day, count, product_count, last in rows:
+        values = days.setdefault(user_id, {}).setdefault(day, [0, 0, last])
+        values[0] += count
+        values[1] += product_count
+        if last > values[2]:
+            values[2] = last
+
+
+def _segment_paths(log_dir):
+    """회전 로그 경로 (오래된 순)"""
+    if not os.path.isdir(log_dir):
+        return []
+    names = [n for n in os.listdir(log_dir) if n.startswith(SEGMENT_PREFIX) and n.endswith(".log")]
+    names.sort(key=lambda n: int(n[len(SEGMENT_PREFIX):-len(".log")]))
+    return [os.path.join(log_dir, n) for n in names]
+
+
+def _summary_mtime(log_dir):
+    try:
+        return os.stat(os.path.join(log_dir, SUMMARY_FILE)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _day(value):
+    """date / datetime / 문자열을 'YYYY-MM-DD' 로"""
+    if value is None:
+        return None
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()[:10]
+    return str(value)[:10]
@@ -0,0 +1,170 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+from database import DATA_DIR
+from tracing import log, count
+
+# 이미지 확인 결과 캐시 (URL 별 상태, 확인 시각)
+IMAGE_CACHE_FILE = os.path.join(DATA_DIR, "image_cache.db")
+
+# 있는 이미지는 오래, 없는 이미지는 곧 다시 올라올 수 있으므로 짧게 캐시
+IMAGE_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+IMAGE_MISSING_TTL_SECONDS = 6 * 60 * 60
+
+# 전체 동시 요청 수 / 호스트별 동시 요청 수 (이미지 서버 과부하 방지)
+IMAGE_CHECK_WORKERS = 32
+IMAGE_CHECK_PER_HOST = 8
+
+# (연결, 응답) 대기 시간(초)
+IMAGE_CHECK_TIMEOUT = (3.05, 10)
+
+# 확인 결과 상태
+STATUS_OK = 'ok'
+STATUS_MISSING = 'missing'
+STATUS_ERROR = 'error'
+
+# 없는 이미지로 판단하는 HTTP 상태 (그 외 4xx/5xx 와 연결 오류는 확인 실패로 보고 캐시하지 않음)
+MISSING_STATUS_CODES = {404, 410}
+
+# 자식 행 사진 값 "옵션=URL" 에서 URL 시작 위치
+_URL_START = re.compile(r'[A-Za-z][A-Za-z0-9+.-]*://')
+
+
+def split_photo_urls(photo_values):
+    """Item photo URL 컬럼 값을 (행 위치 배열, URL 배열) 로 펼침
+
+    부모 행은 'url1|url2|...', 자식 행은 '옵션=url' 또는 'url' 형식이다.
+    """
+    values = pd.Series(np.asarray(photo_values, dtype=object), dtype=object)
+    pieces = values[values != ''].str.split('|').explode()
+    pieces = pieces[pieces.notna() & (pieces != '')]
+
+    urls = pieces.map(_strip_option)
+    return pieces.index.to_numpy(), urls.to_numpy(dtype=object)
+
+
+def verify_image_urls(urls, cache_file=IMAGE_CACHE_FILE, session=None):
+    """이미지 URL 들을 HEAD 요청으로 확인 - {url: 'ok' / 'missing' / 'error'}
+
+    캐시에 TTL 이내 결과가 있는 URL 은 요청하지 않는다.
+    호스트별 동시 요청 수를 IMAGE_CHECK_PER_HOST 로 제한하고 keep-alive 연결을 재사용한다.
+    """
+    unique_urls = list(dict.fromkeys(urls))
+    if not unique_urls:
+        return {}
+
+    conn = _open_cache(cache_file)
+    try:
+        results = _cached_results(conn, unique_urls)
+        pending = [url for url in unique_urls if url not in results]
+        count('cache_hit', len(results))
+        count('checked', len(pending))
+
+        if pending:
+            own_session = session is None
+            session = session or _create_session()
+            host_limits = {}
+            host_lock = threading.Lock()
+
+            def check(url):
+                host = urlsplit(url).netloc
+                with host_lock:
+                    limit = host_limits.setdefault(host, threading.BoundedSemaphore(IMAGE_CHECK_PER_HOST))
+                with limit:
+                    return _check_url(session, url)
+
+            try:
+                with ThreadPoolExecutor(max_workers=IMAGE_CHECK_WORKERS) as pool:
+                    checked = list(pool.map(check, pending))
+            finally:
+                if own_session:
+                    session.close()
+
+            now = time.time()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO images (url, status, http_status, checked_at) VALUES (?, ?, ?, ?)",
+                    [(url, status, code, now) for url, (status, code) in zip(pending, checked)
+                     if status != STATUS_ERROR]
+                )
+            results.update((url, status) for url, (status, _) in zip(pending, checked))
+
+            counts = pd.Series([status for status, _ in checked]).value_counts().to_dict()
+            log("이미지", f"{len(unique_urls)}개 중 {len(pending)}개 확인: {counts}", **counts)
+    finally:
+        conn.close()
+
+    return results
+
+
+def _strip_option(piece):
+    """'옵션=URL' 에서 URL 부분만 (스킴이 없으면 그대로)"""
+    match = _URL_START.search(piece)
+    return piece[match.start():] if match else piece
+
+
+def _create_session():
+    """호스트별 keep-alive 연결 풀을 가진 세션"""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=IMAGE_CHECK_WORKERS, pool_maxsize=IMAGE_CHECK_PER_HOST)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def _check_url(session, url):
+    """URL 1개 확인 - (상태, HTTP 상태 코드)"""
+    try:
+        response = session.head(url, allow_redirects=True, timeout=IMAGE_CHECK_TIMEOUT)
+        if response.status_code in (405, 501):
+            # HEAD 를 지원하지 않는 서버는 본문을 받지 않는 GET 으로 확인
+            response = session.get(url, allow_redirects=True, timeout=IMAGE_CHECK_TIMEOUT, stream=True)
+            response.close()
+    except Exception:
+        return STATUS_ERROR, None
+
+    code = response.status_code
+    if code < 400:
+        return STATUS_OK, code
+    if code in MISSING_STATUS_CODES:
+        return STATUS_MISSING, code
+    return STATUS_ERROR, code
+
+
+def _open_cache(cache_file):
+    os.makedirs(os.path.dirname(cache_file) or ".", exist_ok=True)
+    conn = sqlite3.connect(cache_file, timeout=5.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS images ("
+        "url TEXT PRIMARY KEY, status TEXT, http_status INTEGER, checked_at REAL)"
+    )
+    return conn
+
+
+def _cached_results(conn, urls, batch_size=900):
+    """TTL 이내 캐시 결과 {url: 상태} (SQLite 변수 개수 제한 때문에 나눠 조회)"""
+    now = time.time()
+    results = {}
+    for start in range(0, len(urls), batch_size):
+        batch = urls[start:start + batch_size]
+        rows = conn.execute(
+            f"SELECT url, status, checked_at FROM images WHERE url IN ({','.join('?' * len(batch))})",
+            batch
+        ).fetchall()
+        for url, status, checked_at in rows:
+            ttl = IMAGE_CACHE_TTL_SECONDS if status == STATUS_OK else IMAGE_MISSING_TTL_SECONDS
+            if now - checked_at <= ttl:
+                results[url] = status
+    return results
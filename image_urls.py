@@ -0,0 +1,197 @@
+import re
+import string
+
+import numpy as np
+import pandas as pd
+
+# 이미지 URL 패턴에서 쓸 수 있는 자리표시자 (여러 번, 여러 개 사용 가능)
+#   {sku}       - 이미지 SKU (부모 갤러리는 PSKU + 접미사)
+#   {psku}      - 리스팅 PSKU
+#   {shop_code} - 프로필 샵코드
+URL_FIELDS = ('sku', 'psku', 'shop_code')
+
+# 부모 갤러리 접미사 목록 기본값 - {n} 은 1..INDEX 로 펼쳐지고 {shop_code} 는 샵코드로 치환
+#   샵코드가 있으면 PSKU_C_샵코드, PSKU_D1..D{INDEX}, 없으면 PSKU, PSKU_D1..D{INDEX}
+DEFAULT_SHOP_SUFFIXES = ('_C_{shop_code}', '_D{n}')
+DEFAULT_PLAIN_SUFFIXES = ('', '_D{n}')
+
+_NON_DIGIT = re.compile(r'[^\d]')
+
+# 컴파일된 URL 생성기 캐시 {(도메인, 패턴, 샵코드, 접미사): 생성기}
+_builder_cache = {}
+BUILDER_CACHE_SIZE = 64
+
+
+def get_image_url_builder(user):
+    """프로필의 이미지 도메인 / URL 패턴 / 샵코드 / 갤러리 접미사를 한 번 컴파일한 생성기 조회
+
+    반환값(dict):
+        enabled  - 이미지 도메인이 설정되어 있는지 (아니면 모든 URL 이 빈 문자열)
+        pattern  - 원본 URL 패턴
+        segments - 도메인과 고정 문자열을 미리 합친 조각 목록 (홀수 위치가 자리표시자 이름)
+                   변환 지정자({sku!r}, {sku:>8} 등)가 있는 패턴은 None - 건별 str.format 으로 생성
+        suffixes - 부모 갤러리 접미사 목록 [(접미사, {n} 반복 여부)]
+    """
+    domain = user.get('image_domain') or ''
+    pattern = user.get('image_url_pattern', '/{sku}.jpg')
+    shop_code = str(user.get('shop_code', '')).strip()
+    suffixes = tuple(user.get('image_suffixes') or ())
+    key = (domain, pattern, shop_code, suffixes)
+
+    builder = _builder_cache.get(key)
+    if builder is None:
+        if not suffixes:
+            suffixes = DEFAULT_SHOP_SUFFIXES if shop_code else DEFAULT_PLAIN_SUFFIXES
+        base = domain.rstrip('/')
+        builder = {
+            'enabled': bool(domain),
+            'domain': base,
+            'pattern': pattern,
+            'shop_code': shop_code,
+            'segments': _compile_pattern(base, pattern, shop_code),
+            'suffixes': [
+                (suffix.replace('{shop_code}', shop_code), '{n}' in suffix) for suffix in suffixes
+            ],
+        }
+        if len(_builder_cache) >= BUILDER_CACHE_SIZE:
+            _builder_cache.clear()
+        _builder_cache[key] = builder
+
+    return builder
+
+
+def build_image_urls(builder, sku, psku=None):
+    """SKU 배열의 이미지 URL 배열 (빈 SKU 는 빈 문자열)"""
+    sku = np.asarray(sku, dtype=object)
+    psku = sku if psku is None else np.asarray(psku, dtype=object)
+    result = np.full(len(sku), '', dtype=object)
+    if not builder['enabled']:
+        return result
+
+    rows = np.flatnonzero(sku != '')
+    if len(rows):
+        result[rows] = _format_urls(builder, sku[rows], psku[rows])
+    return result
+
+
+def build_child_image_urls(builder, sku, option, psku=None):
+    """자식 행 사진 값 배열 - OPTION 이 있으면 'OPTION=URL', 없으면 URL"""
+    urls = build_image_urls(builder, sku, psku)
+    option = np.asarray(option, dtype=object)
+
+    labeled = (option != '') & (urls != '')
+    urls[labeled] = option[labeled] + '=' + urls[labeled]
+    return urls
+
+
+def build_parent_image_urls(builder, psku, index_values):
+    """부모 행 갤러리 사진 값 배열 - 접미사 목록 순서대로 'url1|url2|...'
+
+    {n} 이 들어간 접미사는 INDEX 값(숫자만 추출, 없으면 0)만큼 1부터 펼친다.
+    """
+    psku = np.asarray(psku, dtype=object)
+    result = np.full(len(psku), '', dtype=object)
+    if not builder['enabled'] or not builder['suffixes']:
+        return result
+
+    rows = np.flatnonzero(psku != '')
+    if len(rows) == 0:
+        return result
+    index_count = parse_index_counts(np.asarray(index_values, dtype=object)[rows])
+
+    # 접미사별로 (부모 번호, 접미사 문자열) 을 만든 뒤 부모 번호 순으로 안정 정렬
+    owners = []
+    pieces = []
+    for suffix, repeats in builder['suffixes']:
+        if not repeats:
+            owners.append(np.arange(len(rows)))
+            pieces.append(np.full(len(rows), suffix, dtype=object))
+            continue
+
+        counts = index_count
+        total = int(counts.sum())
+        owner = np.repeat(np.arange(len(rows)), counts)
+        # 부모 안에서의 순번 1..INDEX
+        rank = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        numbered = np.array(
+            [suffix.replace('{n}', str(n)) for n in range(1, int(counts.max(initial=0)) + 1)],
+            dtype=object
+        )
+        owners.append(owner)
+        pieces.append(numbered[rank])
+
+    owner = np.concatenate(owners)
+    order = np.argsort(owner, kind='stable')
+    owner = owner[order]
+    item_psku = psku[rows][owner]
+    urls = _format_urls(builder, item_psku + np.concatenate(pieces)[order], item_psku)
+
+    # 빈 URL 은 갤러리에서 제외
+    nonempty = urls != ''
+    owner = owner[nonempty]
+    urls = urls[nonempty]
+    if len(urls) == 0:
+        return result
+
+    # 부모별 연속 구간을 '|' 로 연결 (구간 첫 URL 외에는 앞에 구분자)
+    starts = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+    separated = '|' + urls
+    separated[starts] = urls[starts]
+    result[rows[owner[starts]]] = np.add.reduceat(separated, starts)
+    return result
+
+
+def parse_index_counts(index_values):
+    """INDEX 값 배열에서 숫자만 추출한 추가 이미지 수 (숫자가 없으면 0)"""
+    # INDEX 는 종류가 적으므로 고유값만 변환
+    codes, uniques = pd.factorize(pd.Series(index_values, dtype=object), sort=False, use_na_sentinel=False)
+
+    counts = np.zeros(len(uniques), dtype=np.int64)
+    for i, value in enumerate(uniques):
+        try:
+            digits = _NON_DIGIT.sub('', str(value)) if value else ''
+            counts[i] = int(digits) if digits else 0
+        except ValueError:
+            counts[i] = 0
+    return counts[codes]
+
+
+def _compile_pattern(domain, pattern, shop_code):
+    """도메인 + URL 패턴을 고정 문자열 / 자리표시자 조각으로 나눔 - 단순 자리표시자가 아니면 None"""
+    try:
+        parsed = list(string.Formatter().parse(pattern))
+    except ValueError:
+        return None
+
+    segments = [domain]
+    for literal, field, format_spec, conversion in parsed:
+        segments[-1] += literal
+        if field is None:
+            continue
+        if field not in URL_FIELDS or format_spec or conversion:
+            return None
+        if field == 'shop_code':
+            segments[-1] += shop_code
+        else:
+            segments.extend([field, ''])
+    return segments
+
+
+def _format_urls(builder, sku, psku):
+    """비어 있지 않은 SKU 배열의 URL - 조각별 배열 덧셈 (조각 수만큼만 반복)"""
+    segments = builder['segments']
+    if segments is None:
+        pattern = builder['pattern']
+        shop_code = builder['shop_code']
+        return np.array(
+            [builder['domain'] + pattern.format(sku=s, psku=p, shop_code=shop_code) for s, p in zip(sku, psku)],
+            dtype=object
+        )
+
+    values = {'sku': sku, 'psku': psku}
+    urls = np.full(len(sku), segments[0], dtype=object)
+    for i in range(1, len(segments), 2):
+        urls = urls + values[segments[i]]
+        if segments[i + 1]:
+            urls = urls + segments[i + 1]
+    return urls
@@ -0,0 +1,165 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from database import DATA_DIR
+
+# 환율표 {통화: 1 단위의 USD 환산값} - 시트 PRICE 통화를 출력 통화(USD)로 바꿀 때 사용
+#   예) {"KRW": 0.00072, "JPY": 0.0067}
+FX_RATES_FILE = os.path.join(DATA_DIR, "fx_rates.json")
+BASE_CURRENCY = 'USD'
+
+# 가격 규칙 (프로필 필드)
+#   price_currency - 시트 PRICE 통화 (기본 USD, 다른 통화는 환율표로 변환)
+#   price_rules    - 마크업 규칙 목록, 위에서부터 처음 맞는 규칙 하나만 적용
+#                    [{category_ids: [...], brands: [...], markup_percent: 20, markup_amount: 1.5}]
+#                    category_ids / brands 를 비우면 모든 상품에 맞음 (브랜드는 대소문자 무시)
+#   price_ending   - 심리적 가격 끝자리 (예: 0.99 → 12.30 은 12.99, 13.00 은 13.99), 비우면 그대로
+#   min_price / max_price - 최종 가격 하한 / 상한 (끝자리 적용 후), 비우면 제한 없음
+
+_PRICE_TEXT = r'\d+\.?\d*|\.\d+'
+
+
+def load_fx_rates():
+    """환율표 읽기 - 파일이 없으면 USD 만 (1.0)"""
+    rates = {BASE_CURRENCY: 1.0}
+    if os.path.exists(FX_RATES_FILE):
+        with open(FX_RATES_FILE, "r", encoding="utf-8") as f:
+            rates.update({currency.upper(): float(rate) for currency, rate in json.load(f).items()})
+    return rates
+
+
+def get_fx_rate(source, target=BASE_CURRENCY, rates=None):
+    """source 통화 1 단위의 target 통화 환산값"""
+    rates = load_fx_rates() if rates is None else rates
+    source, target = source.upper(), target.upper()
+    for currency in (source, target):
+        if currency not in rates:
+            raise Exception(f"환율표({FX_RATES_FILE})에 {currency} 환율이 없습니다.")
+    return rates[source] / rates[target]
+
+
+def get_pricing_rules(user, rates=None):
+    """프로필의 가격 규칙을 적용하기 좋은 형태로 정리
+
+    반환값(dict):
+        enabled  - 적용할 규칙이 하나라도 있는지 (아니면 시트 가격 그대로)
+        currency - 시트 PRICE 통화 / fx_rate - USD 환산 배율
+        rules    - [{category_ids, brands, factor, amount}] (factor = 1 + markup_percent / 100)
+        ending / min_price / max_price - 없으면 None
+    """
+    currency = (user.get('price_currency') or BASE_CURRENCY).upper()
+    fx_rate = get_fx_rate(currency, BASE_CURRENCY, rates) if currency != BASE_CURRENCY else 1.0
+
+    rules = []
+    for rule in user.get('price_rules') or []:
+        rules.append({
+            'category_ids': sorted({str(value).strip() for value in rule.get('category_ids') or []}),
+            'brands': sorted({str(value).strip().upper() for value in rule.get('brands') or []}),
+            'factor': 1 + (_optional_float(rule.get('markup_percent')) or 0) / 100,
+            'amount': _optional_float(rule.get('markup_amount')) or 0,
+        })
+
+    ending = _optional_float(user.get('price_ending'))
+    if ending is not None and not 0 <= ending < 1:
+        raise Exception(f"가격 끝자리는 0 이상 1 미만이어야 합니다: {ending}")
+
+    pricing = {
+        'currency': currency,
+        'fx_rate': fx_rate,
+        'rules': rules,
+        'ending': ending,
+        'min_price': _optional_float(user.get('min_price')),
+        'max_price': _optional_float(user.get('max_price')),
+    }
+    pricing['enabled'] = bool(
+        fx_rate != 1.0 or rules or ending is not None
+        or pricing['min_price'] is not None or pricing['max_price'] is not None
+    )
+    return pricing
+
+
+def parse_price_column(price_values):
+    """가격 문자열 배열에서 숫자만 추출해 float 배열로 - 숫자가 없거나 형식이 맞지 않으면 NaN"""
+    values = pd.Series(np.asarray(price_values, dtype=object))
+    cleaned = values.str.replace(r'[^\d.]', '', regex=True)
+    parsable = cleaned.str.fullmatch(_PRICE_TEXT).to_numpy(dtype=bool)
+
+    numbers = np.full(len(values), np.nan)
+    if parsable.any():
+        numbers[parsable] = cleaned[parsable].to_numpy(dtype=object).astype(float)
+    return numbers
+
+
+def format_price_column(numbers):
+    """float 가격 배열 → '12.34' 문자열 object 배열 (NaN 은 빈 문자열)"""
+    numbers = np.asarray(numbers, dtype=float)
+    result = np.full(len(numbers), '', dtype=object)
+    valid = ~np.isnan(numbers)
+    if valid.any():
+        # 파이썬 float 목록 포맷이 np.char.mod 보다 빠름 (50만 행 기준 약 2배)
+        result[valid] = ['%.2f' % number for number in numbers[valid].tolist()]
+    return result
+
+
+def apply_pricing_rules(prices, category_ids, brands, pricing):
+    """가격 배열 전체에 환율 → 마크업 규칙 → 끝자리 → 하한/상한 순으로 적용 - 모두 컬럼 단위 연산
+
+    category_ids / brands 는 각 가격 행의 카테고리 ID / 브랜드 (리스팅 단위 규칙이면 부모 값을 펼쳐서 넘김).
+    규칙 범위 비교는 고유값 목록에서 한 번만 하고 행에는 코드로 펼치므로 규칙 수 × 고유값 수만큼만 문자열을 비교한다.
+    """
+    prices = np.asarray(prices, dtype=float)
+    if not pricing['enabled'] or len(prices) == 0:
+        return prices
+
+    prices = prices * pricing['fx_rate']
+
+    if pricing['rules']:
+        category_codes, category_values = pd.factorize(np.asarray(category_ids, dtype=object), sort=False)
+        brand_codes, brand_values = pd.factorize(
+            pd.Series(np.asarray(brands, dtype=object)).str.strip().str.upper(), sort=False
+        )
+        category_values = np.asarray(category_values, dtype=object)
+        brand_values = np.asarray(brand_values, dtype=object)
+
+        # 행마다 처음 맞는 규칙 번호 (-1 이면 맞는 규칙 없음)
+        matched = np.full(len(prices), -1, dtype=np.int64)
+        for number, rule in enumerate(pricing['rules']):
+            scope = matched < 0
+            if rule['category_ids']:
+                scope &= _in_values(category_codes, category_values, rule['category_ids'])
+            if rule['brands']:
+                scope &= _in_values(brand_codes, brand_values, rule['brands'])
+            matched[scope] = number
+
+        factors = np.array([rule['factor'] for rule in pricing['rules']] + [1.0])
+        amounts = np.array([rule['amount'] for rule in pricing['rules']] + [0.0])
+        # matched=-1 은 마지막 (1배, +0) 항목을 가리킴
+        prices = prices * factors[matched] + amounts[matched]
+
+    # 센트 단위로 맞춘 뒤 끝자리 / 제한 적용 (부동소수 오차로 12.99 가 13.99 가 되지 않도록)
+    prices = np.round(prices, 2)
+    if pricing['ending'] is not None:
+        prices = np.ceil(np.round(prices - pricing['ending'], 2)) + pricing['ending']
+    if pricing['min_price'] is not None or pricing['max_price'] is not None:
+        prices = np.clip(prices, pricing['min_price'], pricing['max_price'])
+    return prices
+
+
+def _in_values(codes, uniques, targets):
+    """factorize 코드 배열에서 targets 에 들어 있는 값의 행 마스크"""
+    lookup = np.append(np.isin(uniques, targets), False)
+    # 코드 -1 (결측) 은 마지막 False 항목을 가리킴
+    return lookup[codes]
+
+
+def _optional_float(value):
+    """비어 있으면 None, 아니면 float"""
+    if value is None or str(value).strip() == '':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise Exception(f"가격 설정 값이 숫자가 아닙니다: {value}")
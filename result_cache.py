@@ -0,0 +1,264 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import pickle
+import shutil
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from database import DATA_DIR
+from tracing import log
+
+# 생성 결과 캐시 (입력 내용 해시별 하위 폴더 - 결과 파일 + 집계/검증 결과)
+RESULT_CACHE_DIR = os.path.join(DATA_DIR, "result_cache")
+
+# 디스크 캐시 용량 상한 - 넘으면 오래 사용하지 않은 결과부터 삭제
+RESULT_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+# 메모리 캐시 용량 상한 (결과 파일 + 검증 결과 / 지문 / 미리보기 크기 합) - 이보다 큰 결과는 디스크에만 보관
+RESULT_MEMORY_MAX_BYTES = 256 * 1024 * 1024
+
+# 결과에 영향을 주지 않는 프로필 필드 (원본 위치는 내용 해시로 대신함)
+RESULT_KEY_EXCLUDED_FIELDS = {'id', 'google_sheet_id', 'source_type', 'source_path', 'category_path'}
+
+# 출력 내용을 결정하는 모듈 - 소스가 바뀌면(배포) 생성기 버전이 바뀌어 이전 결과를 쓰지 않음
+# (catalog_sources 는 입력 쪽이라 내용 해시에 이미 반영됨)
+GENERATOR_MODULES = [
+    'excel_generator', 'image_urls', 'descriptions', 'pricing', 'sites', 'validation', 'chunked_output', 'site_output',
+]
+
+OUTPUT_FILE = "output.bin"
+RESULT_FILE = "result.pkl"
+META_FILE = "meta.json"
+
+# 결과 dict 에서 결과 파일 외에 저장하는 항목
+STORED_FIELDS = ['output_format', 'mime_type', 'parts', 'findings', 'counts', 'delta', 'fingerprints', 'preview']
+
+# 메모리 크기 계산에서 재귀하지 않는 값 타입
+_SCALAR_TYPES = {str, bytes, int, float, bool, type(None)}
+
+_memory = OrderedDict()
+_memory_bytes = 0
+_memory_lock = threading.Lock()
+_stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0}
+_generator_version = None
+
+
+def build_result_key(bulk_df, category_map, user, options, previous_fingerprints=None):
+    """생성 결과 캐시 키 - Bulk/CAT 내용, 프로필 필드, 생성 옵션, 변경분 기준 지문, 생성기 버전의 해시"""
+    digest = hashlib.sha256()
+    digest.update(get_generator_version().encode("utf-8"))
+
+    # Bulk: 컬럼명 + 행 번호(인덱스) 포함 값 해시 - 검증 결과의 시트 행 번호도 결과의 일부
+    digest.update(json.dumps(list(bulk_df.columns), ensure_ascii=False).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(bulk_df.astype(object), index=True).to_numpy().tobytes())
+
+    profile = {key: value for key, value in user.items() if key not in RESULT_KEY_EXCLUDED_FIELDS}
+    for value in (category_map, profile, options, previous_fingerprints):
+        digest.update(json.dumps(value, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def get_generator_version():
+    """출력 모듈 소스의 해시 (프로세스당 한 번 계산)"""
+    global _generator_version
+    if _generator_version is None:
+        digest = hashlib.sha256()
+        source_dir = os.path.dirname(os.path.abspath(__file__))
+        for name in GENERATOR_MODULES:
+            with open(os.path.join(source_dir, f"{name}.py"), "rb") as f:
+                digest.update(f.read())
+        _generator_version = digest.hexdigest()[:16]
+    return _generator_version
+
+
+def load_result(key):
+    """캐시된 생성 결과 - 메모리 → 디스크 순으로 찾고, 없으면 None
+
+    반환값은 write_ebay_output 결과와 같은 형식이며 output 은 새 파일 객체(처음 위치)다.
+    """
+    with _memory_lock:
+        entry = _memory.get(key)
+        if entry is not None:
+            _memory.move_to_end(key)
+            _stats['memory_hits'] += 1
+            return _restore(entry['result'], io.BytesIO(entry['output']), 'memory')
+
+    entry_dir = os.path.join(RESULT_CACHE_DIR, key)
+    output_path = os.path.join(entry_dir, OUTPUT_FILE)
+    try:
+        with open(os.path.join(entry_dir, RESULT_FILE), "rb") as f:
+            stored = pickle.load(f)
+        size = os.path.getsize(output_path)
+        if size <= RESULT_MEMORY_MAX_BYTES:
+            with open(output_path, "rb") as f:
+                output_bytes = f.read()
+            output = io.BytesIO(output_bytes)
+        else:
+            # 메모리 캐시에 넣지 않는 큰 결과는 파일 그대로 반환
+            output_bytes = None
+            output = open(output_path, "rb")
+        _touch(entry_dir)
+    except FileNotFoundError:
+        with _memory_lock:
+            _stats['misses'] += 1
+        return None
+    except Exception as e:
+        log("캐시", f"생성 결과 캐시 읽기 실패: {str(e)}", level=logging.WARNING)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        with _memory_lock:
+            _stats['misses'] += 1
+        return None
+
+    with _memory_lock:
+        _stats['disk_hits'] += 1
+    if output_bytes is not None:
+        _remember(key, stored, output_bytes)
+    return _restore(stored, output, 'disk')
+
+
+def save_result(key, result):
+    """생성 결과를 디스크와 (작으면) 메모리에 저장 후 용량 정리 - result['output'] 은 처음 위치로 되감아 둠"""
+    stored = {field: result[field] for field in STORED_FIELDS}
+    output = result['output']
+    output.seek(0, os.SEEK_END)
+    size = output.tell()
+    output.seek(0)
+
+    entry_dir = os.path.join(RESULT_CACHE_DIR, key)
+    try:
+        os.makedirs(entry_dir, exist_ok=True)
+        output_path = os.path.join(entry_dir, OUTPUT_FILE)
+        tmp_path = _tmp_path(output_path)
+        with open(tmp_path, "wb") as f:
+            shutil.copyfileobj(output, f)
+        os.replace(tmp_path, output_path)
+        _write_atomic(os.path.join(entry_dir, RESULT_FILE), pickle.dumps(stored, protocol=pickle.HIGHEST_PROTOCOL))
+        _touch(entry_dir)
+    except Exception as e:
+        log("캐시", f"생성 결과 캐시 저장 실패: {str(e)}", level=logging.WARNING)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+    finally:
+        output.seek(0)
+
+    if size <= RESULT_MEMORY_MAX_BYTES:
+        _remember(key, stored, output.read())
+        output.seek(0)
+    with _memory_lock:
+        _stats['stores'] += 1
+    evict_results()
+
+
+def get_result_cache_stats():
+    """프로세스 시작 후 캐시 적중 / 실패 / 저장 횟수와 메모리 사용량"""
+    with _memory_lock:
+        return dict(_stats, memory_entries=len(_memory), memory_bytes=_memory_bytes)
+
+
+def clear_result_cache():
+    """메모리 / 디스크 캐시 모두 삭제"""
+    global _memory_bytes
+    with _memory_lock:
+        _memory.clear()
+        _memory_bytes = 0
+    shutil.rmtree(RESULT_CACHE_DIR, ignore_errors=True)
+
+
+def evict_results():
+    """디스크 캐시 전체 용량이 상한을 넘으면 마지막 사용 시각이 오래된 결과부터 삭제"""
+    if not os.path.isdir(RESULT_CACHE_DIR):
+        return
+
+    entries = []
+    for name in os.listdir(RESULT_CACHE_DIR):
+        entry_dir = os.path.join(RESULT_CACHE_DIR, name)
+        if not os.path.isdir(entry_dir):
+            continue
+        try:
+            with open(os.path.join(entry_dir, META_FILE), "r", encoding="utf-8") as f:
+                last_used_at = json.load(f).get("last_used_at", 0)
+            size = sum(os.path.getsize(os.path.join(entry_dir, f)) for f in os.listdir(entry_dir))
+        except (OSError, ValueError):
+            # 저장 중이거나 깨진 항목
+            continue
+        entries.append((last_used_at, size, entry_dir))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, entry_dir in sorted(entries):
+        if total <= RESULT_CACHE_MAX_BYTES:
+            break
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        total -= size
+
+
+def _remember(key, stored, output_bytes):
+    """메모리 캐시에 추가 - 항목 크기 합이 상한을 넘으면 LRU 순으로 제거"""
+    global _memory_bytes
+
+    size = len(output_bytes) + sum(_value_size(value) for value in stored.values())
+    with _memory_lock:
+        previous = _memory.pop(key, None)
+        if previous is not None:
+            _memory_bytes -= previous['bytes']
+        if size > RESULT_MEMORY_MAX_BYTES:
+            return
+        _memory[key] = {'result': stored, 'output': output_bytes, 'bytes': size}
+        _memory_bytes += size
+        while _memory_bytes > RESULT_MEMORY_MAX_BYTES:
+            _, evicted = _memory.popitem(last=False)
+            _memory_bytes -= evicted['bytes']
+
+
+def _value_size(value):
+    """저장 항목의 대략적인 메모리 크기(bytes) - DataFrame 은 문자열 값까지 포함"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + _items_size(value.keys()) + _items_size(value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + _items_size(value)
+    return sys.getsizeof(value)
+
+
+def _items_size(items):
+    """컨테이너 항목 크기 합 - 문자열/숫자는 getsizeof 한 번씩, 중첩 컨테이너만 재귀"""
+    size = sum(map(sys.getsizeof, items))
+    if not set(map(type, items)) <= _SCALAR_TYPES:
+        size += sum(_value_size(item) - sys.getsizeof(item) for item in items if type(item) not in _SCALAR_TYPES)
+    return size
+
+
+def _restore(stored, output, tier):
+    """저장된 항목으로 결과 dict 구성 - 호출한 쪽이 수정해도 캐시가 바뀌지 않도록 복사"""
+    result = {
+        field: value.copy() if hasattr(value, 'copy') else value
+        for field, value in stored.items()
+    }
+    result['output'] = output
+    result['timings'] = {}
+    result['cached'] = tier
+    return result
+
+
+def _touch(entry_dir):
+    """마지막 사용 시각 갱신 (LRU 정리 기준)"""
+    meta = json.dumps({"last_used_at": time.time(), "generator_version": get_generator_version()})
+    _write_atomic(os.path.join(entry_dir, META_FILE), meta.encode("utf-8"))
+
+
+def _write_atomic(path, data):
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _tmp_path(path):
+    """동시 저장이 겹치지 않도록 프로세스/스레드별 임시 파일 경로"""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
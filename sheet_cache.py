@@ -0,0 +1,169 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+
+import pandas as pd
+
+from database import DATA_DIR
+from tracing import log
+
+# 구글시트 스냅샷 저장 위치 (시트 ID별 하위 폴더)
+SHEET_CACHE_DIR = os.path.join(DATA_DIR, "sheet_cache")
+
+# 스냅샷 유효 기간 - 리비전이 같아도 이 시간이 지나면 새로 다운로드
+SHEET_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# 전체 스냅샷 용량 상한 - 넘으면 오래 사용하지 않은 시트부터 삭제
+SHEET_CACHE_MAX_BYTES = 500 * 1024 * 1024
+
+# gspread.urls.DRIVE_FILES_API_V3_URL 과 같은 값 (gspread import 없이 사용)
+DRIVE_FILES_API_V3_URL = "https://www.googleapis.com/drive/v3/files"
+
+META_FILE = "meta.json"
+BULK_FILE = "bulk.parquet"
+
+
+def get_sheet_revision(client, sheet_id):
+    """Drive 메타데이터의 version 값 조회 (시트가 바뀔 때마다 증가) - 실패 시 None"""
+    try:
+        response = client.http_client.request(
+            "get",
+            f"{DRIVE_FILES_API_V3_URL}/{sheet_id}",
+            params={"fields": "version,modifiedTime", "supportsAllDrives": True}
+        )
+        return str(response.json()["version"])
+    except Exception as e:
+        log("캐시", f"리비전 확인 실패, 캐시 사용 안 함: {str(e)}", level=logging.WARNING)
+        return None
+
+
+def compute_content_hash(bulk_data, cat_data):
+    """Bulk/CAT 원본 값의 해시"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(bulk_data, ensure_ascii=False).encode("utf-8"))
+    digest.update(json.dumps(cat_data, ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_snapshot(sheet_id, revision):
+    """리비전이 같고 TTL 이내인 스냅샷이 있으면 (bulk_df, category_map) 반환, 없으면 None"""
+    if revision is None:
+        return None
+
+    snapshot_dir = _snapshot_dir(sheet_id)
+    meta = _read_meta(snapshot_dir)
+    if not meta or meta.get("revision") != revision:
+        return None
+    if time.time() - meta.get("fetched_at", 0) > SHEET_CACHE_TTL_SECONDS:
+        return None
+
+    try:
+        bulk_df = pd.read_parquet(os.path.join(snapshot_dir, BULK_FILE))
+    except Exception as e:
+        log("캐시", f"스냅샷 읽기 실패: {str(e)}", level=logging.WARNING)
+        return None
+
+    # parquet 는 중복/빈 컬럼명을 허용하지 않으므로 위치 기반 이름으로 저장해 두었음
+    bulk_df.columns = meta["bulk_columns"]
+
+    meta["last_used_at"] = time.time()
+    _write_meta(snapshot_dir, meta)
+
+    return bulk_df, meta["category_map"]
+
+
+def save_snapshot(sheet_id, revision, content_hash, bulk_df, category_map):
+    """다운로드한 Bulk/CAT 데이터를 스냅샷으로 저장 후 용량/TTL 정리"""
+    if revision is None:
+        return
+
+    snapshot_dir = _snapshot_dir(sheet_id)
+    os.makedirs(snapshot_dir, exist_ok=True)
+    bulk_path = os.path.join(snapshot_dir, BULK_FILE)
+
+    meta = _read_meta(snapshot_dir)
+    now = time.time()
+
+    # 리비전만 바뀌고 내용이 같으면 (서식 변경 등) 데이터 파일은 그대로 둠
+    if not (meta and meta.get("content_hash") == content_hash and os.path.exists(bulk_path)):
+        stored_df = bulk_df.copy()
+        stored_df.columns = [f"c{i}" for i in range(len(bulk_df.columns))]
+
+        tmp_path = _tmp_path(bulk_path)
+        stored_df.to_parquet(tmp_path, index=False, compression="zstd")
+        os.replace(tmp_path, bulk_path)
+
+    _write_meta(snapshot_dir, {
+        "sheet_id": sheet_id,
+        "revision": revision,
+        "content_hash": content_hash,
+        "fetched_at": now,
+        "last_used_at": now,
+        "bulk_columns": list(bulk_df.columns),
+        "category_map": category_map,
+    })
+
+    evict_snapshots()
+
+
+def evict_snapshots():
+    """TTL 이 지난 스냅샷 삭제 후, 전체 용량이 상한을 넘으면 LRU 순으로 삭제"""
+    if not os.path.isdir(SHEET_CACHE_DIR):
+        return
+
+    now = time.time()
+    entries = []
+    for name in os.listdir(SHEET_CACHE_DIR):
+        snapshot_dir = os.path.join(SHEET_CACHE_DIR, name)
+        if not os.path.isdir(snapshot_dir):
+            continue
+
+        meta = _read_meta(snapshot_dir)
+        if not meta or now - meta.get("fetched_at", 0) > SHEET_CACHE_TTL_SECONDS:
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+            continue
+
+        size = sum(
+            os.path.getsize(os.path.join(snapshot_dir, f)) for f in os.listdir(snapshot_dir)
+        )
+        entries.append((meta.get("last_used_at", 0), size, snapshot_dir))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, snapshot_dir in sorted(entries):
+        if total <= SHEET_CACHE_MAX_BYTES:
+            break
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+        total -= size
+
+
+def _snapshot_dir(sheet_id):
+    """시트 ID를 파일 시스템에 안전한 폴더명으로 변환"""
+    return os.path.join(SHEET_CACHE_DIR, re.sub(r'[^a-zA-Z0-9_-]', '_', str(sheet_id)))
+
+
+def _read_meta(snapshot_dir):
+    """스냅샷 메타 정보 읽기 - 없거나 깨졌으면 None"""
+    try:
+        with open(os.path.join(snapshot_dir, META_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _write_meta(snapshot_dir, meta):
+    """메타 정보 원자적 저장"""
+    meta_path = os.path.join(snapshot_dir, META_FILE)
+    tmp_path = _tmp_path(meta_path)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_path, meta_path)
+
+
+def _tmp_path(path):
+    """동시 저장이 겹치지 않도록 프로세스/스레드별 임시 파일 경로"""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
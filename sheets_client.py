@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+# streamlit / gspread / google-auth 는 무거우므로 실제로 쓰는 함수 안에서 import 한다
+# (CLI·크론 작업은 Streamlit 없이 시작)
+
+# Google Sheets API 설정
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets.readonly',
+    # 시트 리비전(version) 확인용 - 스냅샷 캐시 무효화에 사용
+    'https://www.googleapis.com/auth/drive.metadata.readonly',
+]
+SERVICE_ACCOUNT_FILE = "service_account.json"
+
+# 서비스 계정 파일 경로를 지정하는 표준 환경 변수 (CLI --credentials 옵션도 이 값을 설정)
+CREDENTIALS_ENV_VAR = "GOOGLE_APPLICATION_CREDENTIALS"
+
+# 만료 몇 분 전에 토큰을 미리 갱신할지
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+# 스레드/세션 간 공유하는 HTTP 연결 풀 크기
+HTTP_POOL_SIZE = 16
+
+# 자격증명 소스별 클라이언트 캐시 {소스 키: 항목}
+_client_cache = {}
+_cache_lock = threading.Lock()
+
+
+def get_google_sheets_client():
+    """Google Sheets API 클라이언트 조회 - 자격증명 소스별로 프로세스 전체에서 재사용"""
+    try:
+        source_key, load_credentials = _resolve_credential_source()
+
+        with _cache_lock:
+            entry = _client_cache.get(source_key)
+            if entry is None:
+                # 같은 소스(파일 경로 / secrets)의 이전 버전 항목 정리
+                for stale_key in [k for k in _client_cache if k[:2] == source_key[:2]]:
+                    _close_entry(_client_cache.pop(stale_key))
+
+                entry = _create_client_entry(load_credentials())
+                _client_cache[source_key] = entry
+
+        _refresh_if_expiring(entry)
+        return entry['client']
+
+    except Exception as e:
+        raise Exception(f"Google Sheets API 인증 실패: {str(e)}")
+
+
+def clear_google_sheets_client_cache():
+    """캐시된 클라이언트와 HTTP 세션 모두 정리"""
+    with _cache_lock:
+        for entry in _client_cache.values():
+            _close_entry(entry)
+        _client_cache.clear()
+
+
+def _resolve_credential_source():
+    """자격증명 소스 키와 Credentials 생성 함수 반환 - 로컬/클라우드 호환"""
+    from google.oauth2.service_account import Credentials
+
+    # 1) 먼저 로컬 파일(또는 환경 변수로 지정한 파일)이 있으면 그걸 우선 사용
+    #    수정 시각/크기가 바뀌면 새 키
+    for candidate in (SERVICE_ACCOUNT_FILE, os.environ.get(CREDENTIALS_ENV_VAR)):
+        if candidate and os.path.exists(candidate):
+            path = os.path.abspath(candidate)
+            stat = os.stat(path)
+            source_key = ('file', path, stat.st_mtime_ns, stat.st_size)
+            return source_key, lambda: Credentials.from_service_account_file(path, scopes=SCOPES)
+
+    # 2) 로컬 파일이 없으면 Streamlit secrets 사용 시도
+    try:
+        import streamlit as st
+        creds_dict = dict(st.secrets["gcp_service_account"])
+    except Exception:
+        raise Exception(
+            "service_account.json 파일이 없고, Streamlit secrets의 "
+            "'gcp_service_account' 설정도 없습니다."
+        )
+
+    if "private_key" in creds_dict:
+        creds_dict["private_key"] = creds_dict["private_key"].replace("\\n", "\n")
+
+    digest = hashlib.sha256(json.dumps(creds_dict, sort_keys=True).encode("utf-8")).hexdigest()
+    source_key = ('secrets', 'gcp_service_account', digest)
+    return source_key, lambda: Credentials.from_service_account_info(creds_dict, scopes=SCOPES)
+
+
+def _create_client_entry(credentials):
+    """연결 풀이 큰 AuthorizedSession 위에 gspread 클라이언트 생성"""
+    import gspread
+    import requests
+    from google.auth.transport.requests import AuthorizedSession, Request
+
+    # 토큰 교환 요청도 풀링된 세션으로 처리
+    token_session = requests.Session()
+    _mount_pool(token_session)
+    token_request = Request(session=token_session)
+
+    session = AuthorizedSession(credentials, auth_request=token_request)
+    _mount_pool(session)
+
+    return {
+        'credentials': credentials,
+        'session': session,
+        'token_session': token_session,
+        'token_request': token_request,
+        'client': gspread.authorize(None, session=session),
+        'lock': threading.Lock(),
+    }
+
+
+def _mount_pool(session):
+    """세션에 keep-alive 연결 풀 어댑터 장착"""
+    from requests.adapters import HTTPAdapter
+
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+
+def _refresh_if_expiring(entry):
+    """토큰이 없거나 곧 만료되면 미리 갱신 - 첫 시트 요청이 토큰 교환을 기다리지 않도록"""
+    credentials = entry['credentials']
+    if not _needs_refresh(credentials):
+        return
+
+    with entry['lock']:
+        # 다른 스레드가 이미 갱신했으면 건너뜀
+        if _needs_refresh(credentials):
+            credentials.refresh(entry['token_request'])
+
+
+def _needs_refresh(credentials):
+    """토큰이 없거나 만료 TOKEN_REFRESH_MARGIN 이내인지 확인"""
+    if not credentials.token or credentials.expiry is None:
+        return True
+    # google-auth 의 expiry 는 naive UTC datetime
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return credentials.expiry - TOKEN_REFRESH_MARGIN <= now
+
+
+def _close_entry(entry):
+    """캐시 항목의 HTTP 세션 종료"""
+    entry['session'].close()
+    entry['token_session'].close()
@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from excel_generator import write_ebay_frame
+from sites import ACTION_COLUMN, render_site_frame, get_site_columns
+from tracing import log, progress
+
+# 사이트별 파일을 동시에 기록할 프로세스 수
+SITE_WRITE_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+
+def write_site_outputs(ebay_df, sites, output_format, description_template, name_prefix, price_ending=None, rates=None):
+    """중간 카탈로그 하나를 사이트별 파일로 렌더링해 병렬 기록한 뒤 zip 으로 묶음
+
+    사이트마다 다시 변환하지 않고 render_site_frame 의 컬럼 변환(헤더 / 가격 통화 / 배송 기본값)만 한다.
+    프로세스 풀 작업 안에서 호출되면(일괄 생성) 풀을 다시 만들지 않고 차례로 기록한다.
+
+    반환값: (zip 임시 파일 객체 - 처음 위치로 되감김, 사이트별 정보 목록 [{filename, site, rows, listings, bytes}])
+    """
+    work_dir = tempfile.mkdtemp(prefix="ebay_sites_")
+    try:
+        paths = {site: os.path.join(work_dir, f"{site}.{output_format}") for site in sites}
+        args = [
+            (ebay_df, site, output_format, description_template, paths[site], price_ending, rates)
+            for site in sites
+        ]
+        sizes = {}
+
+        if len(sites) > 1 and multiprocessing.parent_process() is None:
+            process_context = multiprocessing.get_context('spawn')
+            workers = min(SITE_WRITE_WORKERS, len(sites))
+            with ProcessPoolExecutor(max_workers=workers, mp_context=process_context) as pool:
+                futures = {pool.submit(_write_site, *arg): arg[1] for arg in args}
+                for future in as_completed(futures):
+                    sizes[futures[future]] = future.result()
+                    progress(len(sizes), len(sites))
+        else:
+            for arg in args:
+                sizes[arg[1]] = _write_site(*arg)
+                progress(len(sizes), len(sites))
+
+        listings = int(ebay_df[ACTION_COLUMN].isin(['Add', 'Revise', 'End']).sum())
+        output = tempfile.TemporaryFile()
+        parts = []
+        compression = zipfile.ZIP_STORED if output_format == 'xlsx' else zipfile.ZIP_DEFLATED
+        with zipfile.ZipFile(output, 'w', compression=compression) as archive:
+            for site in sites:
+                filename = f"{name_prefix}_{site}.{output_format}"
+                archive.write(paths[site], arcname=filename)
+                parts.append({
+                    'filename': filename,
+                    'site': site,
+                    'rows': len(ebay_df),
+                    'listings': listings,
+                    'bytes': sizes[site],
+                })
+        log("사이트", f"{len(sites)}개 사이트 파일 기록: {', '.join(sites)}")
+
+        output.seek(0)
+        return output, parts
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _write_site(ebay_df, site, output_format, description_template, path, price_ending, rates):
+    """사이트 파일 1개 렌더링 + 기록 (프로세스 풀 작업) - 파일 크기(bytes) 반환"""
+    site_df = render_site_frame(ebay_df, site, price_ending, rates)
+    with open(path, "wb") as f:
+        write_ebay_frame(f, site_df, output_format, description_template, header=get_site_columns(ebay_df.columns, site))
+    return os.path.getsize(path)
@@ -0,0 +1,103 @@
+import numpy as np
+
+from pricing import BASE_CURRENCY, load_fx_rates, get_fx_rate, parse_price_column, format_price_column
+
+# 판매 사이트 프로필 {사이트 코드: 설정}
+#   site_id          - File Exchange Action 헤더의 SiteID
+#   currency         - 사이트 통화 (변환 결과 USD 가격을 환율표로 바꿈, pricing.FX_RATES_FILE)
+#   shipping_service - 'Shipping service 1 option' 기본값 (배송 정책 프로필을 쓰면 정책이 우선)
+#   column_renames   - 사이트에서 다른 이름을 쓰는 컬럼 {기본 컬럼명: 사이트 컬럼명}
+SITE_PROFILES = {
+    'US': {
+        'label': '미국 (ebay.com)',
+        'site_id': 'US',
+        'currency': 'USD',
+        'shipping_service': 'StandardShippingFromOutsideUS',
+        'column_renames': {},
+    },
+    'UK': {
+        'label': '영국 (ebay.co.uk)',
+        'site_id': 'UK',
+        'currency': 'GBP',
+        'shipping_service': 'UK_StandardShippingFromOutside',
+        'column_renames': {},
+    },
+    'DE': {
+        'label': '독일 (ebay.de)',
+        'site_id': 'Germany',
+        'currency': 'EUR',
+        'shipping_service': 'DE_StandardInternational',
+        'column_renames': {'C:Brand': 'C:Marke'},
+    },
+    'AU': {
+        'label': '호주 (ebay.com.au)',
+        'site_id': 'Australia',
+        'currency': 'AUD',
+        'shipping_service': 'AU_StandardDeliveryFromOutsideAU',
+        'column_renames': {},
+    },
+}
+DEFAULT_SITE = 'US'
+
+# 변환 결과(사이트 공통 중간 카탈로그)는 기본 사이트(US) 형식 - 검증 / 지문 / 집계는 모두 이 형식 기준
+ACTION_COLUMN_TEMPLATE = '*Action(SiteID={site_id}|Country=KR|Currency={currency}|Version=1193)'
+ACTION_COLUMN = ACTION_COLUMN_TEMPLATE.format(**SITE_PROFILES[DEFAULT_SITE])
+
+START_PRICE_COLUMN = 'Start price'
+SHIPPING_SERVICE_COLUMN = 'Shipping service 1 option'
+
+
+def get_site_profile(site):
+    """사이트 코드의 프로필 - 없는 코드면 예외"""
+    if site not in SITE_PROFILES:
+        raise Exception(f"지원하지 않는 판매 사이트입니다: {site}")
+    return SITE_PROFILES[site]
+
+
+def get_user_sites(user):
+    """프로필의 판매 사이트 목록 (설정이 없으면 기본 사이트만) - 순서 유지, 중복 제거"""
+    sites = list(dict.fromkeys(user.get('sites') or [DEFAULT_SITE]))
+    for site in sites:
+        get_site_profile(site)
+    return sites
+
+
+def build_action_column(site):
+    """사이트의 Action 헤더"""
+    return ACTION_COLUMN_TEMPLATE.format(**get_site_profile(site))
+
+
+def get_site_columns(columns, site):
+    """기본 형식 컬럼 목록 → 사이트 파일 헤더 (Action 헤더 + 사이트별 컬럼명)"""
+    renames = dict(get_site_profile(site)['column_renames'], **{ACTION_COLUMN: build_action_column(site)})
+    return [renames.get(column, column) for column in columns]
+
+
+def render_site_frame(ebay_df, site, price_ending=None, rates=None):
+    """중간 카탈로그(기본 형식)를 사이트 값으로 바꾼 DataFrame - 바뀌는 컬럼만 새로 만들고 나머지는 공유
+
+    가격은 USD → 사이트 통화로 바꾸고 프로필 가격 끝자리(price_ending)를 사이트 통화 기준으로 다시 맞춘다.
+    컬럼 이름은 바꾸지 않는다 (헤더는 get_site_columns). 기본 사이트면 ebay_df 를 그대로 반환.
+    """
+    if site == DEFAULT_SITE:
+        return ebay_df
+    profile = get_site_profile(site)
+    default_profile = SITE_PROFILES[DEFAULT_SITE]
+    changed = {}
+
+    if profile['currency'] != BASE_CURRENCY and START_PRICE_COLUMN in ebay_df.columns:
+        rate = get_fx_rate(BASE_CURRENCY, profile['currency'], load_fx_rates() if rates is None else rates)
+        prices = np.round(parse_price_column(ebay_df[START_PRICE_COLUMN].to_numpy(dtype=object)) * rate, 2)
+        if price_ending is not None:
+            prices = np.ceil(np.round(prices - price_ending, 2)) + price_ending
+        changed[START_PRICE_COLUMN] = format_price_column(prices)
+
+    if SHIPPING_SERVICE_COLUMN in ebay_df.columns:
+        shipping = ebay_df[SHIPPING_SERVICE_COLUMN].to_numpy(dtype=object)
+        changed[SHIPPING_SERVICE_COLUMN] = np.where(
+            shipping == default_profile['shipping_service'], profile['shipping_service'], shipping
+        ).astype(object)
+
+    if not changed:
+        return ebay_df
+    return ebay_df.assign(**changed)
@@ -0,0 +1,358 @@
+import copy
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+from tracing import log
+
+# 저장소 종류 - 환경 변수로 선택 (기본은 기존 JSON 파일 방식 'json', SQLite 는 'sqlite')
+STORAGE_ENV_VAR = "EBAYBULK_STORAGE"
+DEFAULT_STORAGE = "json"
+
+# SQLite 잠금 대기 시간(초) - 여러 세션이 동시에 쓸 때
+SQLITE_BUSY_TIMEOUT = 5.0
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id   INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS history (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id       INTEGER,
+    file_name     TEXT,
+    product_count INTEGER,
+    created_at    TEXT
+);
+CREATE INDEX IF NOT EXISTS history_user_created ON history (user_id, created_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class JsonStore:
+    """users.json / history.json 파일 저장소 (기존 방식)
+
+    파일 전체를 읽고 다시 쓰므로 읽기-수정-쓰기 구간은 프로세스 안에서 잠금으로 보호한다.
+    """
+
+    def __init__(self, users_file, history_file):
+        self.users_file = users_file
+        self.history_file = history_file
+        self.lock = threading.RLock()
+        self.ready = False
+        self.cache = ProfileCache()
+
+    def list_users(self):
+        return [copy.deepcopy(u) for u in self._profiles().values()]
+
+    def get_user(self, user_id):
+        user = self._profiles().get(str(user_id))
+        return copy.deepcopy(user) if user else None
+
+    def users_version(self):
+        """users.json 의 (수정 시각, 크기, inode) - 저장할 때마다 파일을 교체하므로 inode 도 바뀜"""
+        self._ensure_files()
+        stat = os.stat(self.users_file)
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def insert_user(self, user):
+        with self.lock:
+            before = self.users_version()
+            users = self._load(self.users_file)
+            new_user = {"id": max([u.get("id", 0) for u in users], default=0) + 1, **user}
+            users.append(new_user)
+            self._save(self.users_file, users)
+            self.cache.apply(before, self.users_version(), new_user["id"], new_user)
+            return copy.deepcopy(new_user)
+
+    def update_user(self, user_id, update):
+        with self.lock:
+            before = self.users_version()
+            users = self._load(self.users_file)
+            for i, user in enumerate(users):
+                if str(user.get("id")) == str(user_id):
+                    users[i] = update(user)
+                    self._save(self.users_file, users)
+                    self.cache.apply(before, self.users_version(), user.get("id"), users[i])
+                    return copy.deepcopy(users[i])
+            return None
+
+    def delete_user(self, user_id):
+        with self.lock:
+            before = self.users_version()
+            users = self._load(self.users_file)
+            self._save(self.users_file, [u for u in users if str(u.get("id")) != str(user_id)])
+            self.cache.apply(before, self.users_version(), user_id, None)
+
+    def list_history(self):
+        # 이력 로그(history_log) 도입 전 이력 - 로그를 처음 만들 때 한 번 읽음
+        return self._load(self.history_file)
+
+    def _ensure_files(self):
+        """data 폴더와 json 파일이 없으면 생성 (프로세스당 한 번)"""
+        if self.ready:
+            return
+        for file_path in (self.users_file, self.history_file):
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            if not os.path.exists(file_path):
+                self._save(file_path, [])
+        self.ready = True
+
+    def _load(self, file_path):
+        self._ensure_files()
+        return load_json_list(file_path)
+
+    def _profiles(self):
+        return self.cache.get(self.users_version(), lambda: self._load(self.users_file))
+
+    def _save(self, file_path, data):
+        """임시 파일에 쓴 뒤 교체 - 읽는 쪽이 반쯤 쓴 파일을 보지 않도록"""
+        tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, file_path)
+
+
+class SqliteStore:
+    """SQLite 저장소 - WAL 모드, 사용자 ID 기본키 조회, 쓰기는 트랜잭션 단위
+
+    연결은 스레드마다 따로 연다 (Streamlit 세션은 각자 스레드에서 실행됨).
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.local = threading.local()
+        self.cache = ProfileCache()
+
+    def list_users(self):
+        return [copy.deepcopy(u) for u in self._profiles().values()]
+
+    def get_user(self, user_id):
+        user = self._profiles().get(str(user_id))
+        return copy.deepcopy(user) if user else None
+
+    def users_version(self):
+        """사용자 변경 카운터 - users 를 바꾸는 트랜잭션마다 1씩 증가 (다른 프로세스의 변경도 보임)"""
+        return _users_version(self._connection())
+
+    def insert_user(self, user):
+        with self._transaction() as conn:
+            (next_id,) = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM users").fetchone()
+            new_user = {"id": next_id, **user}
+            conn.execute("INSERT INTO users (id, data) VALUES (?, ?)", (next_id, _dump(new_user)))
+            before = _bump_users_version(conn)
+        # 커밋된 뒤에만 캐시 반영
+        self.cache.apply(before, before + 1, next_id, new_user)
+        return copy.deepcopy(new_user)
+
+    def update_user(self, user_id, update):
+        user_id = _as_int(user_id)
+        if user_id is None:
+            return None
+        with self._transaction() as conn:
+            row = conn.execute("SELECT data FROM users WHERE id = ?", (user_id,)).fetchone()
+            if row is None:
+                return None
+            updated_user = update(json.loads(row[0]))
+            conn.execute("UPDATE users SET data = ? WHERE id = ?", (_dump(updated_user), user_id))
+            before = _bump_users_version(conn)
+        self.cache.apply(before, before + 1, user_id, updated_user)
+        return copy.deepcopy(updated_user)
+
+    def delete_user(self, user_id):
+        user_id = _as_int(user_id)
+        if user_id is None:
+            return
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
+            before = _bump_users_version(conn)
+        self.cache.apply(before, before + 1, user_id, None)
+
+    def list_history(self):
+        # 이력 로그(history_log) 도입 전 이력 - 로그를 처음 만들 때 한 번 읽음
+        conn = self._connection()
+        cursor = conn.execute(
+            "SELECT id, user_id, file_name, product_count, created_at FROM history ORDER BY id"
+        )
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def get_meta(self, key):
+        row = self._connection().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def migrate_from(self, users, history, source_version=""):
+        """다른 저장소의 사용자/이력을 ID 그대로 옮김 - 여러 번 실행해도 중복되지 않음
+
+        source_version 은 옮긴 원본의 상태 (users.json 수정 시각) - 이후 원본이 바뀌었는지 확인할 때 사용.
+        """
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO users (id, data) VALUES (?, ?)",
+                [(int(u["id"]), _dump(u)) for u in users if _as_int(u.get("id")) is not None]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO history (id, user_id, file_name, product_count, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(h.get("id"), h.get("user_id"), h.get("file_name"), h.get("product_count"), h.get("created_at"))
+                 for h in history]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from_json', ?)", (str(source_version),)
+            )
+            _bump_users_version(conn)
+
+    def _connection(self):
+        """현재 스레드의 연결 (처음이면 열고 스키마 생성)"""
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_file) or ".", exist_ok=True)
+            # 트랜잭션은 _transaction 에서 직접 시작 (autocommit 모드)
+            conn = sqlite3.connect(self.db_file, timeout=SQLITE_BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SQLITE_SCHEMA)
+            self.local.conn = conn
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def _profiles(self):
+        def load():
+            rows = self._connection().execute("SELECT data FROM users ORDER BY id").fetchall()
+            return [json.loads(data) for data, in rows]
+
+        return self.cache.get(self.users_version(), load)
+
+
+class ProfileCache:
+    """프로세스 전체에서 공유하는 프로필 캐시 {str(id): 프로필} (id 순)
+
+    저장소 버전(파일 상태 / 변경 카운터)이 캐시를 만들 때와 같으면 다시 읽지 않는다.
+    이 프로세스의 변경은 변경 직전 버전이 캐시 버전과 같을 때만 캐시에 바로 반영하고,
+    그 사이 다른 곳에서 바뀌었으면 캐시를 버려 다음 조회 때 다시 읽는다.
+    캐시의 프로필은 중첩 목록(image_suffixes / price_rules / sites)까지 공유되므로 저장소는 깊은 복사본만 돌려준다.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.users = {}
+
+    def get(self, version, load):
+        with self.lock:
+            if version != self.version:
+                users = sorted(load(), key=lambda x: x.get("id", 0))
+                self.users = {str(u.get("id")): u for u in users}
+                self.version = version
+            return self.users
+
+    def apply(self, before, after, user_id, user):
+        """변경 1건 반영 - user 가 None 이면 삭제"""
+        with self.lock:
+            if self.version != before:
+                self.version = None
+                return
+            # 조회 중인 다른 스레드가 보고 있는 dict 는 건드리지 않고 새로 만듦
+            users = dict(self.users)
+            if user is None:
+                users.pop(str(user_id), None)
+            else:
+                # 호출한 쪽이 넘긴 프로필의 목록(image_suffixes 등)을 나중에 고쳐도 캐시가 바뀌지 않도록 복사
+                users[str(user_id)] = copy.deepcopy(user)
+            self.users = dict(sorted(users.items(), key=lambda item: item[1].get("id", 0)))
+            self.version = after
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ~ COMMIT/ROLLBACK - 읽기-수정-쓰기 도중 다른 쓰기가 끼어들지 않도록 시작부터 쓰기 잠금"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def open_store(backend, users_file, history_file, db_file):
+    """저장소 생성 - sqlite 는 처음 열 때 기존 JSON 파일을 한 번 옮겨 옴"""
+    if backend == "json":
+        return JsonStore(users_file, history_file)
+    if backend != "sqlite":
+        raise Exception(f"지원하지 않는 저장소입니다: {backend}")
+
+    store = SqliteStore(db_file)
+    migrated = store.get_meta("migrated_from_json")
+    if migrated is None:
+        migrate_json_to_sqlite(users_file, history_file, store)
+    elif _json_version(users_file) > migrated:
+        # SQLite 로 옮긴 뒤 users.json 을 직접 고쳤거나 JSON 저장소로 실행한 적이 있음 - 그 변경은 반영되지 않음
+        log(
+            "저장소",
+            f"{users_file} 이 SQLite 로 옮긴 뒤에 수정되었습니다. 수정 내용은 SQLite 저장소에 없으니 "
+            f"'python cli.py migrate' 로 다시 옮기거나 {STORAGE_ENV_VAR}=json 으로 실행하세요.",
+            level=logging.WARNING,
+        )
+    return store
+
+
+def migrate_json_to_sqlite(users_file, history_file, store):
+    """users.json / history.json 내용을 SQLite 저장소로 옮기고 (사용자 수, 이력 수) 반환"""
+    users = load_json_list(users_file)
+    history = load_json_list(history_file)
+    store.migrate_from(users, history, _json_version(users_file))
+    log("저장소", f"JSON → SQLite 이전: 사용자 {len(users)}명, 이력 {len(history)}건", users=len(users), history=len(history))
+    return len(users), len(history)
+
+
+def load_json_list(file_path):
+    """JSON 배열 파일 읽기 - 없거나 깨졌으면 빈 목록"""
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, list) else []
+    except Exception:
+        return []
+
+
+def _json_version(file_path):
+    """JSON 파일 수정 시각(ns)을 비교 가능한 고정 길이 문자열로 - 파일이 없으면 빈 문자열"""
+    try:
+        return f"{os.stat(file_path).st_mtime_ns:020d}"
+    except OSError:
+        return ""
+
+
+def _users_version(conn):
+    row = conn.execute("SELECT value FROM meta WHERE key = 'users_version'").fetchone()
+    return int(row[0]) if row else 0
+
+
+def _bump_users_version(conn):
+    """트랜잭션 안에서 사용자 변경 카운터 증가 - 증가 전 값 반환"""
+    before = _users_version(conn)
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('users_version', ?)", (str(before + 1),))
+    return before
+
+
+def _dump(user):
+    return json.dumps(user, ensure_ascii=False)
+
+
+def _as_int(user_id):
+    """ID 를 정수로 - 숫자가 아니면 None (JSON 저장소의 str 비교와 같은 결과)"""
+    try:
+        return int(str(user_id))
+    except (TypeError, ValueError):
+        return None
@@ -1,8 +1,85 @@
 import streamlit as st
 import pandas as pd
-from excel_generator import generate_ebay_excel
-from database import get_users, get_user, add_user, update_user, delete_user
-import io
+import time
+from excel_generator import OUTPUT_MIME_TYPES
+from generation_jobs import (
+    start_generation, start_batch, get_job, find_job, cancel_job, ACTIVE_STATUSES, STATUS_DONE, STATUS_CANCELLED
+)
+from datetime import date, timedelta
+from database import (
+    get_users, get_user, add_user, update_user, delete_user, get_generation_stats, get_recent_generations
+)
+from validation import VALIDATION_RULES, summarize_findings
+from catalog_sources import SOURCE_TYPES, DEFAULT_SOURCE_TYPE
+from result_cache import get_result_cache_stats
+from pricing import BASE_CURRENCY, load_fx_rates, get_pricing_rules
+from sites import SITE_PROFILES, DEFAULT_SITE
+from tracing import configure_logging, flatten_trace
+
+# 단계(span)별 소요 시간 표시 이름
+STAGE_LABELS = {
+    "generate": "전체",
+    "load": "구글시트 읽기",
+    "auth": "인증",
+    "revision": "리비전 확인",
+    "snapshot_load": "스냅샷 확인",
+    "header": "헤더 확인",
+    "read_tabs": "필요한 컬럼 읽기",
+    "snapshot_save": "스냅샷 저장",
+    "read_local": "카탈로그 파일 읽기",
+    "filter": "Create 필터링",
+    "convert": "베리에이션 변환",
+    "write": "파일 기록",
+    "stream_csv": "변환 + CSV 기록",
+    "images": "이미지 URL 확인",
+    "validate": "데이터 검증",
+    "result_cache": "이전 결과 확인",
+    "result_save": "결과 캐시 저장",
+    "history": "이력 저장",
+    "total": "전체",
+}
+
+# 갤러리 이미지 접미사 입력 도움말
+GALLERY_SUFFIX_HELP = (
+    "부모 상품 갤러리에 PSKU 뒤에 붙일 접미사 목록입니다. {n} 은 1..INDEX 로 펼쳐지고 {shop_code} 는 샵코드로 치환됩니다. "
+    "비워 두면 기본값(PSKU_C_샵코드, PSKU_D1..D{INDEX})을 사용하고, 빈 항목(, 사이)은 PSKU 그대로입니다."
+)
+
+# 로컬 카탈로그 파일 입력 도움말
+SOURCE_PATH_HELP = (
+    "원본이 파일일 때 필수입니다. Bulk 탭과 같은 컬럼(PSKU, SKU, OPTION, PRICE, ...)을 가진 xlsx(Bulk 탭) / csv / parquet 파일 경로입니다."
+)
+CATEGORY_PATH_HELP = (
+    "CAT 탭과 같은 형식(카테고리 경로, 카테고리 ID, 상태 ID)의 파일 경로입니다. "
+    "비워 두면 xlsx 는 같은 파일의 CAT 탭을 사용합니다."
+)
+
+# 가격 규칙 입력 도움말
+PRICE_RULES_HELP = (
+    "한 줄에 규칙 하나: 카테고리 ID(쉼표로 구분) | 브랜드(쉼표로 구분) | 마크업 % | 추가 금액(USD). "
+    "카테고리 / 브랜드를 비우면 모든 상품에 맞고, 위에서부터 처음 맞는 규칙 하나만 적용됩니다. "
+    "예: 11450, 15724 | Nike | 20 | 1.5"
+)
+PRICE_CURRENCY_HELP = "시트 PRICE 값의 통화입니다. USD 가 아니면 data/fx_rates.json 환율표로 USD 로 바꿉니다."
+
+# 판매 사이트 입력 도움말
+SITES_HELP = (
+    "여러 사이트를 고르면 한 번 변환한 결과를 사이트별 파일(헤더, 통화, 배송 기본값)로 만들어 zip 으로 묶습니다. "
+    "USD 외 통화는 data/fx_rates.json 환율표가 필요합니다."
+)
+
+# 생성 결과 캐시 위치 표시 이름
+RESULT_CACHE_TIERS = {"memory": "메모리", "disk": "디스크"}
+
+# 진행 중인 생성 작업 상태를 다시 확인하는 간격(초)
+JOB_POLL_SECONDS = 1.0
+
+# 검증 결과 심각도 표시 이름 / 한 페이지에 보여줄 검증 결과 수
+SEVERITY_LABELS = {"error": "🔴 오류", "warning": "🟡 경고"}
+FINDINGS_PAGE_SIZE = 50
+
+# 진행 로그는 서버 콘솔로 (EBAYBULK_LOG_FORMAT=json 이면 구조화 로그)
+configure_logging()
 
 # 페이지 설정
 st.set_page_config(
@@ -61,11 +138,45 @@ def show_settings_modal():
                     with col1:
                         name = st.text_input("이름*", value=user.get('name', ''))
                     with col2:
+                        # 알 수 없는 원본 종류(이전 버전 / 직접 수정한 프로필)는 기본 원본으로 표시
+                        current_source_type = user.get('source_type')
+                        if current_source_type not in SOURCE_TYPES:
+                            current_source_type = DEFAULT_SOURCE_TYPE
+                        source_type = st.selectbox(
+                            "카탈로그 원본",
+                            options=list(SOURCE_TYPES.keys()),
+                            index=list(SOURCE_TYPES.keys()).index(current_source_type),
+                            format_func=lambda x: SOURCE_TYPES[x]
+                        )
+                    col_src1, col_src2, col_src3 = st.columns(3)
+                    with col_src1:
                         google_sheet_id = st.text_input(
-                            "구글시트 ID*",
+                            "구글시트 ID",
                             value=user.get('google_sheet_id', ''),
-                            help="구글시트 URL의 /d/[이 부분]/edit"
+                            help="구글시트 URL의 /d/[이 부분]/edit (원본이 구글시트일 때 필수)"
+                        )
+                    with col_src2:
+                        source_path = st.text_input(
+                            "카탈로그 파일 경로",
+                            value=user.get('source_path', ''),
+                            help=SOURCE_PATH_HELP
                         )
+                    with col_src3:
+                        category_path = st.text_input(
+                            "CAT 파일 경로",
+                            value=user.get('category_path', ''),
+                            help=CATEGORY_PATH_HELP
+                        )
+
+                    # 알 수 없는 사이트 코드(직접 수정한 프로필 등)는 기본값에서 빼야 multiselect 가 예외를 내지 않음
+                    current_sites = [site for site in dict.fromkeys(user.get('sites') or []) if site in SITE_PROFILES]
+                    sites = st.multiselect(
+                        "판매 사이트",
+                        options=list(SITE_PROFILES.keys()),
+                        default=current_sites or [DEFAULT_SITE],
+                        format_func=lambda x: SITE_PROFILES[x]['label'],
+                        help=SITES_HELP
+                    )
 
                     st.markdown("#### 🖼️ 이미지 설정")
                     col3, col4, col5 = st.columns(3)
@@ -79,7 +190,7 @@ def show_settings_modal():
                         image_url_pattern = st.text_input(
                             "이미지 URL 패턴",
                             value=user.get('image_url_pattern', '/{sku}.jpg'),
-                            help="{sku}는 상품 SKU로 자동 치환됩니다"
+                            help="{sku}는 이미지 SKU, {psku}는 PSKU, {shop_code}는 샵코드로 자동 치환됩니다"
                         )
                     with col5:
                         shop_code = st.text_input(
@@ -88,6 +199,12 @@ def show_settings_modal():
                             placeholder="COSBLAH",
                             help="첫 번째 이미지에 사용됩니다 (예: A0001_C_COSBLAH.jpg)"
                         )
+                    image_suffixes = st.text_input(
+                        "갤러리 이미지 접미사 (쉼표로 구분)",
+                        value=", ".join(user.get('image_suffixes') or []),
+                        placeholder="_C_{shop_code}, _D{n}",
+                        help=GALLERY_SUFFIX_HELP
+                    )
 
                     st.markdown("#### ⚙️ 기본값")
                     col6, col7 = st.columns(2)
@@ -101,9 +218,42 @@ def show_settings_modal():
                         default_description = st.text_area(
                             "기본 상품 설명",
                             value=user.get('default_description', ''),
-                            height=100
+                            height=100,
+                            help="{title}, {brand}, {sku} 는 상품별 값으로 자동 치환됩니다"
+                        )
+                        minify_description = st.checkbox(
+                            "설명 HTML 축소 (주석·불필요한 공백 제거)",
+                            value=bool(user.get('minify_description', False))
                         )
 
+                    st.markdown("#### 💲 가격 규칙")
+                    currency_options = sorted(set(load_fx_rates()) | {user.get('price_currency') or BASE_CURRENCY})
+                    col_price1, col_price2, col_price3, col_price4 = st.columns(4)
+                    with col_price1:
+                        price_currency = st.selectbox(
+                            "시트 가격 통화",
+                            options=currency_options,
+                            index=currency_options.index(user.get('price_currency') or BASE_CURRENCY),
+                            help=PRICE_CURRENCY_HELP
+                        )
+                    with col_price2:
+                        price_ending = st.text_input(
+                            "가격 끝자리",
+                            value=str(user.get('price_ending', '') or ''),
+                            placeholder="0.99",
+                            help="예: 0.99 이면 12.30 → 12.99 (올림). 비워 두면 그대로"
+                        )
+                    with col_price3:
+                        min_price = st.text_input("최저 가격", value=str(user.get('min_price', '') or ''))
+                    with col_price4:
+                        max_price = st.text_input("최고 가격", value=str(user.get('max_price', '') or ''))
+                    price_rules = st.text_area(
+                        "마크업 규칙",
+                        value=format_price_rules(user.get('price_rules') or []),
+                        height=100,
+                        help=PRICE_RULES_HELP
+                    )
+
                     st.markdown("#### 🏪 이베이 정책 프로필")
                     shipping_profile_name = st.text_input(
                         "배송 프로필*",
@@ -146,22 +296,40 @@ def show_settings_modal():
                         st.rerun()
 
                     if submitted:
-                        if not all([name, google_sheet_id, image_domain, shop_code,
+                        source_ready = google_sheet_id if source_type == 'sheets' else source_path
+                        if not all([name, source_ready, image_domain, shop_code,
                                     shipping_profile_name, return_profile_name, payment_profile_name]):
                             st.error("필수 항목(*)을 모두 입력해주세요.")
                         else:
                             try:
+                                pricing_data = {
+                                    "price_currency": price_currency,
+                                    "price_rules": parse_price_rules(price_rules),
+                                    "price_ending": price_ending.strip(),
+                                    "min_price": min_price.strip(),
+                                    "max_price": max_price.strip(),
+                                }
+                                # 숫자가 아닌 값 / 환율 없는 통화는 저장 전에 확인
+                                get_pricing_rules(pricing_data)
+
                                 update_data = {
                                     "name": name,
                                     "google_sheet_id": google_sheet_id,
+                                    "source_type": source_type,
+                                    "source_path": source_path,
+                                    "category_path": category_path,
+                                    "sites": sites or [DEFAULT_SITE],
                                     "image_domain": image_domain,
                                     "image_url_pattern": image_url_pattern,
                                     "shop_code": shop_code,
+                                    "image_suffixes": parse_image_suffixes(image_suffixes),
                                     "default_quantity": int(default_quantity),
                                     "default_description": default_description,
+                                    "minify_description": minify_description,
                                     "shipping_profile_name": shipping_profile_name,
                                     "return_profile_name": return_profile_name,
-                                    "payment_profile_name": payment_profile_name
+                                    "payment_profile_name": payment_profile_name,
+                                    **pricing_data
                                 }
 
                                 update_user(edit_user_id, update_data)
@@ -180,11 +348,37 @@ def show_settings_modal():
             with col1:
                 new_name = st.text_input("이름*", placeholder="영희")
             with col2:
+                new_source_type = st.selectbox(
+                    "카탈로그 원본",
+                    options=list(SOURCE_TYPES.keys()),
+                    format_func=lambda x: SOURCE_TYPES[x]
+                )
+            col_src1, col_src2, col_src3 = st.columns(3)
+            with col_src1:
                 new_google_sheet_id = st.text_input(
-                    "구글시트 ID*",
+                    "구글시트 ID",
                     placeholder="1abc...xyz",
-                    help="구글시트 URL의 /d/[이 부분]/edit"
+                    help="구글시트 URL의 /d/[이 부분]/edit (원본이 구글시트일 때 필수)"
+                )
+            with col_src2:
+                new_source_path = st.text_input(
+                    "카탈로그 파일 경로",
+                    placeholder="data/catalog.xlsx",
+                    help=SOURCE_PATH_HELP
                 )
+            with col_src3:
+                new_category_path = st.text_input(
+                    "CAT 파일 경로",
+                    help=CATEGORY_PATH_HELP
+                )
+
+            new_sites = st.multiselect(
+                "판매 사이트",
+                options=list(SITE_PROFILES.keys()),
+                default=[DEFAULT_SITE],
+                format_func=lambda x: SITE_PROFILES[x]['label'],
+                help=SITES_HELP
+            )
 
             st.markdown("#### 🖼️ 이미지 설정")
             col3, col4, col5 = st.columns(3)
@@ -197,7 +391,7 @@ def show_settings_modal():
                 new_image_url_pattern = st.text_input(
                     "이미지 URL 패턴",
                     value="/{sku}.jpg",
-                    help="{sku}는 상품 SKU로 자동 치환됩니다"
+                    help="{sku}는 이미지 SKU, {psku}는 PSKU, {shop_code}는 샵코드로 자동 치환됩니다"
                 )
             with col5:
                 new_shop_code = st.text_input(
@@ -205,6 +399,11 @@ def show_settings_modal():
                     placeholder="COSBLAH",
                     help="첫 번째 이미지 URL에 사용됩니다"
                 )
+            new_image_suffixes = st.text_input(
+                "갤러리 이미지 접미사 (쉼표로 구분)",
+                placeholder="_C_{shop_code}, _D{n}",
+                help=GALLERY_SUFFIX_HELP
+            )
 
             st.markdown("#### ⚙️ 기본값")
             col6, col7 = st.columns(2)
@@ -214,8 +413,37 @@ def show_settings_modal():
                 new_default_description = st.text_area(
                     "기본 상품 설명",
                     value="Brand new authentic Korean product. Fast shipping worldwide.",
-                    height=100
+                    height=100,
+                    help="{title}, {brand}, {sku} 는 상품별 값으로 자동 치환됩니다"
                 )
+                new_minify_description = st.checkbox("설명 HTML 축소 (주석·불필요한 공백 제거)", value=False)
+
+            st.markdown("#### 💲 가격 규칙")
+            col_price1, col_price2, col_price3, col_price4 = st.columns(4)
+            with col_price1:
+                new_currency_options = sorted(set(load_fx_rates()) | {BASE_CURRENCY})
+                new_price_currency = st.selectbox(
+                    "시트 가격 통화",
+                    options=new_currency_options,
+                    index=new_currency_options.index(BASE_CURRENCY),
+                    help=PRICE_CURRENCY_HELP
+                )
+            with col_price2:
+                new_price_ending = st.text_input(
+                    "가격 끝자리",
+                    placeholder="0.99",
+                    help="예: 0.99 이면 12.30 → 12.99 (올림). 비워 두면 그대로"
+                )
+            with col_price3:
+                new_min_price = st.text_input("최저 가격")
+            with col_price4:
+                new_max_price = st.text_input("최고 가격")
+            new_price_rules = st.text_area(
+                "마크업 규칙",
+                height=100,
+                placeholder="11450, 15724 | Nike | 20 | 1.5",
+                help=PRICE_RULES_HELP
+            )
 
             st.markdown("#### 🏪 이베이 정책 프로필")
             new_shipping_profile = st.text_input(
@@ -244,22 +472,39 @@ def show_settings_modal():
                 st.rerun()
 
             if add_submitted:
-                if not all([new_name, new_google_sheet_id, new_image_domain,
+                new_source_ready = new_google_sheet_id if new_source_type == 'sheets' else new_source_path
+                if not all([new_name, new_source_ready, new_image_domain,
                             new_shop_code, new_shipping_profile, new_return_profile, new_payment_profile]):
                     st.error("필수 항목(*)을 모두 입력해주세요.")
                 else:
                     try:
+                        new_pricing_data = {
+                            "price_currency": new_price_currency,
+                            "price_rules": parse_price_rules(new_price_rules),
+                            "price_ending": new_price_ending.strip(),
+                            "min_price": new_min_price.strip(),
+                            "max_price": new_max_price.strip(),
+                        }
+                        get_pricing_rules(new_pricing_data)
+
                         insert_data = {
                             "name": new_name,
                             "google_sheet_id": new_google_sheet_id,
+                            "source_type": new_source_type,
+                            "source_path": new_source_path,
+                            "category_path": new_category_path,
+                            "sites": new_sites or [DEFAULT_SITE],
                             "image_domain": new_image_domain,
                             "image_url_pattern": new_image_url_pattern,
                             "shop_code": new_shop_code,
+                            "image_suffixes": parse_image_suffixes(new_image_suffixes),
                             "default_quantity": int(new_default_quantity),
                             "default_description": new_default_description,
+                            "minify_description": new_minify_description,
                             "shipping_profile_name": new_shipping_profile,
                             "return_profile_name": new_return_profile,
-                            "payment_profile_name": new_payment_profile
+                            "payment_profile_name": new_payment_profile,
+                            **new_pricing_data
                         }
 
                         add_user(insert_data)
@@ -271,6 +516,222 @@ def show_settings_modal():
                         st.error(f"추가 실패: {str(e)}")
 
 
+def parse_image_suffixes(text):
+    """쉼표로 구분된 갤러리 접미사 입력을 목록으로 (빈 입력은 기본값을 뜻하는 빈 목록)"""
+    if not text.strip():
+        return []
+    return [suffix.strip() for suffix in text.split(',')]
+
+
+def parse_price_rules(text):
+    """마크업 규칙 입력(한 줄에 '카테고리 ID | 브랜드 | 마크업 % | 추가 금액')을 규칙 목록으로"""
+    rules = []
+    for number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) > 4:
+            raise Exception(f"마크업 규칙 {number}번째 줄의 항목이 너무 많습니다: {line}")
+        fields += [''] * (4 - len(fields))
+        rules.append({
+            'category_ids': [value.strip() for value in fields[0].split(',') if value.strip()],
+            'brands': [value.strip() for value in fields[1].split(',') if value.strip()],
+            'markup_percent': fields[2],
+            'markup_amount': fields[3],
+        })
+    return rules
+
+
+def format_price_rules(rules):
+    """규칙 목록을 입력란 형식(한 줄에 규칙 하나)으로"""
+    return "\n".join(
+        " | ".join([
+            ", ".join(rule.get('category_ids') or []),
+            ", ".join(rule.get('brands') or []),
+            str(rule.get('markup_percent', '') or ''),
+            str(rule.get('markup_amount', '') or ''),
+        ])
+        for rule in rules
+    )
+
+
+def show_trace(root):
+    """span 트리를 들여쓴 단계 / 초 / 비율 / 카운터 표로 표시"""
+    total = root.duration or 1.0
+    rows = []
+    for node in flatten_trace(root):
+        label = STAGE_LABELS.get(node['name'], node['name'])
+        rows.append({
+            "단계": "\u3000" * node['depth'] + label,
+            "초": round(node['seconds'], 3),
+            "비율(%)": round(node['seconds'] / total * 100, 1),
+            "카운터": ", ".join(f"{key}={value:,}" for key, value in node['counters'].items()),
+        })
+
+    st.dataframe(
+        pd.DataFrame(rows),
+        use_container_width=True,
+        hide_index=True,
+        column_config={"비율(%)": st.column_config.ProgressColumn("비율(%)", min_value=0, max_value=100, format="%.1f")}
+    )
+
+
+def read_output(output):
+    """결과 파일 객체 전체 읽기 (다운로드할 때마다 처음부터)"""
+    output.seek(0)
+    return output.read()
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def show_job_progress(job_id):
+    """진행 중 작업의 단계 / 행 진행률과 취소 버튼 - 이 부분만 주기적으로 다시 그리고, 끝나면 전체를 다시 그려 결과 표시"""
+    job = get_job(job_id)
+    if job is None or job['status'] not in ACTIVE_STATUSES:
+        st.rerun()
+
+    stage = STAGE_LABELS.get(job['stage'], job['stage']) if job['stage'] else "대기 중"
+    elapsed = time.time() - (job['started_at'] or job['created_at'])
+    if job['total']:
+        fraction = min(1.0, job['done'] / job['total'])
+        text = f"🔄 {stage} - {job['done']:,} / {job['total']:,}행 ({elapsed:.0f}초)"
+    else:
+        fraction = 0.0
+        text = f"🔄 {stage}... ({elapsed:.0f}초)"
+    st.progress(fraction, text=text)
+
+    if st.button("⏹️ 취소", key=f"cancel_{job_id}"):
+        cancel_job(job_id)
+        st.caption("취소 요청됨 - 지금 단계가 끝나면 멈춥니다.")
+
+
+def show_generation_result(result):
+    """끝난 생성 작업의 결과 요약 / 다운로드 / 미리보기 / 단계별 시간"""
+    filename = result['filename']
+    findings = result['findings']
+    counts = result['counts']
+
+    st.success(f"✅ 생성 완료: {filename}")
+    if result.get('cached'):
+        st.info(f"♻️ 같은 입력으로 만든 이전 결과를 재사용했습니다 ({RESULT_CACHE_TIERS[result['cached']]}).")
+
+    if len(findings):
+        with st.expander(f"⚠️ {len(findings)}개 검증 경고", expanded=len(findings) <= 3):
+            show_findings(findings)
+
+    col_r1, col_r2, col_r3 = st.columns(3)
+    col_r1.metric("Total", counts['total'])
+    col_r2.metric("PSKU", counts['psku'])
+    col_r3.metric("SKU", counts['sku'])
+
+    if result['delta']:
+        delta = result['delta']
+        col_d1, col_d2, col_d3, col_d4 = st.columns(4)
+        col_d1.metric("추가 (Add)", delta['added'])
+        col_d2.metric("수정 (Revise)", delta['revised'])
+        col_d3.metric("종료 (End)", delta['ended'])
+        col_d4.metric("변경 없음", delta['unchanged'])
+
+    st.download_button(
+        label=f"💾 이베이 File Exchange 업로드용 {'ZIP' if result['parts'] else result['output_format'].upper()} 다운로드",
+        # 결과는 작업에 보관되어 화면을 다시 그릴 때마다 표시되므로 다운로드를 누를 때만 읽음
+        data=lambda output=result['output']: read_output(output),
+        file_name=filename,
+        mime=result['mime_type'],
+        type="primary",
+        use_container_width=True
+    )
+
+    if result['parts']:
+        by_site = 'site' in result['parts'][0]
+        title = f"🌐 {len(result['parts'])}개 사이트 파일" if by_site else f"✂️ {len(result['parts'])}개 파일로 분할"
+        with st.expander(title, expanded=False):
+            st.dataframe(
+                pd.DataFrame([
+                    {**({"사이트": SITE_PROFILES[p['site']]['label']} if by_site else {}),
+                     "파일": p['filename'], "행 수": p['rows'], "리스팅": p['listings'],
+                     "크기(KB)": round(p['bytes'] / 1024, 1)}
+                    for p in result['parts']
+                ]),
+                use_container_width=True,
+                hide_index=True
+            )
+
+    with st.expander("👀 생성된 파일 미리보기 (선택사항)", expanded=False):
+        st.dataframe(result['preview'], use_container_width=True, height=400)
+
+        if counts['variations'] > 0:
+            st.success(f"✅ {counts['variations']}개 베리에이션 SKU 확인")
+
+    with st.expander("⏱️ 단계별 소요 시간", expanded=False):
+        show_trace(result['trace'])
+        stats = get_result_cache_stats()
+        st.caption(
+            f"결과 캐시 (앱 시작 후): 적중 {stats['memory_hits'] + stats['disk_hits']}회 "
+            f"(메모리 {stats['memory_hits']} / 디스크 {stats['disk_hits']}) · 실패 {stats['misses']}회 · "
+            f"메모리 {stats['memory_entries']}개 {stats['memory_bytes'] / 1024 / 1024:.1f}MB"
+        )
+
+
+def show_generation_error(error):
+    """실패한 생성 작업의 오류와 해결 가이드"""
+    st.error(f"❌ 오류 발생: {error}")
+
+    with st.expander("🔧 오류 해결 가이드"):
+        st.code(error)
+
+        if "401" in error or "Unauthorized" in error:
+            st.markdown("""
+            ### 💡 401 Unauthorized 해결 방법
+            1. Google Sheets API 활성화 확인
+            2. 서비스 계정 이메일 확인
+            3. 구글시트에 서비스 계정 이메일을 뷰어 권한으로 공유
+            """)
+
+        elif "403" in error or "Forbidden" in error:
+            st.markdown("""
+            ### 💡 403 Forbidden 해결 방법
+            - 구글시트에 서비스 계정 이메일이 공유되지 않았습니다
+            - 구글시트 → 공유 → 서비스 계정 이메일 추가 (뷰어 권한)
+            """)
+
+
+@st.fragment
+def show_findings(findings):
+    """검증 결과를 규칙별로 묶어 페이지 단위로 표시 (페이지를 넘겨도 생성 결과는 유지)"""
+    summary = summarize_findings(findings)
+
+    st.dataframe(
+        pd.DataFrame({
+            "심각도": summary["severity"].map(SEVERITY_LABELS),
+            "규칙": summary["label"],
+            "건수": summary["count"],
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
+
+    col_rule, col_page = st.columns([3, 1])
+    rule = col_rule.selectbox(
+        "규칙",
+        options=list(summary["rule"]),
+        format_func=lambda x: f"{VALIDATION_RULES[x][1]} ({int(summary.loc[summary['rule'] == x, 'count'].iloc[0])}건)",
+        key="findings_rule"
+    )
+    selected = findings[findings["rule"] == rule]
+    page_count = max(1, -(-len(selected) // FINDINGS_PAGE_SIZE))
+    page = col_page.number_input("페이지", min_value=1, max_value=page_count, value=1, key="findings_page")
+
+    start = (page - 1) * FINDINGS_PAGE_SIZE
+    st.dataframe(
+        selected.iloc[start:start + FINDINGS_PAGE_SIZE].rename(columns={
+            "field": "컬럼", "psku": "PSKU", "sku": "SKU", "sheet_row": "시트 행"
+        })[["시트 행", "PSKU", "SKU", "컬럼"]],
+        use_container_width=True,
+        hide_index=True
+    )
+    st.caption(f"{page}/{page_count} 페이지 · {len(selected)}건")
+
+
 # 헤더
 col_title, col_settings = st.columns([8, 1])
 
@@ -316,10 +777,42 @@ selected_user = get_user(selected_user_id)
 with st.expander("ℹ️ 선택된 사용자 정보", expanded=False):
     st.json({
         "이름": selected_user.get('name', ''),
+        "카탈로그 원본": SOURCE_TYPES.get(selected_user.get('source_type') or DEFAULT_SOURCE_TYPE, ''),
+        "파일 경로": selected_user.get('source_path') or "미설정",
         "구글시트 ID": (selected_user.get('google_sheet_id', '')[:40] + "...") if selected_user.get('google_sheet_id') else "미설정",
+        "판매 사이트": ", ".join(selected_user.get('sites') or [DEFAULT_SITE]),
         "이미지 도메인": selected_user.get('image_domain', '미설정')
     })
 
+with st.expander("📜 생성 이력", expanded=False):
+    overall = get_generation_stats(selected_user_id)
+    col_h1, col_h2, col_h3 = st.columns(3)
+    col_h1.metric("전체 생성 횟수", overall['count'])
+    col_h2.metric("전체 생성 행 수", f"{overall['product_count']:,}")
+    col_h3.metric("마지막 생성", (overall['last_created_at'] or "-")[:16].replace("T", " "))
+
+    period = st.date_input(
+        "기간",
+        value=(date.today() - timedelta(days=30), date.today()),
+        key="history_period"
+    )
+    if isinstance(period, (tuple, list)) and len(period) == 2:
+        in_period = get_generation_stats(selected_user_id, period[0], period[1])
+        st.caption(f"기간 내 {in_period['count']}회 생성, {in_period['product_count']:,}행")
+
+    recent = get_recent_generations(selected_user_id)
+    if recent:
+        st.dataframe(
+            pd.DataFrame([
+                {"생성 시각": h['created_at'][:19].replace("T", " "), "파일": h['file_name'], "행 수": h['product_count']}
+                for h in recent
+            ]),
+            use_container_width=True,
+            hide_index=True
+        )
+    else:
+        st.caption("아직 생성 이력이 없습니다.")
+
 st.markdown("---")
 
 # 메인 기능
@@ -327,65 +820,113 @@ st.subheader("2️⃣ 이베이 Excel 생성")
 
 st.info("💡 워크플로우: 구글시트 Bulk 탭과 CAT 탭 데이터를 읽어와 Excel 파일을 생성합니다.")
 
+output_format = st.radio(
+    "출력 형식",
+    options=list(OUTPUT_MIME_TYPES.keys()),
+    format_func=lambda x: {"xlsx": "Excel (.xlsx)", "csv": "CSV (.csv) - 대용량에 빠름"}[x],
+    horizontal=True
+)
+
+generation_mode = st.radio(
+    "생성 방식",
+    options=["full", "delta"],
+    format_func=lambda x: {"full": "전체 생성 (모두 Add)", "delta": "변경분만 (Add / Revise / End)"}[x],
+    horizontal=True,
+    help="변경분 모드는 지난 생성 이후 추가·수정·삭제된 리스팅만 파일에 담습니다."
+)
+
+force_refresh = st.checkbox(
+    "🔄 구글시트 새로 읽기 (캐시 무시)",
+    value=False,
+    help="시트가 바뀌지 않았으면 저장된 스냅샷을 재사용합니다. 체크하면 항상 새로 다운로드합니다."
+)
+
+max_rows = max_bytes = None
+if st.checkbox("✂️ 파일 나누기 (PSKU 단위, zip)", value=False,
+               help="File Exchange 업로드 한도에 맞춰 부모 상품과 베리에이션을 떼지 않고 여러 파일로 나눕니다."):
+    col_split1, col_split2 = st.columns(2)
+    max_rows = col_split1.number_input("파일당 최대 행 수 (0 = 제한 없음)", min_value=0, value=5000, step=500) or None
+    max_mb = col_split2.number_input("파일당 최대 크기 MB (0 = 제한 없음)", min_value=0.0, value=0.0, step=1.0)
+    max_bytes = int(max_mb * 1024 * 1024) or None
+
+verify_images = st.checkbox(
+    "🖼️ 이미지 URL 확인",
+    value=False,
+    help="생성된 사진 URL 에 HEAD 요청을 보내 없는 이미지(404)를 검증 결과에 표시합니다. 확인 결과는 캐시되어 다음 생성에서는 바뀐 URL 만 확인합니다."
+)
+
+use_result_cache = st.checkbox(
+    "♻️ 같은 입력이면 이전 결과 재사용",
+    value=True,
+    help="시트 내용, 프로필 설정, 생성 옵션이 모두 같으면 변환·기록·검증을 건너뛰고 저장된 결과를 바로 내려줍니다. "
+         "이미지 URL 확인을 켜면 재사용하지 않습니다."
+)
+
+if 'generation_jobs' not in st.session_state:
+    # 프로필별 마지막 생성 작업 ID - 화면을 다시 그려도 같은 작업에 다시 연결
+    st.session_state.generation_jobs = {}
+
+generation_key = ('generate', selected_user_id)
 if st.button("🚀 Excel 생성 및 다운로드", type="primary", use_container_width=True):
-    try:
-        with st.spinner("🔄 처리 중... (구글시트 연결 → 데이터 검증 → 베리에이션 처리 → Excel 생성)"):
-            excel_data, filename, errors = generate_ebay_excel(selected_user_id)
+    running_job_id = find_job(generation_key, active_only=True)
+    st.session_state.generation_jobs[selected_user_id] = start_generation(
+        selected_user_id, output_format, force_refresh, generation_mode, max_rows, max_bytes, verify_images,
+        use_result_cache
+    )
+    if running_job_id == st.session_state.generation_jobs[selected_user_id]:
+        st.info("같은 설정의 생성 작업이 이미 진행 중이라 그 작업에 연결했습니다.")
+    elif running_job_id:
+        st.info("이 프로필의 다른 생성 작업이 진행 중이라 끝난 뒤 이어서 생성합니다.")
+
+generation_job_id = (
+    st.session_state.generation_jobs.get(selected_user_id) or find_job(generation_key, active_only=True)
+)
+generation_job = get_job(generation_job_id) if generation_job_id else None
+if generation_job is not None:
+    if generation_job['status'] in ACTIVE_STATUSES:
+        show_job_progress(generation_job_id)
+    elif generation_job['status'] == STATUS_DONE:
+        show_generation_result(generation_job['result'])
+    elif generation_job['status'] == STATUS_CANCELLED:
+        st.warning("⏹️ 생성이 취소되었습니다.")
+    else:
+        show_generation_error(generation_job['error'])
 
-            st.success(f"✅ 생성 완료: {filename}")
+st.markdown("---")
+
+# 일괄 생성
+st.subheader("3️⃣ 전체 프로필 일괄 생성")
+st.caption("등록된 모든 프로필을 동시에 생성해 zip 파일 하나로 내려받습니다. 한 프로필이 실패해도 나머지는 계속 진행됩니다.")
 
-            if errors:
-                with st.expander(f"⚠️ {len(errors)}개 검증 경고", expanded=len(errors) <= 3):
-                    for error in errors[:10]:
-                        st.warning(error)
-                    if len(errors) > 10:
-                        st.info(f"... 외 {len(errors) - 10}개 추가 경고")
+if st.button("📦 전체 프로필 일괄 생성", use_container_width=True):
+    st.session_state.batch_job = start_batch(output_format, force_refresh, generation_mode)
 
-            excel_data_copy = excel_data.getvalue()
-            df_result = pd.read_excel(io.BytesIO(excel_data_copy), dtype=str)
+batch_job_id = st.session_state.get('batch_job') or find_job(('batch',), active_only=True)
+batch_job = get_job(batch_job_id) if batch_job_id else None
+if batch_job is not None:
+    if batch_job['status'] in ACTIVE_STATUSES:
+        show_job_progress(batch_job_id)
+    elif batch_job['status'] == STATUS_DONE:
+        batch_result = batch_job['result']
+        statuses = batch_result['statuses']
+        ok_count = sum(1 for s in statuses if s['status'] == 'ok')
+        st.success(f"✅ {ok_count}/{len(statuses)}개 프로필 생성 완료 ({batch_result['timings']['total']:.1f}초)")
 
-            col_r1, col_r2, col_r3 = st.columns(3)
-            col_r1.metric("Total", len(df_result))
-            col_r2.metric("PSKU", len(df_result[df_result.iloc[:, 0] == 'Add']))
-            col_r3.metric("SKU", len(df_result[df_result.iloc[:, 0].isna() | (df_result.iloc[:, 0] == '')]))
+        st.dataframe(pd.DataFrame(statuses), use_container_width=True, hide_index=True)
 
+        if ok_count > 0:
             st.download_button(
-                label="💾 이베이 File Exchange 업로드용 Excel 다운로드",
-                data=excel_data,
-                file_name=filename,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                label="💾 전체 프로필 zip 다운로드",
+                data=lambda output=batch_result['output']: read_output(output),
+                file_name=batch_result['filename'],
+                mime="application/zip",
                 type="primary",
                 use_container_width=True
             )
-
-            with st.expander("👀 생성된 파일 미리보기 (선택사항)", expanded=False):
-                st.dataframe(df_result.head(15), use_container_width=True, height=400)
-
-                variation_groups = df_result[df_result.iloc[:, 5] == 'Variation'] if len(df_result.columns) > 5 else pd.DataFrame()
-                if len(variation_groups) > 0:
-                    st.success(f"✅ {len(variation_groups)}개 베리에이션 SKU 확인")
-
-    except Exception as e:
-        st.error(f"❌ 오류 발생: {str(e)}")
-
-        with st.expander("🔧 오류 해결 가이드"):
-            st.exception(e)
-
-            error_str = str(e)
-            if "401" in error_str or "Unauthorized" in error_str:
-                st.markdown("""
-                ### 💡 401 Unauthorized 해결 방법
-                1. Google Sheets API 활성화 확인
-                2. 서비스 계정 이메일 확인
-                3. 구글시트에 서비스 계정 이메일을 뷰어 권한으로 공유
-                """)
-
-            elif "403" in error_str or "Forbidden" in error_str:
-                st.markdown("""
-                ### 💡 403 Forbidden 해결 방법
-                - 구글시트에 서비스 계정 이메일이 공유되지 않았습니다
-                - 구글시트 → 공유 → 서비스 계정 이메일 추가 (뷰어 권한)
-                """)
+    elif batch_job['status'] == STATUS_CANCELLED:
+        st.warning("⏹️ 일괄 생성이 취소되었습니다.")
+    else:
+        st.error(f"❌ 일괄 생성 오류: {batch_job['error']}")
 
 st.markdown("---")
 st.caption("🎯 사용자 선택 → Excel 생성 → 다운로드 → 이베이 File Exchange 업로드")
@@ -0,0 +1,51 @@
+"""변경분(delta) 모드 - End 행의 EndCode, 공백만 다른 PSKU 거부"""
+import csv
+import io
+
+import pandas as pd
+import pytest
+
+from benchmark import make_synthetic_bulk
+from excel_generator import DEFAULT_END_CODE, END_CODE_COLUMN, filter_create_rows, write_ebay_output
+
+
+@pytest.fixture(scope='module')
+def catalog():
+    bulk_df, category_map, user = make_synthetic_bulk(60)
+    return filter_create_rows(bulk_df), category_map, user
+
+
+def read_csv_rows(result):
+    return list(csv.reader(io.TextIOWrapper(result['output'], encoding='utf-8', newline='')))
+
+
+def test_end_rows_have_end_code(catalog):
+    bulk_df, category_map, user = catalog
+    full = write_ebay_output(bulk_df, category_map, user, 'csv')
+    assert END_CODE_COLUMN not in read_csv_rows(full)[0]
+
+    previous = dict(full['fingerprints'], GONE='0' * 16)
+    result = write_ebay_output(bulk_df, category_map, user, 'csv', previous)
+    rows = read_csv_rows(result)
+
+    assert result['delta']['ended'] == 1
+    assert rows[0][-1] == END_CODE_COLUMN
+    assert rows[-1][:2] == ['End', 'GONE']
+    assert rows[-1][-1] == DEFAULT_END_CODE
+    assert all(len(row) == len(rows[0]) for row in rows)
+
+
+def test_no_end_code_without_end_rows(catalog):
+    bulk_df, category_map, user = catalog
+    full = write_ebay_output(bulk_df, category_map, user, 'csv')
+    result = write_ebay_output(bulk_df, category_map, user, 'csv', full['fingerprints'])
+    assert END_CODE_COLUMN not in read_csv_rows(result)[0]
+
+
+@pytest.mark.parametrize('output_format', ['csv', 'xlsx'])
+def test_pskus_equal_after_strip_rejected(catalog, output_format):
+    bulk_df, category_map, user = catalog
+    psku = bulk_df['PSKU'].iloc[0]
+    padded = bulk_df[bulk_df['PSKU'] == psku].assign(PSKU=psku + ' ')
+    with pytest.raises(Exception, match=psku):
+        write_ebay_output(pd.concat([bulk_df, padded]), category_map, user, output_format)
@@ -0,0 +1,96 @@
+"""generation_jobs - 같은 프로필 작업 대기열, 일괄 생성 취소"""
+import threading
+import time
+
+import pytest
+
+import batch_generator
+import database
+import generation_jobs
+from tracing import progress
+
+
+def wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def job_status(job_id):
+    return generation_jobs.get_job(job_id)['status']
+
+
+def finished(job_id):
+    return job_status(job_id) not in generation_jobs.ACTIVE_STATUSES
+
+
+def test_waiting_jobs_do_not_block_other_profiles():
+    release = threading.Event()
+
+    def blocked():
+        release.wait(30)
+        return 'first'
+
+    try:
+        first = generation_jobs._submit(('test', 1), {'queue-1'}, {'n': 1}, blocked, {})
+        assert wait_for(lambda: job_status(first) == generation_jobs.STATUS_RUNNING)
+
+        # 같은 프로필 작업이 작업 풀 스레드 수(JOB_WORKERS)보다 많이 기다려도
+        waiting = [
+            generation_jobs._submit(('test', 1), {'queue-1'}, {'n': n}, lambda: 'same', {})
+            for n in range(2, 2 + generation_jobs.JOB_WORKERS)
+        ]
+        # 다른 프로필 작업은 바로 실행됨
+        other = generation_jobs._submit(('test', 2), {'queue-2'}, {'n': 1}, lambda: 'other', {})
+        assert wait_for(lambda: finished(other), timeout=5)
+        assert generation_jobs.get_job(other)['result'] == 'other'
+        assert all(job_status(job_id) == generation_jobs.STATUS_QUEUED for job_id in waiting)
+
+        # 대기 중 취소한 작업은 건너뛰고 나머지는 차례로 실행
+        assert generation_jobs.cancel_job(waiting[0])
+    finally:
+        release.set()
+
+    assert wait_for(lambda: all(finished(job_id) for job_id in waiting))
+    assert job_status(first) == generation_jobs.STATUS_DONE
+    assert job_status(waiting[0]) == generation_jobs.STATUS_CANCELLED
+    assert [job_status(job_id) for job_id in waiting[1:]] == [generation_jobs.STATUS_DONE] * (len(waiting) - 1)
+
+
+@pytest.fixture
+def profiles(tmp_path, monkeypatch):
+    """임시 data 폴더의 JSON 저장소에 시트 프로필 3개"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv(database.STORAGE_ENV_VAR, 'json')
+    monkeypatch.setattr(database, '_store', None)
+    monkeypatch.setattr(database, '_history_ready', False)
+    return [database.add_user({'name': f"user{n}", 'google_sheet_id': f"sheet{n}"})['id'] for n in range(3)]
+
+
+def test_cancel_batch_mid_run(profiles, monkeypatch):
+    reading = threading.Event()
+
+    def slow_read_catalog(user, force_refresh=False):
+        # 행 배치마다 진행 보고 - 취소되면 progress 에서 JobCancelled
+        reading.set()
+        for done in range(1000):
+            progress(done, 1000)
+            time.sleep(0.01)
+        raise AssertionError("취소되지 않았습니다.")
+
+    monkeypatch.setattr(batch_generator, 'read_catalog', slow_read_catalog)
+
+    job_id = generation_jobs.start_batch(output_format='csv')
+    assert reading.wait(10)
+    cancelled_at = time.monotonic()
+    assert generation_jobs.cancel_job(job_id)
+
+    assert wait_for(lambda: finished(job_id))
+    assert time.monotonic() - cancelled_at < 5
+    job = generation_jobs.get_job(job_id)
+    assert job['status'] == generation_jobs.STATUS_CANCELLED
+    assert job['result'] is None
+    assert job['error'] == ''
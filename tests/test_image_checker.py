@@ -0,0 +1,124 @@
+"""image_checker - 로컬 이미지 서버(200 / 404 / 410 / 리다이렉트 / 500 / HEAD 미지원)로 HEAD 확인과 캐시 확인"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+import image_checker
+from image_checker import STATUS_ERROR, STATUS_MISSING, STATUS_OK, split_photo_urls, verify_image_urls
+
+pytest.importorskip("requests")
+
+# 경로별 (HEAD 응답 코드, 리다이렉트 대상) - GET 은 HEAD 미지원 경로에서만 200
+ROUTES = {
+    '/ok.jpg': (200, None),
+    '/missing.jpg': (404, None),
+    '/gone.jpg': (410, None),
+    '/moved.jpg': (302, '/ok.jpg'),
+    '/moved-missing.jpg': (301, '/missing.jpg'),
+    '/broken.jpg': (500, None),
+    '/no-head.jpg': (405, None),
+}
+
+
+class FakeImageServer(ThreadingHTTPServer):
+    """ROUTES 대로 응답하고 받은 (메서드, 경로) 를 기록하는 서버"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _FakeImageHandler)
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+
+class _FakeImageHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_HEAD(self):
+        self._record()
+        code, location = ROUTES.get(self.path, (404, None))
+        self._send(code, location)
+
+    def do_GET(self):
+        self._record()
+        self._send(200 if self.path == '/no-head.jpg' else ROUTES.get(self.path, (404, None))[0])
+
+    def _record(self):
+        with self.server.lock:
+            self.server.requests.append((self.command, self.path))
+
+    def _send(self, code, location=None):
+        self.send_response(code)
+        if location:
+            self.send_header('Location', location)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = FakeImageServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_verify_image_urls_head_results(server, tmp_path):
+    urls = [server.url(path) for path in ROUTES]
+    results = verify_image_urls(urls + urls[:2], cache_file=str(tmp_path / 'image_cache.db'))
+
+    assert results == {
+        server.url('/ok.jpg'): STATUS_OK,
+        server.url('/missing.jpg'): STATUS_MISSING,
+        server.url('/gone.jpg'): STATUS_MISSING,
+        server.url('/moved.jpg'): STATUS_OK,
+        server.url('/moved-missing.jpg'): STATUS_MISSING,
+        server.url('/broken.jpg'): STATUS_ERROR,
+        server.url('/no-head.jpg'): STATUS_OK,
+    }
+    # 리다이렉트는 HEAD 로 따라가고, GET 은 HEAD 를 지원하지 않는 서버에만 보냄
+    assert [path for method, path in server.requests if method == 'GET'] == ['/no-head.jpg']
+    assert sorted(path for method, path in server.requests if method == 'HEAD') == sorted(
+        list(ROUTES) + ['/ok.jpg', '/missing.jpg']
+    )
+
+
+def test_verify_image_urls_uses_cache(server, tmp_path):
+    cache_file = str(tmp_path / 'image_cache.db')
+    urls = [server.url('/ok.jpg'), server.url('/missing.jpg'), server.url('/broken.jpg')]
+    first = verify_image_urls(urls, cache_file=cache_file)
+    server.requests.clear()
+
+    # 있음 / 없음 결과는 캐시되고 확인 실패(500)만 다시 요청
+    assert verify_image_urls(urls, cache_file=cache_file) == first
+    assert server.requests == [('HEAD', '/broken.jpg')]
+
+
+def test_verify_image_urls_missing_ttl(server, tmp_path, monkeypatch):
+    cache_file = str(tmp_path / 'image_cache.db')
+    urls = [server.url('/ok.jpg'), server.url('/missing.jpg')]
+    verify_image_urls(urls, cache_file=cache_file)
+    server.requests.clear()
+
+    # 없는 이미지 캐시는 짧은 TTL 이 지나면 다시 확인
+    monkeypatch.setattr(image_checker, 'IMAGE_MISSING_TTL_SECONDS', -1)
+    verify_image_urls(urls, cache_file=cache_file)
+    assert server.requests == [('HEAD', '/missing.jpg')]
+
+
+def test_split_photo_urls():
+    rows, urls = split_photo_urls(['http://a/1.jpg|http://a/2.jpg', '', 'Red=http://a/3.jpg', 'http://a/4.jpg'])
+    assert rows.tolist() == [0, 0, 2, 3]
+    assert urls.tolist() == ['http://a/1.jpg', 'http://a/2.jpg', 'http://a/3.jpg', 'http://a/4.jpg']
+    assert isinstance(urls, np.ndarray)
@@ -0,0 +1,65 @@
+"""result_cache - 메모리 캐시 용량에 결과 파일 외 저장 항목(검증 결과 / 지문 / 미리보기)까지 포함"""
+import io
+
+import pandas as pd
+import pytest
+
+import result_cache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, 'RESULT_CACHE_DIR', str(tmp_path / 'result_cache'))
+    result_cache.clear_result_cache()
+    yield result_cache
+    result_cache.clear_result_cache()
+
+
+def make_result(rows):
+    findings = pd.DataFrame({'row': range(rows), 'message': [f"이미지 URL 오류 {i}" for i in range(rows)]})
+    return {
+        'output': io.BytesIO(b'x' * 100),
+        'output_format': 'csv',
+        'mime_type': 'text/csv',
+        'parts': None,
+        'findings': findings,
+        'counts': {'total': rows},
+        'delta': None,
+        'fingerprints': {f"P{i:06d}": f"{i:016x}" for i in range(rows)},
+        'preview': findings.head(15),
+    }
+
+
+def test_memory_bytes_include_stored_fields(cache):
+    result = make_result(2000)
+    cache.save_result('key', result)
+
+    memory_bytes = cache.get_result_cache_stats()['memory_bytes']
+    assert memory_bytes > 100 + result['findings'].memory_usage(deep=True).sum()
+    assert memory_bytes > 100 + 2000 * 2 * 50
+
+
+def test_large_stored_fields_stay_on_disk(cache, monkeypatch):
+    result = make_result(2000)
+    monkeypatch.setattr(result_cache, 'RESULT_MEMORY_MAX_BYTES', int(result['findings'].memory_usage(deep=True).sum()))
+    cache.save_result('key', result)
+    assert cache.get_result_cache_stats()['memory_entries'] == 0
+
+    loaded = cache.load_result('key')
+    assert loaded['cached'] == 'disk'
+    assert loaded['output'].read() == b'x' * 100
+    assert cache.get_result_cache_stats()['memory_entries'] == 0
+
+
+def test_eviction_uses_entry_size(cache, monkeypatch):
+    first = make_result(1000)
+    monkeypatch.setattr(result_cache, 'RESULT_MEMORY_MAX_BYTES', int(1.5 * (
+        100 + sum(result_cache._value_size(first[field]) for field in result_cache.STORED_FIELDS)
+    )))
+    cache.save_result('first', first)
+    cache.save_result('second', make_result(1000))
+
+    stats = cache.get_result_cache_stats()
+    assert stats['memory_entries'] == 1
+    assert stats['memory_bytes'] <= result_cache.RESULT_MEMORY_MAX_BYTES
+    assert cache.load_result('second')['cached'] == 'memory'
@@ -0,0 +1,179 @@
+"""sheets_client - 로컬 가짜 토큰 / Sheets 값 엔드포인트로 클라이언트 캐시, 토큰 갱신, 연결 풀 확인"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import sheets_client
+
+pytest.importorskip("gspread")
+serialization = pytest.importorskip("cryptography.hazmat.primitives.serialization")
+rsa = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.rsa")
+
+
+class FakeGoogleServer(ThreadingHTTPServer):
+    """POST /token 은 순번 토큰, GET .../values:batchGet 은 요청한 범위를 그대로 돌려주는 서버"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _FakeGoogleHandler)
+        self.expires_in = 3600
+        self.token_requests = 0
+        self.value_requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _FakeGoogleHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.server.lock:
+            self.server.token_requests += 1
+            token = f"token-{self.server.token_requests}"
+        self._send({'access_token': token, 'expires_in': self.server.expires_in, 'token_type': 'Bearer'})
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.value_requests.append({
+                'authorization': self.headers.get('Authorization'),
+                'client_port': self.client_address[1],
+            })
+        self._send({'spreadsheetId': 'sheet', 'valueRanges': [{'range': 'Bulk!A1:A2', 'values': [['PSKU'], ['P1']]}]})
+
+    def _send(self, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def private_key_pem():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode('utf-8')
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = FakeGoogleServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(
+        'gspread.http_client.SPREADSHEET_VALUES_BATCH_URL', f"{server.url}/v4/spreadsheets/%s/values:batchGet"
+    )
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def credentials_dir(tmp_path, monkeypatch):
+    """service_account.json 이 없는 작업 폴더 - 자격증명 파일은 환경 변수로 지정"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv(sheets_client.CREDENTIALS_ENV_VAR, raising=False)
+    sheets_client.clear_google_sheets_client_cache()
+    yield tmp_path
+    sheets_client.clear_google_sheets_client_cache()
+
+
+def write_service_account(path, server, private_key_pem, email='bulk@example.iam.gserviceaccount.com'):
+    path.write_text(json.dumps({
+        'type': 'service_account',
+        'project_id': 'ebaybulk-test',
+        'private_key_id': 'test-key',
+        'private_key': private_key_pem,
+        'client_email': email,
+        'client_id': '1',
+        'token_uri': f"{server.url}/token",
+    }), encoding='utf-8')
+    return str(path)
+
+
+def test_client_reused_per_credential_source(server, credentials_dir, private_key_pem, monkeypatch):
+    first = write_service_account(credentials_dir / 'first.json', server, private_key_pem)
+    second = write_service_account(credentials_dir / 'second.json', server, private_key_pem, 'other@example.com')
+
+    monkeypatch.setenv(sheets_client.CREDENTIALS_ENV_VAR, first)
+    client = sheets_client.get_google_sheets_client()
+    assert sheets_client.get_google_sheets_client() is client
+    assert server.token_requests == 1
+
+    monkeypatch.setenv(sheets_client.CREDENTIALS_ENV_VAR, second)
+    other = sheets_client.get_google_sheets_client()
+    assert other is not client
+    assert server.token_requests == 2
+
+    monkeypatch.setenv(sheets_client.CREDENTIALS_ENV_VAR, first)
+    assert sheets_client.get_google_sheets_client() is client
+    assert server.token_requests == 2
+
+    # 파일이 바뀌면 새 클라이언트로 교체
+    write_service_account(credentials_dir / 'first.json', server, private_key_pem, 'rotated@example.com')
+    assert sheets_client.get_google_sheets_client() is not client
+    assert server.token_requests == 3
+
+
+def test_token_refreshed_inside_margin(server, credentials_dir, private_key_pem, monkeypatch):
+    path = write_service_account(credentials_dir / 'account.json', server, private_key_pem)
+    monkeypatch.setenv(sheets_client.CREDENTIALS_ENV_VAR, path)
+
+    # 만료까지 갱신 여유(TOKEN_REFRESH_MARGIN)보다 짧게 남은 토큰은 조회할 때마다 미리 갱신
+    server.expires_in = int(sheets_client.TOKEN_REFRESH_MARGIN.total_seconds()) - 60
+    client = sheets_client.get_google_sheets_client()
+    assert server.token_requests == 1
+    assert sheets_client.get_google_sheets_client() is client
+    assert server.token_requests == 2
+
+    # 여유가 충분한 토큰은 그대로 사용
+    server.expires_in = 3600
+    sheets_client.get_google_sheets_client()
+    assert server.token_requests == 3
+    sheets_client.get_google_sheets_client()
+    assert server.token_requests == 3
+
+    client.http_client.values_batch_get('sheet', ['Bulk!A1:A2'])
+    assert server.value_requests[-1]['authorization'] == 'Bearer token-3'
+
+
+def test_pooled_session_shared(server, credentials_dir, private_key_pem, monkeypatch):
+    path = write_service_account(credentials_dir / 'account.json', server, private_key_pem)
+    monkeypatch.setenv(sheets_client.CREDENTIALS_ENV_VAR, path)
+
+    clients = []
+    threads = [
+        threading.Thread(target=lambda: clients.append(sheets_client.get_google_sheets_client()))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    sessions = {id(client.http_client.session) for client in clients}
+    assert len(sessions) == 1
+    assert server.token_requests == 1
+
+    session = clients[0].http_client.session
+    adapter = session.get_adapter(server.url)
+    assert adapter._pool_maxsize == sheets_client.HTTP_POOL_SIZE
+
+    # 차례로 보낸 요청은 keep-alive 연결 하나를 재사용
+    for _ in range(5):
+        response = clients[0].http_client.values_batch_get('sheet', ['Bulk!A1:A2'])
+        assert response['valueRanges'][0]['values'] == [['PSKU'], ['P1']]
+    assert len({request['client_port'] for request in server.value_requests}) == 1
+    assert {request['authorization'] for request in server.value_requests} == {'Bearer token-1'}
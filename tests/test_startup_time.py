@@ -0,0 +1,13 @@
+"""시작 시간 - 새 인터프리터의 모듈 import 시간이 benchmark.STARTUP_BUDGET_SECONDS 이내인지 확인"""
+import pytest
+
+from benchmark import STARTUP_BUDGET_SECONDS, measure_import_time
+
+
+@pytest.mark.parametrize('module', sorted(STARTUP_BUDGET_SECONDS))
+def test_import_time_within_budget(module):
+    seconds = measure_import_time(module)
+    assert seconds is not None, f"{module} import 시간을 찾지 못했습니다."
+    assert seconds <= STARTUP_BUDGET_SECONDS[module], (
+        f"{module} import {seconds:.3f}s - 상한 {STARTUP_BUDGET_SECONDS[module]:.3f}s 초과"
+    )
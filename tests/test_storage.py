@@ -0,0 +1,62 @@
+"""storage - 기본 저장소, JSON → SQLite 이전 후 users.json 변경 경고"""
+import logging
+import os
+
+import pytest
+
+import storage
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / 'users.json'), str(tmp_path / 'history.json'), str(tmp_path / 'ebaybulk.db')
+
+
+def test_default_storage_is_json():
+    assert storage.DEFAULT_STORAGE == 'json'
+
+
+def test_warns_when_users_json_changed_after_migration(paths, caplog):
+    users_file, history_file, db_file = paths
+    json_store = storage.open_store('json', users_file, history_file, db_file)
+    json_store.insert_user({'name': 'A'})
+
+    with caplog.at_level(logging.WARNING):
+        sqlite_store = storage.open_store('sqlite', users_file, history_file, db_file)
+        assert [u['name'] for u in sqlite_store.list_users()] == ['A']
+        storage.open_store('sqlite', users_file, history_file, db_file)
+    assert not [r for r in caplog.records if r.levelno >= logging.WARNING]
+
+    json_store.insert_user({'name': 'B'})
+    stat = os.stat(users_file)
+    os.utime(users_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    with caplog.at_level(logging.WARNING):
+        storage.open_store('sqlite', users_file, history_file, db_file)
+    assert any('users.json' in r.getMessage() for r in caplog.records if r.levelno >= logging.WARNING)
+
+    # 다시 옮기면 경고 없음
+    caplog.clear()
+    storage.migrate_json_to_sqlite(users_file, history_file, storage.SqliteStore(db_file))
+    with caplog.at_level(logging.WARNING):
+        sqlite_store = storage.open_store('sqlite', users_file, history_file, db_file)
+    assert not [r for r in caplog.records if r.levelno >= logging.WARNING]
+    assert [u['name'] for u in sqlite_store.list_users()] == ['A', 'B']
+
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def test_returned_profiles_do_not_share_nested_lists(paths, backend):
+    users_file, history_file, db_file = paths
+    store = storage.open_store(backend, users_file, history_file, db_file)
+    profile = {'name': 'A', 'image_suffixes': ['_1'], 'price_rules': [{'brands': ['X']}], 'sites': ['US']}
+    user_id = store.insert_user(profile)['id']
+
+    # 넘긴 프로필 / 돌려받은 프로필을 고쳐도 캐시는 그대로
+    profile['sites'].append('UK')
+    store.get_user(user_id)['image_suffixes'].append('_2')
+    store.list_users()[0]['price_rules'][0]['brands'].append('Y')
+    store.update_user(user_id, lambda user: user)['sites'].append('DE')
+
+    user = store.get_user(user_id)
+    assert user['image_suffixes'] == ['_1']
+    assert user['price_rules'] == [{'brands': ['X']}]
+    assert user['sites'] == ['US']
@@ -0,0 +1,80 @@
+"""validation - 정상 데이터에서 오류가 나지 않는지 (단일 상품, PSKU 와 같은 자식 SKU, 빈 변경분)"""
+import pandas as pd
+import pytest
+
+from excel_generator import get_ebay_column_order
+from sites import ACTION_COLUMN
+from validation import validate_ebay_data
+
+CATEGORY_MAP = {'1001': {'path': 'Shoes', 'condition': '1000-New'}}
+
+
+def listing(psku, children, start_row):
+    """부모 1행 + 자식 행 [(SKU, OPTION)] 블록"""
+    options = [option for _, option in children if option]
+    parent = {
+        ACTION_COLUMN: 'Add', 'Custom label (SKU)': psku, 'Category ID': '1001', 'Category name': 'Shoes',
+        'Title': f"Product {psku}", 'Start price': '10.00', 'Condition ID': '1000-New',
+        'Relationship details': 'OPTIONS=' + ';'.join(options) if options else '',
+    }
+    rows = [parent] + [
+        {'Custom label (SKU)': sku, 'Relationship': 'Variation', 'Start price': '10.00',
+         'Relationship details': f"OPTIONS={option}" if option else ''}
+        for sku, option in children
+    ]
+    return rows, [start_row] + list(range(start_row, start_row + len(children)))
+
+
+def make_frame(*listings):
+    rows, index = [], []
+    for block_rows, block_index in listings:
+        rows.extend(block_rows)
+        index.extend(block_index)
+    df = pd.DataFrame(rows, columns=get_ebay_column_order(), index=pd.Index(index, name='sheet_row'), dtype=object)
+    return df.fillna('')
+
+
+def rules(findings):
+    return list(findings['rule'].astype(str))
+
+
+def test_single_variant_without_option_is_valid():
+    df = make_frame(listing('P1', [('P1-1', '')], 2), listing('P2', [('P2-1', 'Red'), ('P2-2', 'Blue')], 3))
+    assert rules(validate_ebay_data(df, CATEGORY_MAP)) == []
+
+
+def test_empty_options_in_multi_variant_listing():
+    df = make_frame(listing('P1', [('P1-1', 'Red'), ('P1-2', '')], 2))
+    findings = validate_ebay_data(df, CATEGORY_MAP)
+    assert rules(findings) == ['empty_options']
+    assert list(findings['sku']) == ['P1-2']
+
+
+def test_child_sku_equal_to_psku_is_valid():
+    df = make_frame(listing('P1', [('P1', '')], 2), listing('P2', [('P2', 'Red'), ('P2-2', 'Blue')], 3))
+    assert rules(validate_ebay_data(df, CATEGORY_MAP)) == []
+
+
+def test_duplicate_child_skus_reported():
+    df = make_frame(listing('P1', [('X1', 'Red')], 2), listing('P2', [('X1', 'Red'), ('P2-2', 'Blue')], 3))
+    findings = validate_ebay_data(df, CATEGORY_MAP)
+    assert rules(findings) == ['duplicate_sku', 'duplicate_sku']
+    assert set(findings['psku']) == {'P1', 'P2'}
+
+
+@pytest.mark.parametrize('allow_empty, expected', [(False, ['no_data']), (True, [])])
+def test_empty_frame(allow_empty, expected):
+    df = make_frame()
+    assert rules(validate_ebay_data(df, CATEGORY_MAP, allow_empty=allow_empty)) == expected
+
+
+def test_unchanged_delta_has_no_findings():
+    from benchmark import make_synthetic_bulk
+    from excel_generator import filter_create_rows, write_ebay_output
+
+    bulk_df, category_map, user = make_synthetic_bulk(30)
+    bulk_df = filter_create_rows(bulk_df)
+    full = write_ebay_output(bulk_df, category_map, user, 'csv')
+    result = write_ebay_output(bulk_df, category_map, user, 'csv', full['fingerprints'])
+    assert result['counts']['total'] == 0
+    assert len(result['findings']) == 0
@@ -0,0 +1,263 @@
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+# 설정하면 모든 trace() 가 켜지고 끝날 때 이 폴더에 trace JSON 을 저장
+TRACE_DIR_ENV_VAR = "EBAYBULK_TRACE_DIR"
+
+# 'json' 이면 진행 로그를 한 줄에 JSON 1개인 구조화 로그로 출력
+LOG_FORMAT_ENV_VAR = "EBAYBULK_LOG_FORMAT"
+
+logger = logging.getLogger("ebaybulk")
+
+# 지금 기록 중인 span - trace() 밖이면 None (span 은 시간만 재고 어디에도 붙지 않음)
+_current = contextvars.ContextVar("ebaybulk_span", default=None)
+
+# 진행 상황 수신 함수 listener(단계 이름, 처리 행 수, 전체 행 수) - 백그라운드 작업용 (generation_jobs 참고)
+# span 이 시작될 때와 progress() 때 호출되며, 취소된 작업이면 수신 함수가 예외를 던져 생성을 중단한다
+_listener = contextvars.ContextVar("ebaybulk_progress", default=None)
+
+
+class Span:
+    """이름 있는 구간 1개 - 소요 시간, 속성, 카운터, 하위 구간, 로그 이벤트
+
+    trace() 밖에서 만든 span 은 duration 만 재고 카운터/이벤트는 버린다 (꺼져 있을 때의 비용은 시계 두 번).
+    """
+
+    __slots__ = ('name', 'attrs', 'counters', 'children', 'events', 'start', 'end', 'recorded', '_token')
+
+    def __init__(self, name, attrs, recorded):
+        self.name = name
+        self.attrs = attrs
+        self.recorded = recorded
+        self.counters = {}
+        self.children = []
+        self.events = []
+        self.start = self.end = None
+        self._token = None
+
+    @property
+    def duration(self):
+        """소요 시간(초) - 진행 중이면 지금까지"""
+        if self.start is None:
+            return 0.0
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def count(self, key, n=1):
+        """카운터 증가 (행 수, 기록 bytes, 캐시 적중 등)"""
+        if self.recorded:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def set(self, **attrs):
+        """속성 추가"""
+        if self.recorded:
+            self.attrs.update(attrs)
+
+    def __enter__(self):
+        listener = _listener.get()
+        if listener is not None:
+            listener(self.name, None, None)
+        if self.recorded:
+            parent = _current.get()
+            if parent is not None:
+                parent.children.append(self)
+            self._token = _current.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        if self.recorded:
+            _current.reset(self._token)
+            self._token = None
+            if exc_type is not None:
+                self.attrs['error'] = f"{exc_type.__name__}: {exc}"
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    f"[span] {self.name} {self.duration * 1000:.1f}ms",
+                    extra={'fields': {'span': self.name, 'ms': round(self.duration * 1000, 3), **self.counters}}
+                )
+        return False
+
+
+def trace(name, enabled=None, **attrs):
+    """기록을 시작하는 최상위 span
+
+    enabled=None 이면 EBAYBULK_TRACE_DIR 가 설정되어 있을 때만 켠다. 이미 기록 중이면 하위 span 이 된다.
+    EBAYBULK_TRACE_DIR 가 설정되어 있으면 끝날 때 그 폴더에 trace JSON 을 저장한다.
+    """
+    if _current.get() is not None:
+        return Span(name, attrs, True)
+
+    trace_dir = os.environ.get(TRACE_DIR_ENV_VAR)
+    if enabled is None:
+        enabled = bool(trace_dir)
+    if not enabled:
+        return Span(name, attrs, False)
+    return _RootSpan(name, attrs, trace_dir)
+
+
+class _RootSpan(Span):
+    """최상위 span - 시작 시각을 남기고 끝나면 (설정 시) trace 파일 저장"""
+
+    __slots__ = ('started_at', 'trace_dir')
+
+    def __init__(self, name, attrs, trace_dir):
+        super().__init__(name, attrs, True)
+        self.started_at = datetime.now().isoformat(timespec='milliseconds')
+        self.trace_dir = trace_dir
+
+    def __exit__(self, exc_type, exc, tb):
+        super().__exit__(exc_type, exc, tb)
+        if self.trace_dir:
+            try:
+                os.makedirs(self.trace_dir, exist_ok=True)
+                stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+                write_trace(self, os.path.join(self.trace_dir, f"{self.name}_{stamp}.json"))
+            except OSError as e:
+                log("추적", f"trace 저장 실패: {str(e)}", level=logging.WARNING)
+        return False
+
+
+def span(name, **attrs):
+    """하위 구간 - 기록 중이면 지금 span 아래에 붙고, 아니면 시간만 잰다"""
+    return Span(name, attrs, _current.get() is not None)
+
+
+def current_span():
+    """지금 기록 중인 span (없으면 None)"""
+    return _current.get()
+
+
+def count(key, n=1):
+    """지금 span 의 카운터 증가 - span 객체를 넘겨받지 않는 하위 함수용"""
+    current = _current.get()
+    if current is not None:
+        current.counters[key] = current.counters.get(key, 0) + n
+
+
+def progress(done, total=None):
+    """행 배치 단위 진행 보고 (지금 단계 안에서 done / total 행) - 수신 함수가 없으면 아무 일도 하지 않음"""
+    listener = _listener.get()
+    if listener is not None:
+        listener(None, done, total)
+
+
+@contextlib.contextmanager
+def progress_listener(listener):
+    """이 블록 안의 span 시작 / progress() 를 listener 로 전달"""
+    token = _listener.set(listener)
+    try:
+        yield listener
+    finally:
+        _listener.reset(token)
+
+
+def log(tag, message, level=logging.INFO, **fields):
+    """진행 로그 '[태그] 메시지' - 기록 중이면 지금 span 의 이벤트로도 남김"""
+    current = _current.get()
+    if current is not None:
+        current.events.append({'at': time.perf_counter(), 'tag': tag, 'message': message, **fields})
+    if logger.isEnabledFor(level):
+        logger.log(level, f"[{tag}] {message}", extra={'fields': {'tag': tag, **fields}})
+
+
+def trace_to_dict(root):
+    """span 트리를 JSON 으로 바꿀 수 있는 dict 로 (시간은 최상위 시작 기준 ms)"""
+    origin = root.start
+
+    def convert(node):
+        return {
+            'name': node.name,
+            'start_ms': round((node.start - origin) * 1000, 3),
+            'duration_ms': round(node.duration * 1000, 3),
+            'attrs': node.attrs,
+            'counters': node.counters,
+            'events': [
+                {**event, 'at': round((event['at'] - origin) * 1000, 3)} for event in node.events
+            ],
+            'children': [convert(child) for child in node.children],
+        }
+
+    return {'started_at': getattr(root, 'started_at', None), 'root': convert(root)}
+
+
+def write_trace(root, path):
+    """trace JSON 저장 - Chrome / Perfetto 에서 열 수 있는 traceEvents 도 함께 기록"""
+    data = trace_to_dict(root)
+    events = []
+    pid = os.getpid()
+    tid = threading.get_ident()
+
+    def add(node):
+        events.append({
+            'name': node['name'], 'ph': 'X', 'pid': pid, 'tid': tid,
+            'ts': node['start_ms'] * 1000, 'dur': node['duration_ms'] * 1000,
+            'args': {**node['attrs'], **node['counters']},
+        })
+        for child in node['children']:
+            add(child)
+
+    add(data['root'])
+    data['traceEvents'] = events
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+    return path
+
+
+def flatten_trace(root):
+    """span 트리를 표시용 행 목록으로 [{depth, name, seconds, attrs, counters}] - 깊이 우선 순서"""
+    rows = []
+
+    def visit(node, depth):
+        rows.append({
+            'depth': depth, 'name': node.name, 'seconds': node.duration,
+            'attrs': dict(node.attrs), 'counters': dict(node.counters),
+        })
+        for child in node.children:
+            visit(child, depth + 1)
+
+    visit(root, 0)
+    return rows
+
+
+def configure_logging(level=logging.INFO, json_format=None):
+    """진행 로그 출력 설정 (CLI / 앱 시작 시 한 번) - 이미 핸들러가 있으면 그대로 둠
+
+    json_format=None 이면 EBAYBULK_LOG_FORMAT=json 일 때 구조화 로그.
+    """
+    if logger.handlers:
+        return
+    if json_format is None:
+        json_format = os.environ.get(LOG_FORMAT_ENV_VAR, '').lower() == 'json'
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(_JsonFormatter() if json_format else logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+class _JsonFormatter(logging.Formatter):
+    """로그 1건 = JSON 1줄 (시각, 수준, 메시지, 필드, 지금 span 이름)"""
+
+    def format(self, record):
+        current = _current.get()
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'message': record.getMessage(),
+            **getattr(record, 'fields', {}),
+        }
+        if current is not None:
+            entry.setdefault('span', current.name)
+        return json.dumps(entry, ensure_ascii=False, default=str)
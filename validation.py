@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+
+from sites import ACTION_COLUMN
+
+# eBay 제목 최대 길이 / 허용 가격 범위 (USD)
+TITLE_MAX_LENGTH = 80
+PRICE_MIN = 0.99
+PRICE_MAX = 99999.99
+
+# 검증 규칙 {규칙: (심각도, 설명)} - 결과 정렬/그룹 순서도 이 순서를 따른다
+VALIDATION_RULES = {
+    'no_data': ('error', '데이터가 없습니다'),
+    'missing_field': ('error', '필수 항목 누락'),
+    'missing_sku': ('error', 'SKU 누락'),
+    'missing_price': ('error', '가격 누락'),
+    'duplicate_sku': ('error', 'SKU 중복'),
+    'title_too_long': ('error', f'제목 {TITLE_MAX_LENGTH}자 초과'),
+    'empty_options': ('error', '베리에이션 OPTIONS 비어 있음'),
+    'price_out_of_range': ('warning', '가격 범위 벗어남'),
+    'unknown_category': ('warning', 'CAT 탭에 없는 카테고리 ID'),
+    'missing_image': ('error', '이미지 URL 없음 (404)'),
+    'image_check_failed': ('warning', '이미지 URL 확인 실패'),
+}
+SEVERITIES = ['error', 'warning']
+
+# 부모(PSKU) 행 필수 항목
+REQUIRED_PARENT_FIELDS = ['Custom label (SKU)', 'Category ID', 'Category name', 'Title', 'Start price', 'Condition ID']
+
+FINDING_COLUMNS = ['rule', 'severity', 'field', 'psku', 'sku', 'sheet_row']
+
+
+def validate_ebay_data(ebay_df, category_map, image_status=None, allow_empty=False):
+    """이베이 데이터 검증 - 모든 규칙을 컬럼 단위 마스크로 계산
+
+    ebay_df 의 인덱스는 원본 Bulk 시트 행 번호(convert_to_ebay_variations 결과)여야 한다.
+    image_status 에 image_checker.verify_image_urls 결과를 넘기면 없는 / 확인 실패 이미지가 있는 행도 보고한다.
+    allow_empty=True 이면 행이 없어도 no_data 로 보고하지 않는다 (바뀐 리스팅이 없는 변경분 생성).
+
+    반환값(DataFrame, 행마다 검증 결과 1건):
+        rule      - VALIDATION_RULES 의 규칙 이름
+        severity  - 'error' / 'warning'
+        field     - 문제가 된 이베이 컬럼
+        psku      - 리스팅 PSKU
+        sku       - 행의 SKU (부모 행은 PSKU 와 같음)
+        sheet_row - 원본 Bulk 시트 행 번호 (알 수 없으면 0)
+    """
+    if len(ebay_df) == 0:
+        checks = [] if allow_empty else [('no_data', '', np.array([0]))]
+        return _build_findings(checks, np.array([''], dtype=object), np.array([''], dtype=object), np.array([0]))
+
+    action = ebay_df[ACTION_COLUMN].to_numpy(dtype=object)
+    sku = ebay_df['Custom label (SKU)'].to_numpy(dtype=object)
+    relationship = ebay_df['Relationship'].to_numpy(dtype=object)
+    details = ebay_df['Relationship details'].to_numpy(dtype=object)
+    price_text = ebay_df['Start price'].to_numpy(dtype=object)
+
+    # 부모 행 = Add / Revise / End, 자식 행은 바로 앞 부모의 PSKU 를 가짐
+    is_listing = np.isin(action, ['Add', 'Revise', 'End'])
+    block = np.maximum(np.cumsum(is_listing) - 1, 0)
+    listing_rows = np.flatnonzero(is_listing)
+    psku = sku[listing_rows][block] if len(listing_rows) else np.full(len(sku), '', dtype=object)
+
+    # 종료(End) 행은 SKU 외에 값이 없으므로 검사하지 않음
+    # 각 규칙은 부모 / 자식 행 위치 배열에서 마스크로 위반 위치만 골라냄
+    is_parent = is_listing & (action != 'End')
+    is_variation = relationship == 'Variation'
+    parent_rows = np.flatnonzero(is_parent)
+    variation_rows = np.flatnonzero(is_variation)
+
+    def column(field, rows):
+        return ebay_df[field].to_numpy(dtype=object)[rows]
+
+    checks = []
+    for field in REQUIRED_PARENT_FIELDS:
+        checks.append(('missing_field', field, parent_rows[column(field, parent_rows) == '']))
+
+    checks.append(('missing_sku', 'Custom label (SKU)', variation_rows[sku[variation_rows] == '']))
+    checks.append(('missing_price', 'Start price', variation_rows[price_text[variation_rows] == '']))
+    # 부모 PSKU 와 자식 SKU 가 같은 구성은 정상이므로 자식 행끼리만 비교
+    checks.append(('duplicate_sku', 'Custom label (SKU)', _duplicate_rows(sku, variation_rows)))
+
+    titles = column('Title', parent_rows)
+    title_length = np.fromiter(map(len, titles), dtype=np.int64, count=len(titles))
+    checks.append(('title_too_long', 'Title', parent_rows[title_length > TITLE_MAX_LENGTH]))
+
+    # 자식 행이 둘 이상인 리스팅의 OPTIONS 와 그 자식 행 각각의 OPTIONS (단일 상품은 옵션 없이 자식 1행)
+    has_variations = np.bincount(block[variation_rows], minlength=len(listing_rows)) > 1
+    options_rows = np.flatnonzero((is_parent | is_variation) & has_variations[block])
+    checks.append(('empty_options', 'Relationship details', options_rows[details[options_rows] == '']))
+
+    priced_rows = np.flatnonzero(is_parent | is_variation)
+    priced_rows = priced_rows[price_text[priced_rows] != '']
+    price = _parse_prices(price_text[priced_rows])
+    checks.append(('price_out_of_range', 'Start price', priced_rows[(price < PRICE_MIN) | (price > PRICE_MAX)]))
+
+    if category_map:
+        category_id = column('Category ID', parent_rows)
+        known = pd.Series(category_id, dtype=object).isin(category_map.keys()).to_numpy()
+        checks.append(('unknown_category', 'Category ID', parent_rows[~known & (category_id != '')]))
+
+    if image_status is not None:
+        checks.extend(_image_checks(ebay_df['Item photo URL'].to_numpy(dtype=object), image_status))
+
+    sheet_rows = np.asarray(ebay_df.index, dtype=np.int64)
+    return _build_findings(checks, psku, sku, sheet_rows)
+
+
+def summarize_findings(findings):
+    """규칙별 건수 집계 DataFrame (rule, severity, label, count) - VALIDATION_RULES 순서"""
+    counts = findings.groupby(['rule', 'severity'], observed=True).size().rename('count').reset_index()
+    counts['label'] = counts['rule'].map(lambda rule: VALIDATION_RULES[rule][1])
+    return counts[['rule', 'severity', 'label', 'count']]
+
+
+def format_findings(findings):
+    """검증 결과를 사람이 읽는 문장 목록으로 변환 (CLI 출력용)"""
+    messages = []
+    for rule, field, psku, sku, sheet_row in zip(
+            findings['rule'], findings['field'], findings['psku'], findings['sku'], findings['sheet_row']):
+        label = VALIDATION_RULES[rule][1]
+        location = f"시트 {sheet_row}행 " if sheet_row else ""
+        target = f"{psku}/{sku}" if sku and sku != psku else (psku or sku)
+        target = f"[{target}] " if target else ""
+        detail = f" ({field})" if rule == 'missing_field' else ""
+        messages.append(f"{location}{target}{label}{detail}")
+    return messages
+
+
+def _duplicate_rows(sku, rows):
+    """rows 위치 중 두 번 이상 나오는 SKU 의 행 위치 (빈 SKU 제외)"""
+    rows = rows[sku[rows] != '']
+    values = sku[rows]
+    # 중복이 없는 경우가 대부분이므로 set 크기로 먼저 확인 (문자열 해시가 캐시되어 빠름)
+    if len(set(values)) == len(values):
+        return rows[:0]
+    return rows[pd.Series(values, dtype=object).duplicated(keep=False).to_numpy()]
+
+
+def _image_checks(photo_values, image_status):
+    """사진 URL 확인 결과를 행 위치로 되돌림 - 한 행에 문제 URL 이 여러 개여도 규칙별 1건"""
+    from image_checker import split_photo_urls, STATUS_MISSING, STATUS_ERROR
+
+    rows, urls = split_photo_urls(photo_values)
+    status = pd.Series(urls, dtype=object).map(image_status).to_numpy(dtype=object)
+    return [
+        ('missing_image', 'Item photo URL', np.unique(rows[status == STATUS_MISSING])),
+        ('image_check_failed', 'Item photo URL', np.unique(rows[status == STATUS_ERROR])),
+    ]
+
+
+def _parse_prices(values):
+    """가격 문자열 배열을 float 배열로 변환 - 숫자가 아닌 값은 범위 검사에서 제외되도록 NaN"""
+    try:
+        # 변환 결과 가격은 pricing.format_price_column 이 만든 '12.34' 형식이라 대부분 바로 변환됨
+        return values.astype(float)
+    except ValueError:
+        return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=float)
+
+
+def _build_findings(checks, psku, sku, sheet_rows):
+    """규칙별 위반 행 위치 목록을 하나의 결과 DataFrame 으로 합침"""
+    rows = [positions for _, _, positions in checks]
+    positions = np.concatenate(rows) if rows else np.array([], dtype=np.int64)
+    rule = np.repeat([rule for rule, _, _ in checks], [len(p) for p in rows])
+    field = np.repeat([field for _, field, _ in checks], [len(p) for p in rows])
+
+    rule = pd.Categorical(rule, categories=list(VALIDATION_RULES))
+    severity_codes = np.array([SEVERITIES.index(severity) for severity, _ in VALIDATION_RULES.values()])
+    severity = pd.Categorical.from_codes(severity_codes[rule.codes], categories=SEVERITIES)
+
+    return pd.DataFrame({
+        'rule': rule,
+        'severity': severity,
+        'field': pd.Categorical(field),
+        'psku': psku[positions],
+        'sku': sku[positions],
+        'sheet_row': sheet_rows[positions],
+    }, columns=FINDING_COLUMNS)